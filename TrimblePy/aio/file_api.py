@@ -0,0 +1,343 @@
+from TrimblePy.common.codec import decode_records
+from TrimblePy.common.pagination import acollect
+from TrimblePy.common.retry import RetryPolicy
+from TrimblePy.connect.file_api import SNAPSHOT_COLUMNS, SNAPSHOT_FIELDS, SNAPSHOT_INTERNED_KEYS, TrimbleFileApi, _snapshot_record
+
+
+class AsyncTrimbleFileApi(TrimbleFileApi):
+    '''
+    Async counterpart of TrimbleFileApi. Every method that talks to the API is a coroutine with the
+    same name and arguments; the data helpers (build_index, get_full_path, ...) are inherited.
+    '''
+
+    def __init__(self, authentication, project_id=None, blob_cache=None):
+        super().__init__(authentication, project_id=project_id, blob_cache=blob_cache)
+        self.transport = self.authentication.get_async_transport()
+
+    async def get_projects(self, fullyLoaded=True, minimal=False, sort='-lastVisited'):
+        url = f'{self.BASE_URL}projects?fullyLoaded={fullyLoaded}&minimal={minimal}&sort={sort}'
+        response = await self.transport.get(url, headers=self.headers)
+        return response.json()
+
+    async def get_file_snapshot(self):
+        url = f'{self.BASE_URL}files/fs/snapshot?projectId={self.project_id}&includeDeleted=false&includeAttachment=false&maxItems=100000'
+        response = await self.transport.get(url, headers=self.headers)
+        return response.json()
+
+    async def download(self, id, version_id=None, md5=None):
+        if self.blob_cache is None:
+            file = await self.transport.get(await self.download_url(id, version_id), headers=self.headers)
+            return file.content
+        with open(await self.cached_path(id, version_id, md5), 'rb') as f:
+            return f.read()
+
+    async def download_url(self, id, version_id=None, refresh=False):
+        if not refresh:
+            url = self.url_cache.get(id, version_id)
+            if url is not None:
+                return url
+        file_download_url = f"{self.BASE_URL}files/fs/{id}/downloadurl"
+        if version_id:
+            file_download_url += f"?versionId={version_id}"
+        res = await self.transport.get(file_download_url, headers=self.headers)
+        url = res.json()['url']
+        self.url_cache.put(id, version_id, url)
+        return url
+
+    async def download_urls(self, ids, version_ids=None, workers=16):
+        import asyncio
+        keys = list(ids)
+        versions = list(version_ids) if version_ids is not None else [None] * len(keys)
+        semaphore = asyncio.Semaphore(workers)
+
+        async def resolve(key, version_id):
+            async with semaphore:
+                try:
+                    return await self.download_url(key, version_id)
+                except (KeyError, ValueError, OSError):
+                    return None
+
+        urls = await asyncio.gather(*(resolve(key, version_id) for key, version_id in zip(keys, versions)))
+        failed = sum(url is None for url in urls)
+        if failed:
+            print(f"Could not resolve download urls for {failed} of {len(urls)} files")
+        if hasattr(ids, 'index') and hasattr(ids, 'to_numpy'):
+            import pandas as pd
+            return pd.Series(urls, index=ids.index, name='download_url', dtype=object)
+        return dict(zip(keys, urls))
+
+    async def cached_path(self, id, version_id=None, md5=None):
+        if version_id is None and md5 is None:
+            response = await self.transport.get(f"{self.BASE_URL}files/{id}", headers=self.headers)
+            response.raise_for_status()
+            data = response.json()
+            version_id, md5 = data.get('versionId'), data.get('hash')
+        path = self.blob_cache.path(version_id, md5)
+        if path is None:
+            response = await self.transport.get(await self.download_url(id, version_id), headers=self.headers)
+            response.raise_for_status()
+            path = self.blob_cache.put(response.content, version_id, md5)
+        return path
+
+    async def download_to_file(self, id, path=None, version_id=None, md5=None, chunk_size=1024 * 1024):
+        '''
+        The async transport reads whole bodies, so the content is held in memory once while it is written.
+        '''
+        from TrimblePy.connect.downloads import save_chunks
+        if self.blob_cache is not None:
+            cached = await self.cached_path(id, version_id, md5)
+            if path is None:
+                return cached
+            import shutil
+            shutil.copyfile(cached, path)
+            return path
+        if path is None:
+            import os
+            import tempfile
+            fd, path = tempfile.mkstemp(prefix='trimblepy-')
+            os.close(fd)
+        response = await self.transport.get(await self.download_url(id, version_id), headers=self.headers)
+        response.raise_for_status()
+        save_chunks([response.content], path, md5)
+        return path
+
+    async def open_mapped(self, id, version_id=None, md5=None):
+        from TrimblePy.connect.downloads import MappedFile
+        return MappedFile(await self.download_to_file(id, version_id=version_id, md5=md5), delete=self.blob_cache is None)
+
+    async def _parse_file(self, parse, id, version_id, md5):
+        path = await self.download_to_file(id, version_id=version_id, md5=md5)
+        try:
+            return parse(path)
+        finally:
+            if self.blob_cache is None:
+                import os
+                os.remove(path)
+
+    async def read_csv(self, id, version_id=None, md5=None, **kwargs):
+        import pandas as pd
+        return await self._parse_file(lambda path: pd.read_csv(path, **kwargs), id, version_id, md5)
+
+    async def read_excel(self, id, version_id=None, md5=None, **kwargs):
+        import pandas as pd
+        return await self._parse_file(lambda path: pd.read_excel(path, **kwargs), id, version_id, md5)
+
+    async def read_xml(self, id, version_id=None, md5=None, **kwargs):
+        import pandas as pd
+        return await self._parse_file(lambda path: pd.read_xml(path, **kwargs), id, version_id, md5)
+
+    async def read_xml_tree(self, id, version_id=None, md5=None):
+        try:
+            import lxml.etree as ET
+        except ImportError:
+            import xml.etree.ElementTree as ET
+        return await self._parse_file(ET.parse, id, version_id, md5)
+
+    def _sync_client(self):
+        # a TrimbleFileApi on the same authentication for the thread-based workers (Downloader, FileSync)
+        sync_api = TrimbleFileApi(self.authentication, self.project_id, blob_cache=self.blob_cache)
+        sync_api.url_cache = self.url_cache
+        return sync_api
+
+    async def download_files(self, files, directory, keep_paths=True, workers=8, verify=True, progress=True):
+        '''
+        See TrimbleFileApi.download_files. Downloader streams Range segments from its own worker threads,
+        so it runs on a sync client of the same authentication in a thread, without blocking the event loop.
+        '''
+        import asyncio
+        return await asyncio.to_thread(self._sync_client().download_files, files, directory,
+                                       keep_paths=keep_paths, workers=workers, verify=verify, progress=progress)
+
+    async def sync_files(self, path=None, full=False):
+        '''
+        See TrimbleFileApi.sync_files. FileSync refetches touched objects from a thread pool and holds a
+        process lock on the store, so it runs on a sync client of the same authentication in a thread.
+        '''
+        import asyncio
+        return await asyncio.to_thread(self._sync_client().sync_files, path=path, full=full)
+
+    async def stream_file_snapshot(self, sink=None, chunk_size=65536):
+        '''
+        Parses the snapshot items into sink one at a time. The async transport reads the whole body,
+        so only the intermediate item list is avoided.
+        '''
+        from TrimblePy.common.streaming import ColumnarSink, iter_json_items
+        if sink is None:
+            sink = ColumnarSink(intern=SNAPSHOT_INTERNED_KEYS)
+        append = getattr(sink, 'append', sink)
+        url = f'{self.BASE_URL}files/fs/snapshot?projectId={self.project_id}&includeDeleted=false&includeAttachment=false&maxItems=100000'
+        response = await self.transport.get(url, headers=self.headers)
+        response.raise_for_status()
+        content = response.content
+        for item in iter_json_items(content[i:i + chunk_size] for i in range(0, len(content), chunk_size)):
+            append(item)
+        return sink
+
+    async def get_file_records(self):
+        url = f'{self.BASE_URL}files/fs/snapshot?projectId={self.project_id}&includeDeleted=false&includeAttachment=false&maxItems=100000'
+        response = await self.transport.get(url, headers=self.headers)
+        response.raise_for_status()
+        return decode_records(response.content, SNAPSHOT_FIELDS, _snapshot_record, key='items')
+
+    async def get_files(self, stream=False, typed=False):
+        print("Getting File Snapshot From Trimble...")
+        if typed:
+            return self._files_from_records(await self.get_file_records())
+        if stream:
+            sink = await self.stream_file_snapshot()
+            return self._files_from_frame(sink.to_frame())
+        fs = await self.get_file_snapshot()
+        return self._files_from_snapshot(fs)
+
+    async def get_file_table(self, stream=False):
+        import pandas as pd
+        from TrimblePy.connect.file_table import FileTable
+        print("Getting File Snapshot From Trimble...")
+        if stream:
+            dfs = (await self.stream_file_snapshot()).to_frame()
+        else:
+            dfs = pd.json_normalize((await self.get_file_snapshot())['items'])
+        table = FileTable(self._file_frame(dfs))
+        print("Done!")
+        return table
+
+    async def get_folder_paths(self):
+        import pandas as pd
+        dfs = pd.json_normalize((await self.get_file_snapshot())['items'])
+        dfs.rename(columns=SNAPSHOT_COLUMNS, inplace=True)
+        return self.build_folder_paths(dfs)
+
+    async def safe_request(self, url, max_retries=3):
+        response = await self.transport.get(url, headers=self.headers, retry=RetryPolicy(max_attempts=max_retries))
+        response.raise_for_status()
+        return response
+
+    async def iter_activities(self, checkpoint=None, inspected=None, max_pages=None, prefetch=True):
+        '''
+        Async generator of activity pages - see TrimbleFileApi.iter_activities. The next page is requested
+        as a task while the current one is processed.
+        '''
+        import asyncio
+        from TrimblePy.connect.activities import ActivityCheckpoint
+        if inspected is not None and not isinstance(inspected, (set, frozenset)):
+            inspected = set(inspected)
+        state = ActivityCheckpoint(checkpoint, self.project_id) if checkpoint else None
+        if state is not None and state.done:
+            return
+        base = f'{self.BASE_URL}activities?projectId={self.project_id}'
+
+        async def fetch(last_id):
+            url = base if last_id is None else f'{base}&lastId={last_id}'
+            return (await self.safe_request(url)).json()
+
+        upcoming = None
+        try:
+            page = await fetch(state.last_id if state is not None else None)
+            pages = 0
+            while page:
+                last_id = page[-1]['id']
+                pages += 1
+                more = not (inspected is not None and last_id in inspected) and (max_pages is None or pages < max_pages)
+                upcoming = asyncio.ensure_future(fetch(last_id)) if more and prefetch else None
+                yield page
+                if state is not None:
+                    state.advance(page)
+                if not more:
+                    return
+                page = await upcoming if upcoming is not None else await fetch(last_id)
+                upcoming = None
+            if state is not None:
+                state.finish()
+        finally:
+            if upcoming is not None:
+                upcoming.cancel()
+
+    async def get_activities(self, inspected=None, max_depth=10000):
+        data_objects = []
+        async for page in self.iter_activities(inspected=inspected, max_pages=max_depth + 1):
+            data_objects.extend(page)
+        return data_objects
+
+    async def get_views(self):
+        url = f'{self.BASE_URL}views?projectId={self.project_id}'
+        response = await self.transport.get(url, headers=self.headers)
+        return response.json()
+
+    async def get_project_users(self, limit=None, stop=None):
+        get = lambda url: self.transport.get(url, headers=self.headers)
+        return await acollect(get, f"{self.BASE_URL}projects/{self.project_id}/users", limit=limit, stop=stop)
+
+    async def add_tag(self, tag):
+        headers = self.headers | {"Content-Type": "application/json"}
+        tag_object = {
+            "label": tag,
+            "projectId": self.project_id,
+        }
+        response = await self.transport.post(f"{self.BASE_URL}tags", headers=headers, json=tag_object)
+        return response.json()
+
+    async def get_tags(self):
+        url = f'{self.BASE_URL}tags?projectId={self.project_id}&includeDeletedObjects=false'
+        response = await self.transport.get(url, headers=self.headers)
+        return response.json()
+
+    async def get_tag(self, tag_id):
+        response = await self.transport.get(f'{self.BASE_URL}tags/{tag_id}', headers=self.headers)
+        return response.json()
+
+    async def get_tagged_objects(self, tag_id):
+        response = await self.transport.get(f'{self.BASE_URL}tags/{tag_id}/objects', headers=self.headers)
+        return response.json()
+
+    async def delete_tags(self, tag_id):
+        return await self.transport.delete(f'{self.BASE_URL}tags/{tag_id}', headers=self.headers)
+
+    async def add_objects_to_tag(self, tag_id, object_list):
+        headers = self.headers | {"Content-Type": "application/json"}
+        response = await self.transport.post(f"{self.BASE_URL}tags/{tag_id}/objects", headers=headers, json=object_list)
+        return response.json()
+
+    async def get_clashsets(self):
+        url = f'{self.BASE_URL}clashsets?projectId={self.project_id}'
+        response = await self.transport.get(url, headers=self.headers)
+        return response.json()
+
+    async def get_clash_details(self, clashsetId):
+        response = await self.transport.get(f'{self.BASE_URL}clashsets/{clashsetId}/items', headers=self.headers)
+        return response.json()
+
+    async def delete_clash(self, clashsetId):
+        headers = {'accept': '*/*'}
+        response = await self.transport.delete(f'{self.BASE_URL}clashsets/{clashsetId}', headers=headers)
+        if response.content:
+            return response.json()
+        else:
+            return response.status_code
+
+    async def post_clashset(self, name, tolerance, models, ignoreSameDiscipline=False, type_of_clash="CLEARANCE"):
+        headers = self.headers | {"Content-Type": "application/json"}
+        data = {
+            "name": name,
+            "type": type_of_clash,
+            "clearance": tolerance,
+            "ignoreSameDiscipline": ignoreSameDiscipline,
+            "models": models
+        }
+        response = await self.transport.post(f'{self.BASE_URL}clashsets', headers=headers, json=data)
+        return response.json()
+
+    async def list_all_clash_items(self, clashsetId):
+        response = await self.transport.get(f'{self.BASE_URL}clashsets/{clashsetId}/items', headers=self.headers)
+        return response.json()
+
+    async def get_todos(self):
+        response = await self.transport.get(f"{self.BASE_URL}todos?projectId={self.project_id}", headers=self.headers)
+        return response.json()
+
+    async def get_todo_attachments(self, todoId):
+        response = await self.transport.get(f"{self.BASE_URL}todos/{todoId}/attachments", headers=self.headers)
+        return response.json()
+
+    async def get_2d_view(self, view_id):
+        response = await self.transport.get(f"{self.BASE_URL}views2d/{view_id}", headers=self.headers)
+        return response.json()
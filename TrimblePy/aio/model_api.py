@@ -0,0 +1,89 @@
+import asyncio
+
+from TrimblePy.common.codec import decode_records
+from TrimblePy.common.retry import RetryPolicy
+from TrimblePy.connect.model_api import ENTITY_FIELDS, ModelApi
+
+
+class AsyncModelApi(ModelApi):
+    '''
+    Async counterpart of ModelApi - same method names, returning coroutines. Entity pages and
+    models are fetched concurrently; the DataFrame builders are inherited unchanged.
+    '''
+
+    def __init__(self, authentication):
+        super().__init__(authentication)
+        self.transport = self.authentication.get_async_transport()
+
+    async def get_model_layers(self, model_id):
+        response = await self.transport.get(f"{self.BASE_URL}models/{model_id}/layers", headers=self.headers)
+        return response.json()
+
+    async def get_model_entities(self, model_id, offset):
+        response = await self.transport.get(self._entities_url(model_id, offset), headers=self.headers)
+        return response.json()
+
+    async def get_pset_defs(self, model_id):
+        response = await self.transport.get(f"{self.BASE_URL}models/{model_id}/psetdefs", headers=self.headers)
+        return response.json()
+
+    async def get_model_info(self, versionId):
+        if not self.authentication.access_token:
+            raise ValueError("No access token available.")
+        url = f"{self.BASE_URL}models/{versionId}?include=metadata"
+        try:
+            response = await self.transport.get(url, headers=self.headers, timeout=10, retry=RetryPolicy(max_attempts=5))
+            response.raise_for_status()
+            return response.json()
+        except Exception as err:
+            print(f"An error occurred for versionId {versionId}: {err}")
+            return None
+
+    async def build_df_models(self, versionIds):
+        import pandas as pd
+        results = await asyncio.gather(*(self.get_model_info(versionId) for versionId in versionIds))
+        df_models = pd.DataFrame([data for data in results if data])
+        df_models.drop(columns=["hierarchyTypes", "metadata"], inplace=True)
+        return df_models
+
+    async def construct_model(self, df_row):
+        model = self._model_from_row(df_row)
+        model.entities = await self.get_entities(df_row.versionId, df_row.entityCount, model)
+        return model
+
+    async def construct_models(self, df_rows, n_workers=None):
+        '''
+        Constructs every model concurrently (n_workers is accepted for compatibility - concurrency is
+        bounded by the async transport).
+        '''
+        return await asyncio.gather(*(self.construct_model(df_row) for _, df_row in df_rows.iterrows()))
+
+    async def get_entity_data(self, model_id, entity_count):
+        page_count = max(-(-int(entity_count) // 1000), 1)
+        pages, psets, layers = await asyncio.gather(
+            asyncio.gather(*(self.get_model_entities(model_id, offset=i * 1000) for i in range(page_count))),
+            self.get_pset_defs(model_id),
+            self.get_model_layers(model_id),
+        )
+        data_ = []
+        for page in pages:
+            data_.extend(page["items"])
+        return data_, psets["items"], layers["items"]
+
+    async def get_entities(self, model_id, entity_count, model=None):
+        async def page(offset):
+            response = await self.transport.get(self._entities_url(model_id, offset), headers=self.headers)
+            response.raise_for_status()
+            return response.content
+
+        page_count = max(-(-int(entity_count) // 1000), 1)
+        pages, psets, layers = await asyncio.gather(
+            asyncio.gather(*(page(i * 1000) for i in range(page_count))),
+            self.get_pset_defs(model_id),
+            self.get_model_layers(model_id),
+        )
+        build = self._entity_builder(psets["items"], layers["items"], model)
+        entities = []
+        for content in pages:
+            entities.extend(decode_records(content, ENTITY_FIELDS, build, key='items'))
+        return entities
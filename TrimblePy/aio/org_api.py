@@ -0,0 +1,30 @@
+from TrimblePy.org.org_api import OrgApi
+
+
+class AsyncOrgApi(OrgApi):
+    '''
+    Async counterpart of OrgApi - same method names, returning coroutines.
+    '''
+
+    def __init__(self, authentication, project_id=None):
+        super().__init__(authentication, project_id=project_id)
+        self.transport = self.authentication.get_async_transport()
+
+    async def get_discovery_trees(self, forestId):
+        response = await self.transport.get(f"{self.BASE_URL}forests/{forestId}/trees", headers=self.headers)
+        return response.json()
+
+    async def get_discovery_tree(self, forestId, treeId):
+        response = await self.transport.get(f"{self.BASE_URL}forests/{forestId}/trees/{treeId}", headers=self.headers)
+        return response.json()
+
+    async def get_nodes(self, forestId, treeId):
+        response = await self.transport.get(f"{self.BASE_URL}forests/{forestId}/trees/{treeId}/nodes", headers=self.headers)
+        return response.json()
+
+    async def get_node(self, forestId, treeId, nodeId):
+        response = await self.transport.get(
+            f"{self.BASE_URL}forests/{forestId}/trees/{treeId}/nodes/{nodeId}",
+            headers=self.headers,
+        )
+        return response.json()
@@ -0,0 +1,71 @@
+import asyncio
+
+from TrimblePy.common import codec
+from TrimblePy.pset.pset_api import PsetApi
+
+
+class AsyncPsetApi(PsetApi):
+    '''
+    Async counterpart of PsetApi - same method names, returning coroutines. mp_helper runs the pset
+    updates as concurrent requests in this process instead of a process pool.
+    '''
+
+    def __init__(self, authentication, project_id=None):
+        super().__init__(authentication, project_id=project_id)
+        self.transport = self.authentication.get_async_transport()
+
+    async def get_lib_defs(self, lib_id):
+        response = await self.transport.get(f"{self.BASE_URL}libs/{lib_id}/defs", headers=self.headers)
+        return response.json()
+
+    async def get_object_psets(self, object_id, modelId=None, versionId=None):
+        notation = self.encoder(self.frn_notation(object_id, modelId, versionId))
+        response = await self.transport.get(f"{self.BASE_URL}psets/{notation}", headers=self.headers)
+        return response.json()
+
+    async def update_pset(self, props, libId, defId, object_id, modelId=None, versionId=None, headers=None, new=False):
+        if headers is None:
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+            }
+        else:
+            headers = dict(headers)
+        notation = self.frn_notation(object_id, modelId, versionId)
+        if new == True:
+            headers['If-None-Match'] = '*'
+        response = await self.transport.patch(
+            f"{self.BASE_URL}psets/{notation}/{libId}/{defId}",
+            headers=headers,
+            data=codec.dumps(props),
+        )
+        return response.json()
+
+    async def create_library(self, data):
+        response = await self.transport.post(f"{self.BASE_URL}libs", headers=self.headers, data=codec.dumps(data))
+        return response.json()
+
+    async def create_pset(self, data, libId):
+        response = await self.transport.post(f"{self.BASE_URL}libs/{libId}/defs", headers=self.headers, data=codec.dumps(data))
+        return response.json()
+
+    async def update_pset_wrapper(self, args):
+        return await self.update_pset(*args)
+
+    async def mp_helper(self, objects):
+        '''
+        Applies update_pset to every argument tuple concurrently. Results keep the order of objects.
+        '''
+        from tqdm import tqdm
+        progress = tqdm(total=len(objects))
+
+        async def update(args):
+            try:
+                return await self.update_pset_wrapper(args)
+            finally:
+                progress.update(1)
+
+        try:
+            return await asyncio.gather(*(update(args) for args in objects))
+        finally:
+            progress.close()
@@ -0,0 +1,110 @@
+import asyncio
+
+from TrimblePy.common.retry import RetryPolicy
+from TrimblePy.common.codec import decode_record
+from TrimblePy.common.pagination import acollect
+from TrimblePy.topic.topics_api import VIEWPOINT_FIELDS, Topic, TopicApi, Viewpoint
+
+
+class AsyncTopicApi(TopicApi):
+    '''
+    Async counterpart of TopicApi - same method names, returning coroutines. get_all_viewpoints
+    fetches every viewpoint as concurrent requests in this process instead of a process pool.
+    '''
+
+    def __init__(self, authentication, project_id):
+        super().__init__(authentication, project_id)
+        self.transport = self.authentication.get_async_transport()
+
+    async def get_topics(self, typed=False, limit=None, stop=None):
+        decode = self._decode_topics if typed else self._decode_json
+        get = lambda url: self.transport.get(url, headers=self.headers)
+        return await acollect(get, f"{self.BASE_URL}projects/{self.project_id}/topics?skiptoken", decode=decode, limit=limit, stop=stop)
+
+    async def construct_topics(self):
+        return await self.get_topics(typed=True)
+
+    async def get_viewpoint(self, topic_id, viewpoint_guid, typed=False):
+        import aiohttp
+        import requests
+        try:
+            response = await self.transport.get(
+                f"{self.BASE_URL}projects/{self.project_id}/topics/{topic_id}/viewpoints/{viewpoint_guid}",
+                headers=self.headers,
+                retry=RetryPolicy(max_attempts=5),
+            )
+            response.raise_for_status()
+        except (requests.RequestException, aiohttp.ClientError, asyncio.TimeoutError) as err:
+            print(f"Failed to get viewpoint {viewpoint_guid} for topic {topic_id}: {err}")
+            return None
+        if typed:
+            return decode_record(response.content, VIEWPOINT_FIELDS, Viewpoint)
+        return response.json()
+
+    async def construct_viewpoint(self, topic):
+        if topic.viewpoint is None or 'guid' not in topic.viewpoint:
+            return None
+        viewpoint_data = await self.get_viewpoint(topic.guid, topic.viewpoint['guid'])
+        return self.construct_viewpoint_data(topic, viewpoint_data)
+
+    async def _get_viewpoint_helper(self, args):
+        return await self.get_viewpoint(*args)
+
+    async def get_all_viewpoints(self, topics, pool_size=None):
+        '''
+        Fetches the viewpoint of every topic concurrently (pool_size is accepted for compatibility -
+        concurrency is bounded by the async transport).
+        '''
+        topic_viewpoint_args = [(topic.guid, topic.viewpoint['guid']) for topic in topics if 'guid' in (topic.viewpoint or {})]
+        viewpoints = await asyncio.gather(*(self._get_viewpoint_helper(args) for args in topic_viewpoint_args))
+        return {args[0]: viewpoint for args, viewpoint in zip(topic_viewpoint_args, viewpoints) if viewpoint is not None}
+
+    async def construct_all_viewpoints(self, topics, pool_size=None):
+        topics_viewpoints = await self.get_all_viewpoints(topics)
+        for topic in topics:
+            if topic.guid in topics_viewpoints:
+                topic.viewpoint = self.construct_viewpoint_data(topic, topics_viewpoints[topic.guid])
+
+    async def create_new_issue(self, topic_data, viewpoint_data):
+        headers = self.headers | {"Content-Type": "application/json"}
+        topic_dict = Topic(**topic_data).to_dict()
+        view_dict = Viewpoint(**viewpoint_data).to_dict()
+        endpoint = f"{self.BASE_URL}projects/{self.project_id}/topics"
+        issue_response = await self.transport.post(endpoint, json=topic_dict, headers=headers)
+        if issue_response.ok:
+            issue_guid = issue_response.json().get('guid')
+            view_response = await self.transport.post(f"{endpoint}/{issue_guid}/viewpoints", json=view_dict, headers=headers)
+            if view_response.ok:
+                return issue_response.json(), view_response.json()
+            else:
+                return f"Failed to create viewpoint: {view_response.content}"
+        else:
+            return f"Failed to create issue: {issue_response.content}"
+
+    async def delete_topic(self, topic_id):
+        try:
+            response = await self.transport.delete(
+                f"https://open31.connect.trimble.com/bcf/2.1/projects/{self.project_id}/topics/{topic_id}",
+                headers=self.headers,
+            )
+        except Exception:
+            return 'error'
+        return topic_id, response.text
+
+    async def update_viewpoint(self, topic):
+        headers = self.headers | {"Content-Type": "application/json"}
+        view_endpoint = f"{self.BASE_URL}projects/{self.project_id}/topics/{topic.guid}/viewpoints"
+        view_response = await self.transport.post(view_endpoint, json=topic.viewpoint.to_dict(), headers=headers)
+        if view_response.ok:
+            return "Issue and viewpoint created successfully"
+        else:
+            return f"Failed to create viewpoint: {view_response.content}"
+
+    async def update_files(self, topic):
+        headers = self.headers | {"Content-Type": "application/json"}
+        url = f"{self.BASE_URL}projects/{self.project_id}/topics/{topic.guid}/files"
+        response = await self.transport.put(url, json=topic.files, headers=headers)
+        if response.ok:
+            return "Files updated successfully"
+        else:
+            return f"Failed to update files: {response.content}"
@@ -0,0 +1,297 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+from TrimblePy.common import codec
+from TrimblePy.common.retry import RetryPolicy
+
+# aiohttp is only needed by the async clients, so it is imported when the first session is created.
+
+
+class AsyncResponse:
+    '''
+    A fully read response, shaped like requests.Response so the async clients can use the same
+    response handling as the sync ones.
+    '''
+
+    def __init__(self, method, url, status_code, headers, content):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return codec.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def close(self):
+        pass
+
+
+class AsyncTransport:
+    '''
+    Shared aiohttp session used by the async API clients.
+
+    One session (and connection pool) is kept per event loop. max_concurrency bounds the number of
+    open connections - further requests queue in the pool - so callers can gather thousands of
+    coroutines without opening thousands of connections. Requests are retried with the same
+    RetryPolicy as the sync Transport.
+    '''
+
+    def __init__(self, max_concurrency=64, limit_per_host=32, timeout=(10, 300), compression=True, retry=None, rate_limiter=None, metrics=None):
+        """
+        Args:
+            max_concurrency (int, optional): Maximum number of open connections (requests in flight). Defaults to 64.
+            limit_per_host (int, optional): Maximum number of connections per host. Defaults to 32.
+            timeout (float or tuple, optional): Default (connect, read) timeout in seconds. Defaults to (10, 300).
+            compression (bool, optional): Ask the server for gzip/deflate encoded responses. Defaults to True.
+            retry (RetryPolicy, optional): Retry / backoff policy. Defaults to RetryPolicy().
+            rate_limiter (RateLimiter, optional): Client-side rate limiter applied before every attempt. Defaults to None.
+            metrics (Metrics, optional): Collects per-endpoint request metrics. Defaults to None.
+        """
+        self.max_concurrency = max_concurrency
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.compression = compression
+        self.retry = retry or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self._session = None
+        self._loop = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_session=None, _loop=None)
+        return state
+
+    @staticmethod
+    def _client_timeout(timeout):
+        import aiohttp
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(total=timeout)
+
+    def _session_for_loop(self):
+        import aiohttp
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._loop is not loop or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._client_timeout(self.timeout),
+                headers={'Accept-Encoding': 'gzip, deflate' if self.compression else 'identity'},
+            )
+            self._loop = loop
+        return self._session
+
+    async def _acquire(self, url):
+        limiter = self.rate_limiter
+        while True:
+            # shared buckets are taken in a SQLite transaction that can wait on other processes - off the event loop
+            if limiter.shared_path:
+                wait = await asyncio.to_thread(limiter.try_acquire, url)
+            else:
+                wait = limiter.try_acquire(url)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def request(self, method, url, headers=None, timeout=None, retry=None, idempotent=None, **kwargs):
+        """
+        Sends a request and reads the whole body, retrying according to the retry policy.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request url.
+            headers (dict, optional): Request headers.
+            timeout (float or tuple, optional): Overrides the default timeout.
+            retry (RetryPolicy, optional): Overrides the retry policy for this call.
+            idempotent (bool, optional): Overrides whether the call is safe to repeat.
+            **kwargs: Passed on to aiohttp.ClientSession.request (data, json, params, ...). A json= body
+                is encoded with the codec.
+
+        Returns:
+            AsyncResponse: The last response. Connection errors are raised once the retries are used up.
+        """
+        import aiohttp
+        session = self._session_for_loop()
+        headers = codec.encode_json_body(kwargs, headers)
+        if timeout is None:
+            timeout = self.timeout
+        policy = retry or self.retry
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None:
+                await self._acquire(url)
+            try:
+                attempt_timeout = self._client_timeout(policy.attempt_timeout(timeout, started))
+                async with session.request(method, url, headers=headers, timeout=attempt_timeout, **kwargs) as raw:
+                    response = AsyncResponse(method, str(raw.url), raw.status, raw.headers, await raw.read())
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+                delay = policy.next_delay(attempt, started) if policy.should_retry_error(method, idempotent) else None
+                if delay is None:
+                    if self.metrics is not None:
+                        self.metrics.record(method, url, None, time.monotonic() - started, 0, attempt - 1, err)
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            if policy.should_retry_status(method, response.status_code, idempotent):
+                delay = policy.next_delay(attempt, started, response)
+                if delay is not None:
+                    await asyncio.sleep(delay)
+                    continue
+            if self.metrics is not None:
+                self.metrics.record(method, url, response.status_code, time.monotonic() - started, len(response.content), attempt - 1)
+            return response
+
+    async def get(self, url, headers=None, **kwargs):
+        return await self.request('GET', url, headers=headers, **kwargs)
+
+    async def post(self, url, headers=None, **kwargs):
+        return await self.request('POST', url, headers=headers, **kwargs)
+
+    async def put(self, url, headers=None, **kwargs):
+        return await self.request('PUT', url, headers=headers, **kwargs)
+
+    async def patch(self, url, headers=None, **kwargs):
+        return await self.request('PATCH', url, headers=headers, **kwargs)
+
+    async def delete(self, url, headers=None, **kwargs):
+        return await self.request('DELETE', url, headers=headers, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class AsyncAuthorizedTransport:
+    '''
+    An AsyncTransport bound to an Authentication - the async counterpart of AuthorizedTransport.
+    Token renewal is blocking, so it runs in a worker thread and shares the Authentication's
+    single-flight lock with the sync clients.
+    '''
+
+    def __init__(self, transport, authentication):
+        self.transport = transport
+        self.authentication = authentication
+
+    async def _token(self):
+        auth = self.authentication
+        if auth.expires_in and auth.refresh_token and datetime.now() > auth.expires_in:
+            return await asyncio.to_thread(auth.current_access_token)
+        return auth.access_token
+
+    async def request(self, method, url, headers=None, **kwargs):
+        headers = dict(headers or {})
+        token = await self._token()
+        headers['Authorization'] = f'Bearer {token}'
+        response = await self.transport.request(method, url, headers=headers, **kwargs)
+        if response.status_code == 401 and await asyncio.to_thread(self.authentication.renew_tokens_once, token):
+            headers['Authorization'] = f'Bearer {self.authentication.access_token}'
+            response = await self.transport.request(method, url, headers=headers, **kwargs)
+        return response
+
+    async def get(self, url, headers=None, **kwargs):
+        return await self.request('GET', url, headers=headers, **kwargs)
+
+    async def post(self, url, headers=None, **kwargs):
+        return await self.request('POST', url, headers=headers, **kwargs)
+
+    async def put(self, url, headers=None, **kwargs):
+        return await self.request('PUT', url, headers=headers, **kwargs)
+
+    async def patch(self, url, headers=None, **kwargs):
+        return await self.request('PATCH', url, headers=headers, **kwargs)
+
+    async def delete(self, url, headers=None, **kwargs):
+        return await self.request('DELETE', url, headers=headers, **kwargs)
+
+    async def close(self):
+        await self.transport.close()
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_default_async_transport():
+    '''
+    Returns the process-wide AsyncTransport shared by Authentication objects that weren't given their own.
+    '''
+    global _default_transport
+    if _default_transport is None:
+        with _default_lock:
+            if _default_transport is None:
+                _default_transport = AsyncTransport()
+    return _default_transport
+
+
+# -----------------------------------------------------------------
+# SYNC WRAPPERS
+# -----------------------------------------------------------------
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='trimblepy-async', daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coroutine):
+    '''
+    Runs a coroutine on the shared background event loop and blocks until it finishes.
+    Works from plain scripts as well as from threads that already run an event loop (e.g. notebooks).
+    '''
+    return asyncio.run_coroutine_threadsafe(coroutine, _background_loop()).result()
+
+
+class SyncClient:
+    '''
+    Blocking wrapper around an async client. Coroutine methods run on a shared background event loop,
+    so bulk methods (e.g. get_all_viewpoints) still run concurrently while the caller just blocks.
+
+    Usage:
+        topic_api = SyncClient(AsyncTopicApi(authentication=auth, project_id=project_id))
+        topics = topic_api.construct_topics()
+        topic_api.construct_all_viewpoints(topics)
+    '''
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not asyncio.iscoroutinefunction(attribute):
+            return attribute
+
+        def blocking(*args, **kwargs):
+            return run_sync(attribute(*args, **kwargs))
+        blocking.__name__ = name
+        blocking.__doc__ = attribute.__doc__
+        return blocking
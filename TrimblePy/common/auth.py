@@ -1,23 +1,35 @@
 import os
 import base64
-import requests
-import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.types import NVARCHAR
-from dotenv import load_dotenv, set_key
-import webbrowser
+import json
+import threading
 from datetime import datetime, timedelta
+from TrimblePy.common.regions import get_default_region_cache
+from TrimblePy.common.token_state import EnvTokenState
+from TrimblePy.common.transport import AuthorizedTransport, get_default_transport
 
+# pandas, sqlalchemy, dotenv and webbrowser are imported by the methods that need them so that
+# scripts and pool workers that never touch SQL don't pay for loading them.
+
+_env_loaded = False
+
+
+def load_env():
+    '''
+    Loads environment variables from the .env file (only once per process).
+    '''
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
 
-# Load environment variables
-load_dotenv()
 
 class Authentication:
     
     ENV_ACCESS_TOKEN_NAME = 'TRIMBLE_ACCESS_TOKEN'
     ENV_REFRESH_TOKEN_NAME = 'TRIMBLE_REFRESH_TOKEN'
     
-    def __init__(self, token_folder='auth', client_id=None, client_secret=None, redirect_url=None, token_retrieval_method=None, sql_available=False, region=None):
+    def __init__(self, token_folder='auth', client_id=None, client_secret=None, redirect_url=None, token_retrieval_method=None, sql_available=False, region=None, transport=None, region_cache=None):
         """
         Initializes an instance of the Auth class.
 
@@ -28,7 +40,10 @@ class Authentication:
             redirect_url (str, optional): The redirect URL for Trimble authentication. If not provided, it will be fetched from the environment variable 'TRIMBLE_REDIRECT_URL'.
             sql_available (bool, optional): Flag indicating whether SQL components should be set up. Defaults to True.
             token_retrieval_method (env,sql,web, optional): Flag indicating whether SQL components should be set up. Defaults to True.
+            transport (Transport, optional): HTTP transport shared by every API client built from this instance. Defaults to the process-wide transport.
+            region_cache (RegionCache, optional): Cache of the regions document used to resolve the endpoints. Defaults to the shared on-disk cache.
         """
+        load_env()
         self.expires_in = None
         self.access_token = None
         self.refresh_token = None
@@ -40,9 +55,34 @@ class Authentication:
         self.redirect_url = redirect_url or os.environ.get('TRIMBLE_REDIRECT_URL')
         self.token_retrieval_method = token_retrieval_method
         self.endpoints = {}
+        self.transport = transport or get_default_transport()
+        self._authorized_transport = None
+        self.async_transport = None
+        self._async_authorized_transport = None
+        self._renew_lock = threading.Lock()
+        self.token_manager = None
+        self.region_cache = region_cache
+        self.region = region.lower() if region else None
+        self.engine = None
+        self.env_state = None
+        self._sql_token_table_ready = False
+        self._sql_tokens_cache = None
+        self._cache_scope = None
         if region:
             self.set_base_url(region)
 
+    def __getstate__(self):
+        # locks can't be pickled - the api objects are sent to multiprocessing.Pool workers
+        state = self.__dict__.copy()
+        del state['_renew_lock']
+        state['_authorized_transport'] = None
+        state['_async_authorized_transport'] = None
+        state['engine'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._renew_lock = threading.Lock()
 
 
     def set_base_url(self, selected_region):
@@ -53,28 +93,53 @@ class Authentication:
         'ap': Asia Pacific
         'ap2': Australia
         '''
-        selected_region = selected_region.lower()
-        response = requests.get('https://app31.connect.trimble.com/tc/api/2.0/regions', headers={"accept": "application/json"})
-        data = response.json()
-        for region_info in data:
-            if region_info['serviceRegion'] == selected_region:
-                self.endpoints['tc'] = region_info['tc-api']
-                self.endpoints['objects-sync'] = region_info['objects-sync-api']
-                self.endpoints['org'] = region_info['org-api']
-                self.endpoints['pset'] = region_info['pset-api']
-                self.endpoints['projects'] = region_info['projects-api']
-                self.endpoints['wopi'] = region_info['wopi-api']
-                self.endpoints['batch'] = region_info['batch-api']
-                self.endpoints['user'] = region_info['user-api']
-                self.endpoints['model'] = region_info['model-api']
-                self.endpoints['topic'] = region_info['topic-api']
-                self.endpoints['origin'] = region_info['origin']
-                break
+        self.region = selected_region.lower()
+        if self.region_cache is None:
+            self.region_cache = get_default_region_cache()
+        self.endpoints.update(self.region_cache.get_endpoints(selected_region))
+        self.transport.mount_endpoints(self.endpoints)
 
     def get_endpoint(self, api_name):
         # Returns the endpoint URL for the given api_name
         return self.endpoints.get(api_name)
 
+    def get_transport(self):
+        '''
+        Returns the transport API clients send through - it attaches the current access token to every request.
+        '''
+        if self._authorized_transport is None:
+            self._authorized_transport = AuthorizedTransport(self.transport, self)
+        return self._authorized_transport
+
+    def get_async_transport(self):
+        '''
+        Returns the async counterpart of get_transport, used by the clients in TrimblePy.aio.
+        '''
+        if self._async_authorized_transport is None:
+            from TrimblePy.aio.transport import AsyncAuthorizedTransport, get_default_async_transport
+            if self.async_transport is None:
+                self.async_transport = get_default_async_transport()
+            if self.async_transport.rate_limiter is not None:
+                self.async_transport.rate_limiter.register_endpoints(self.endpoints)
+            self._async_authorized_transport = AsyncAuthorizedTransport(self.async_transport, self)
+        return self._async_authorized_transport
+
+    def cache_scope(self):
+        '''
+        Returns the key that separates cached responses of different users: the subject of the access
+        token (read from the JWT payload, not verified) with the client id and region.
+        '''
+        token = self.access_token
+        if self._cache_scope is None or self._cache_scope[0] != token:
+            subject = ''
+            try:
+                payload = token.split('.')[1]
+                subject = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4))).get('sub', '')
+            except Exception:
+                pass
+            self._cache_scope = (token, f'{subject}|{self.client_id or ""}|{self.region or ""}')
+        return self._cache_scope[1]
+
 
 # -----------------------------------------------------------------
 # .ENV METHODS
@@ -89,11 +154,13 @@ class Authentication:
             refresh_token (str): The refresh token to be saved.
             expires_in (int): The number of seconds until the token expires.
         """
-        self._save_token_to_env(self.ENV_ACCESS_TOKEN_NAME, access_token)
-        self._save_token_to_env(self.ENV_REFRESH_TOKEN_NAME, refresh_token)
         # Convert expires_in seconds to a datetime object and save as ISO format string
         expires_timestamp = datetime.now() + timedelta(seconds=expires_in)
-        self._save_token_to_env('TRIMBLE_TOKEN_EXPIRES', expires_timestamp.isoformat())
+        self.get_env_state().update({
+            self.ENV_ACCESS_TOKEN_NAME: access_token,
+            self.ENV_REFRESH_TOKEN_NAME: refresh_token,
+            'TRIMBLE_TOKEN_EXPIRES': expires_timestamp.isoformat(),
+        })
     
     def _load_token_env_data(self):
         """
@@ -117,13 +184,13 @@ class Authentication:
             token_type (str): The type of the token (e.g., 'ACCESS_TOKEN', 'REFRESH_TOKEN').
             token (str): The token to be saved.
         """
-        env_path = '.env'
-        set_key(env_path, token_type, token)
+        self.get_env_state().update({token_type: token})
 
 
     def _load_token_from_env(self, token_type):
         """
-        Load the specified token from the .env file.
+        Load the specified token from the .env file (served from memory unless the file has changed),
+        falling back to the process environment.
 
         Args:
             token_type (str): The type of the token (e.g., 'ACCESS_TOKEN', 'REFRESH_TOKEN').
@@ -131,8 +198,15 @@ class Authentication:
         Returns:
             str: The loaded token.
         """
-        load_dotenv()
-        return os.getenv(token_type)
+        return self.get_env_state().get(token_type, os.getenv(token_type))
+
+    def get_env_state(self):
+        '''
+        Returns the in-memory view of the .env file used by the 'env' token store.
+        '''
+        if self.env_state is None:
+            self.env_state = EnvTokenState('.env')
+        return self.env_state
 
 # -----------------------------------------------------------------
 # PATHS
@@ -147,6 +221,52 @@ class Authentication:
                 return False
         return True
 
+    def current_access_token(self):
+        """
+        Returns the access token to send with a request, renewing it first if it has already expired.
+        """
+        token = self.access_token
+        if self.expires_in and self.refresh_token and datetime.now() > self.expires_in:
+            self.renew_tokens_once(token)
+            token = self.access_token
+        return token
+
+    def renew_tokens_once(self, stale_token):
+        """
+        Renews the tokens after a request was rejected with stale_token. Only one renewal runs at a time -
+        threads that were waiting on it reuse the new token instead of renewing again.
+
+        Returns:
+            bool: True if a newer access token is available.
+        """
+        if self.token_manager is not None:
+            return self.token_manager.refresh(stale_token)
+        with self._renew_lock:
+            if self.access_token and self.access_token != stale_token:
+                return True
+            if not self.refresh_token:
+                return False
+            return self.renew_tokens(self.refresh_token) is True
+
+    def _read_stored_tokens(self):
+        """
+        Reads the tokens from the configured store without renewing them or changing this instance.
+
+        Returns:
+            tuple: The stored access token, refresh token and expiry datetime (each may be None).
+        """
+        if self.token_retrieval_method == 'env':
+            state = self.get_env_state()
+            expires_in_str = state.get('TRIMBLE_TOKEN_EXPIRES')
+            expires_in = datetime.fromisoformat(expires_in_str) if expires_in_str else None
+            return state.get(self.ENV_ACCESS_TOKEN_NAME), state.get(self.ENV_REFRESH_TOKEN_NAME), expires_in
+        if self.token_retrieval_method == 'sql' and self.sql_available:
+            dfq = self._query_sql_tokens()
+            if not dfq.empty:
+                expires_in = datetime.fromtimestamp(dfq.iloc[0]['expiresin'].timestamp())
+                return dfq.iloc[0]['accesstoken'], dfq.iloc[0]['refreshtoken'], expires_in
+        return None, None, None
+
     def get_token(self):
         """
         Retrieve an access token using the chosen method.
@@ -156,8 +276,9 @@ class Authentication:
         """
         if self.access_token and self.refresh_token:
             # expires in is like 1702508094.4117897 - which is unreadable... convert back to minutes and second for print
-            expires_in_readable = pd.Timestamp(self.expires_in) - pd.Timestamp.now()
-            print("tokens expire in: ", expires_in_readable)
+            if self.expires_in is not None:
+                expires_in_readable = self.expires_in - datetime.now()
+                print("tokens expire in: ", expires_in_readable)
             return self.access_token, self.refresh_token
         
         # First, check for tokens in the selected retrieval method
@@ -199,8 +320,10 @@ class Authentication:
         # If we now have tokens return them, otherwise attempt to use 'web' as fallback
         if self.access_token and self.refresh_token:
             if self.token_retrieval_method == 'env':
-                self._save_token_to_env(self.ENV_ACCESS_TOKEN_NAME, self.access_token)
-                self._save_token_to_env(self.ENV_REFRESH_TOKEN_NAME, self.refresh_token)
+                self.get_env_state().update({
+                    self.ENV_ACCESS_TOKEN_NAME: self.access_token,
+                    self.ENV_REFRESH_TOKEN_NAME: self.refresh_token,
+                })
             elif self.token_retrieval_method == 'sql':
                 self.tokens_to_sql()
             return self.access_token, self.refresh_token
@@ -216,7 +339,7 @@ class Authentication:
     def print_expiry_time(self):
         if self.expires_in:
             # it is like datetime.datetime(2023, 12, 14, 12, 13, 47, 486629)
-            expires_timestamp_print_friendly = pd.Timestamp(self.expires_in)
+            expires_timestamp_print_friendly = self.expires_in.isoformat(sep=' ')
             print(f"Tokens expire on: {expires_timestamp_print_friendly}")
 
     def get_stored_access_token(self):
@@ -280,6 +403,7 @@ class Authentication:
         # Construct the URL for the authorization page
         scope = "openid+project"  # Replace 'project' with the actual scope needed
         url = f"{self.auth_endpoint}/authorize?scope={scope}&response_type=code&client_id={self.client_id}&redirect_uri={self.redirect_url}"
+        import webbrowser
         print('Opening browser for authentication. Please wait for the redirect URL.')
         webbrowser.open(url)
         current_url = input('Paste the redirect URL here (it will contain the authorization code): ')
@@ -319,7 +443,7 @@ class Authentication:
                 'grant_type': 'refresh_token',
                 'refresh_token': refresh_token
             }
-            response = requests.post(f'{self.auth_endpoint}/token', headers=headers, data=body)
+            response = self.transport.post(f'{self.auth_endpoint}/token', headers=headers, data=body)
             if response.status_code == 200:
                 response_data = response.json()
                 self.access_token = response_data['access_token']
@@ -361,7 +485,7 @@ class Authentication:
                 'code': authorization_code,
                 'redirect_uri': self.redirect_url
             }
-            response = requests.post(f'{self.auth_endpoint}/token', headers=headers, data=body)
+            response = self.transport.post(f'{self.auth_endpoint}/token', headers=headers, data=body)
 
             if response.status_code == 200:
                 response_data = response.json()
@@ -393,27 +517,91 @@ class Authentication:
 
 
     def get_sql_engine(self):
+        """
+        Returns the pooled SQLAlchemy engine for the token database, creating it on first use.
+        """
         if self.sql_available:
-            self.sql_server = os.environ.get('SQL_SERVER')
-            self.sql_database = os.environ.get('SQL_DATABASE')
-            self.sql_schema = os.environ.get('SQL_SCHEMA') 
-            self.engine = create_engine(f'mssql+pyodbc://{self.sql_server}/{self.sql_database}?driver=ODBC+Driver+17+for+SQL+Server', fast_executemany=True)
+            if self.engine is None:
+                from sqlalchemy import create_engine
+                self.sql_server = os.environ.get('SQL_SERVER')
+                self.sql_database = os.environ.get('SQL_DATABASE')
+                self.sql_schema = os.environ.get('SQL_SCHEMA')
+                self.engine = create_engine(
+                    f'mssql+pyodbc://{self.sql_server}/{self.sql_database}?driver=ODBC+Driver+17+for+SQL+Server',
+                    fast_executemany=True,
+                    pool_size=5,
+                    pool_pre_ping=True,
+                    pool_recycle=3600,
+                )
             return self.engine
 
+    def _sql_token_key(self):
+        # AuthTokens rows are keyed by client id and region so several apps / regions can share the table
+        return {'clientid': self.client_id or '', 'region': self.region or ''}
+
+    def _ensure_sql_token_table(self):
+        """
+        Creates the AuthTokens table, or adds the key columns to a table written by older versions (runs once per instance).
+        """
+        if self._sql_token_table_ready:
+            return
+        from sqlalchemy import text
+        engine = self.get_sql_engine()
+        table = f"{self.sql_schema}.AuthTokens"
+        with engine.begin() as connection:
+            connection.execute(text(f"""
+                IF OBJECT_ID(N'{table}', N'U') IS NULL
+                    CREATE TABLE {table} (
+                        clientid NVARCHAR(200) NOT NULL DEFAULT '',
+                        region NVARCHAR(20) NOT NULL DEFAULT '',
+                        accesstoken NVARCHAR(4000),
+                        refreshtoken NVARCHAR(4000),
+                        expiresin DATETIME2
+                    )
+            """))
+            connection.execute(text(f"""
+                IF COL_LENGTH(N'{table}', 'clientid') IS NULL
+                    ALTER TABLE {table} ADD
+                        clientid NVARCHAR(200) NOT NULL DEFAULT '',
+                        region NVARCHAR(20) NOT NULL DEFAULT ''
+            """))
+        self._sql_token_table_ready = True
+
+    def _query_sql_tokens(self):
+        """
+        Reads the token row for this client id / region. Rows without a client id (written before the
+        table was keyed) are used as a fallback.
+        """
+        import pandas as pd
+        from sqlalchemy import text
+        engine = self.get_sql_engine()
+        self._ensure_sql_token_table()
+        query = text(f"""
+            SELECT TOP 1 accesstoken, refreshtoken, expiresin
+            FROM {self.sql_schema}.AuthTokens
+            WHERE clientid IN (:clientid, '') AND region IN (:region, '')
+            ORDER BY CASE WHEN clientid = :clientid THEN 0 ELSE 1 END, CASE WHEN region = :region THEN 0 ELSE 1 END
+        """)
+        return pd.read_sql(query, engine, params=self._sql_token_key())
+
     def get_sql_tokens(self):
         """
-        Retrieves the SQL tokens from the database.
+        Retrieves the SQL tokens from the database. Results are kept in memory until the tokens expire,
+        so repeated calls don't query the database.
 
         Returns:
             pandas.DataFrame: A DataFrame containing the SQL tokens.
                 If SQL functionality is not available, an empty DataFrame is returned.
         """
+        import pandas as pd
         if not self.sql_available:
             print("SQL functionality is not available.")
             return pd.DataFrame()  # Return an empty DataFrame
-        engine = self.get_sql_engine()
-        query = f"SELECT * FROM {self.sql_schema}.AuthTokens"
-        dfq = pd.read_sql(query, engine)  # Use the engine object directly
+        cached = self._sql_tokens_cache
+        if cached is not None and self.expires_in and datetime.now() < self.expires_in:
+            return cached.copy()
+        dfq = self._query_sql_tokens()
+        self._sql_tokens_cache = None
         if not dfq.empty and self.sql_available:
             self.access_token = dfq.iloc[0]['accesstoken']
             self.refresh_token = dfq.iloc[0]['refreshtoken']
@@ -423,25 +611,43 @@ class Authentication:
             if self.expires_in and datetime.now() > self.expires_in:
                 # Tokens are expired, initiate renewal
                 self.renew_tokens()
+            else:
+                self._sql_tokens_cache = dfq
         return dfq
 
     def tokens_to_sql(self):
         """
-        Save the access token and refresh token to a SQL database table.
-
-        Args:
-            access_token (str): The access token to be saved.
-            refresh_token (str): The refresh token to be saved.
+        Save the access token and refresh token to the AuthTokens table, updating the row for this
+        client id / region in place (or inserting it).
         """
+        import pandas as pd
+        from sqlalchemy import text
         engine = self.get_sql_engine()
-        access_token = self.access_token
-        refresh_token = self.refresh_token
+        self._ensure_sql_token_table()
         # back to pd.Timestamp('2023-12-14 11:59:05') from datetime.datetime(2023, 12, 14, 11, 59, 05, 316722)
-        expires_in_for_sql = pd.Timestamp(self.expires_in)
-        df = pd.DataFrame({'accesstoken': [access_token], 'refreshtoken': [refresh_token], 'expiresin': [expires_in_for_sql]})
-        str_columns = df.select_dtypes(include=['object']).columns
-        column_types = {column: NVARCHAR(length=4000) for column in str_columns}
-        df.to_sql('AuthTokens', con=self.engine, schema=self.sql_schema, if_exists='replace', dtype=column_types, index=False)
+        expires_in_for_sql = pd.Timestamp(self.expires_in).to_pydatetime()
+        params = self._sql_token_key() | {
+            'accesstoken': self.access_token,
+            'refreshtoken': self.refresh_token,
+            'expiresin': expires_in_for_sql,
+        }
+        upsert = text(f"""
+            MERGE {self.sql_schema}.AuthTokens WITH (HOLDLOCK) AS target
+            USING (SELECT :clientid AS clientid, :region AS region) AS source
+            ON target.clientid = source.clientid AND target.region = source.region
+            WHEN MATCHED THEN
+                UPDATE SET accesstoken = :accesstoken, refreshtoken = :refreshtoken, expiresin = :expiresin
+            WHEN NOT MATCHED THEN
+                INSERT (clientid, region, accesstoken, refreshtoken, expiresin)
+                VALUES (:clientid, :region, :accesstoken, :refreshtoken, :expiresin);
+        """)
+        with engine.begin() as connection:
+            connection.execute(upsert, params)
+        self._sql_tokens_cache = pd.DataFrame({
+            'accesstoken': [self.access_token],
+            'refreshtoken': [self.refresh_token],
+            'expiresin': [pd.Timestamp(expires_in_for_sql)],
+        })
 
 
     def update_sql_tokens(self):
@@ -468,11 +674,12 @@ class Authentication:
             pandas.DataFrame: A DataFrame containing the SQL tokens.
                 If SQL functionality is not available, an empty DataFrame is returned.
         """
+        import pandas as pd
         if not self.sql_available:
             print("SQL functionality is not available.")
             return pd.DataFrame()  # Return an empty DataFrame
         engine = self.get_sql_engine()
         query = f"SELECT * FROM {self.sql_schema}.{table_name}"
-        dfq = pd.read_sql(query, self.engine)
+        dfq = pd.read_sql(query, engine)
         return dfq
     
\ No newline at end of file
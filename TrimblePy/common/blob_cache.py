@@ -0,0 +1,207 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from TrimblePy.common.locks import default_cache_dir
+
+
+class BlobCache:
+    '''
+    On-disk, content-addressed cache of downloaded file versions.
+
+    File versions never change, so a version downloaded once can be served from disk for good.
+    Contents are stored once per md5 (versions with the same content share a file) and a SQLite
+    index shared by every process using the same directory maps versionIds to them. Files are
+    written to a temporary name and renamed into place, so readers in other processes never see a
+    partial file. Contents are evicted least recently used first once they exceed max_bytes.
+
+    Usage:
+        file_api = TrimbleFileApi(auth, project_id, blob_cache=BlobCache(max_bytes=10 * 2 ** 30))
+        content = file_api.download(file_id)        # the second call is read from disk
+        df = file_api.read_csv(file_id)
+        file_api.blob_cache.stats()
+    '''
+
+    def __init__(self, directory=None, max_bytes=2 * 1024 * 1024 * 1024):
+        """
+        Args:
+            directory (str, optional): Folder for the contents and index. Defaults to ~/.trimblepy/blobs.
+            max_bytes (int, optional): Size limit of the stored contents. Defaults to 2 GB.
+        """
+        self.directory = directory or default_cache_dir('blobs')
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __getstate__(self):
+        return {'directory': self.directory, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(os.path.join(self.directory, 'index.db'), timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS blobs (md5 TEXT PRIMARY KEY, size INTEGER, accessed REAL)')
+            connection.execute('CREATE TABLE IF NOT EXISTS versions (version_id TEXT PRIMARY KEY, md5 TEXT)')
+            self._local.connection = connection
+        return connection
+
+    def _blob_path(self, md5):
+        return os.path.join(self.directory, md5[:2], md5)
+
+    def _resolve(self, version_id, md5):
+        if md5:
+            return md5.lower()
+        if version_id:
+            row = self._connection().execute('SELECT md5 FROM versions WHERE version_id = ?', (version_id,)).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def path(self, version_id=None, md5=None):
+        """
+        Returns the path of a cached version, or None if it isn't cached.
+
+        Args:
+            version_id (str, optional): versionId of the file.
+            md5 (str, optional): md5 of the content (from the snapshot). Found even under another versionId.
+
+        Returns:
+            str: Path of the cached content - read it, don't modify it.
+        """
+        md5 = self._resolve(version_id, md5)
+        if md5 is not None:
+            path = self._blob_path(md5)
+            connection = self._connection()
+            if connection.execute('UPDATE blobs SET accessed = ? WHERE md5 = ?', (time.time(), md5)).rowcount and os.path.exists(path):
+                if version_id:
+                    connection.execute('INSERT OR REPLACE INTO versions (version_id, md5) VALUES (?, ?)', (version_id, md5))
+                with self._lock:
+                    self.hits += 1
+                    self.bytes_saved += os.path.getsize(path)
+                return path
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get(self, version_id=None, md5=None):
+        '''
+        Returns the cached content as bytes, or None if it isn't cached.
+        '''
+        path = self.path(version_id, md5)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            # evicted by another process in between
+            return None
+
+    def put(self, content, version_id=None, md5=None):
+        '''
+        Stores content (bytes) and returns its path in the cache.
+        '''
+        return self.put_stream([content], version_id, md5)
+
+    def put_stream(self, chunks, version_id=None, md5=None):
+        """
+        Stores content arriving in chunks without holding it in memory.
+
+        Args:
+            chunks (iterable): bytes chunks, e.g. response.iter_content(1024 * 1024).
+            version_id (str, optional): versionId to index the content under.
+            md5 (str, optional): Expected md5 (from the snapshot). A mismatch raises ValueError and nothing is stored.
+
+        Returns:
+            str: Path of the stored content.
+        """
+        digest = hashlib.md5()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            actual = digest.hexdigest()
+            if md5 and actual != md5.lower():
+                raise ValueError(f'Downloaded content has md5 {actual}, expected {md5}')
+            path = self._blob_path(actual)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        connection = self._connection()
+        connection.execute('INSERT OR REPLACE INTO blobs (md5, size, accessed) VALUES (?, ?, ?)', (actual, size, time.time()))
+        if version_id:
+            connection.execute('INSERT OR REPLACE INTO versions (version_id, md5) VALUES (?, ?)', (version_id, actual))
+        with self._lock:
+            self.stores += 1
+        self._evict(keep=actual)
+        return path
+
+    def _evict(self, keep=None):
+        connection = self._connection()
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for md5, size in connection.execute('SELECT md5, size FROM blobs ORDER BY accessed').fetchall():
+            if total <= self.max_bytes:
+                break
+            if md5 == keep:
+                continue
+            connection.execute('DELETE FROM blobs WHERE md5 = ?', (md5,))
+            connection.execute('DELETE FROM versions WHERE md5 = ?', (md5,))
+            try:
+                os.remove(self._blob_path(md5))
+            except OSError:
+                # still open in another process (Windows) - overwritten if the content is stored again
+                pass
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        '''
+        Returns the hit / miss counters of this process and the size of the cache on disk.
+        '''
+        connection = self._connection()
+        entries, size = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'bytes_saved': self.bytes_saved,
+                'entries': entries,
+                'bytes': size,
+            }
+
+    def clear(self):
+        connection = self._connection()
+        for (md5,) in connection.execute('SELECT md5 FROM blobs').fetchall():
+            try:
+                os.remove(self._blob_path(md5))
+            except OSError:
+                pass
+        connection.execute('DELETE FROM blobs')
+        connection.execute('DELETE FROM versions')
@@ -0,0 +1,277 @@
+import json
+import threading
+
+# Every json body the library sends or receives goes through loads() and dumps(). They use the
+# fastest installed backend - orjson, then msgspec, then the standard library - which is picked
+# on first use, so importing this module never imports the optional packages.
+
+BACKENDS = ('orjson', 'msgspec', 'json')
+
+_backend = None
+_lock = threading.Lock()
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj).encode('utf-8')
+
+
+def _load_backend(name):
+    '''
+    Returns (name, loads, dumps, decode_errors) for a backend, or None if it isn't installed.
+    '''
+    if name == 'orjson':
+        try:
+            import orjson
+        except ImportError:
+            return None
+        return name, orjson.loads, orjson.dumps, (orjson.JSONDecodeError,)
+    if name == 'msgspec':
+        try:
+            import msgspec
+        except ImportError:
+            return None
+        decoder = msgspec.json.Decoder()
+        encoder = msgspec.json.Encoder()
+        return name, decoder.decode, encoder.encode, (msgspec.DecodeError,)
+    if name == 'json':
+        return name, json.loads, _stdlib_dumps, (ValueError,)
+    raise ValueError(f"Unknown json backend {name!r}, expected one of {', '.join(BACKENDS)}")
+
+
+def _current():
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _backend = next(b for b in map(_load_backend, BACKENDS) if b is not None)
+    return _backend
+
+
+def backend():
+    '''
+    Returns the name of the json backend in use.
+    '''
+    return _current()[0]
+
+
+def set_backend(name=None):
+    """
+    Overrides the json backend for this process (pool workers pick their own).
+
+    Args:
+        name (str, optional): 'orjson', 'msgspec' or 'json'. None goes back to the fastest installed one.
+
+    Returns:
+        str: The backend now in use.
+    """
+    global _backend
+    with _lock:
+        if name is None:
+            _backend = None
+        else:
+            loaded = _load_backend(name)
+            if loaded is None:
+                raise ImportError(f"The {name} json backend is not installed")
+            _backend = loaded
+    return backend()
+
+
+def loads(data):
+    '''
+    Decodes a json document (bytes or str). Documents the fast backend rejects (NaN literals,
+    non UTF-8 encodings) are retried with the standard library, whose error is raised if that fails too.
+    '''
+    _, fast_loads, _, errors = _current()
+    try:
+        return fast_loads(data)
+    except errors:
+        return json.loads(data)
+
+
+def dumps(obj):
+    '''
+    Encodes obj as compact json bytes. Objects the fast backend can't encode (e.g. non-string
+    dictionary keys) are encoded by the standard library instead.
+    '''
+    _, _, fast_dumps, _ = _current()
+    try:
+        return fast_dumps(obj)
+    except TypeError:
+        return _stdlib_dumps(obj)
+
+
+# -----------------------------------------------------------------
+# TYPED DECODING
+# -----------------------------------------------------------------
+
+class RecordSchema:
+    '''
+    The json fields a record type is built from, in the order its build function takes them.
+
+    With msgspec installed, decode_records parses each object straight into a slotted struct that
+    holds only these fields (everything else in the document is skipped without being decoded) and
+    passes the field values to the build function - no dictionary is built per record. Otherwise
+    the document is decoded to dictionaries and the fields are read from them.
+
+    Usage:
+        TOPIC_FIELDS = RecordSchema('Topic', [('guid', None), ('title', None)])
+        topics = decode_records(response.content, TOPIC_FIELDS, Topic)
+    '''
+
+    def __init__(self, name, fields):
+        """
+        Args:
+            name (str): Name of the record type (used for the generated struct).
+            fields (list): (json field name, default when missing) pairs.
+        """
+        self.name = name
+        self.fields = tuple(fields)
+        self._decoders = {}
+
+    def _struct(self):
+        import msgspec
+        from typing import Any
+        return msgspec.defstruct(self.name, [(field, Any, default) for field, default in self.fields], gc=False)
+
+    def decoder(self, key, many):
+        '''
+        Returns a msgspec decoder for a record, a list of records or the list under key, or None
+        without msgspec.
+        '''
+        if _current()[0] == 'json':
+            return None
+        cache_key = (key, many)
+        decoder = self._decoders.get(cache_key)
+        if decoder is None:
+            try:
+                import msgspec
+            except ImportError:
+                return None
+            struct = self._struct()
+            if key is not None:
+                target = msgspec.defstruct(f'{self.name}Page', [(key, list[struct], [])], gc=False)
+            elif many:
+                target = list[struct]
+            else:
+                target = struct
+            decoder = self._decoders[cache_key] = msgspec.json.Decoder(target)
+        return decoder
+
+    def __getstate__(self):
+        return {'name': self.name, 'fields': self.fields, '_decoders': {}}
+
+
+def _decode_structs(data, schema, key, many):
+    '''
+    Decodes data into the schema's structs, or returns None without msgspec or if msgspec rejects
+    the document (the dictionary path then decodes it, or raises the error).
+    '''
+    decoder = schema.decoder(key, many)
+    if decoder is None:
+        return None
+    try:
+        decoded = decoder.decode(data)
+    except ValueError:
+        return None
+    return getattr(decoded, key) if key is not None else decoded
+
+
+def decode_records(data, schema, build, key=None):
+    """
+    Decodes a json array of objects (or the array under key in a json object) into records.
+
+    Args:
+        data (bytes or str): The json document, e.g. response.content.
+        schema (RecordSchema): The fields each record is built from.
+        build (callable): Called with the field values in schema order; returns the record.
+        key (str, optional): Member of the top-level object holding the array. Defaults to a top-level array.
+
+    Returns:
+        list: The records.
+    """
+    items = _decode_structs(data, schema, key, True)
+    if items is not None:
+        from msgspec.structs import astuple
+        return [build(*astuple(item)) for item in items]
+    items = loads(data)
+    if key is not None:
+        items = items.get(key, [])
+    fields = schema.fields
+    return [build(*[item.get(field, default) for field, default in fields]) for item in items]
+
+
+def decode_record(data, schema, build):
+    '''
+    Decodes a single json object into a record - see decode_records.
+    '''
+    item = _decode_structs(data, schema, None, False)
+    if item is not None:
+        from msgspec.structs import astuple
+        return build(*astuple(item))
+    item = loads(data)
+    return build(*[item.get(field, default) for field, default in schema.fields])
+
+
+# -----------------------------------------------------------------
+# RESPONSES
+# -----------------------------------------------------------------
+
+_response_class = None
+
+
+def __getattr__(name):
+    # requests is imported lazily, so the Response subclass is created on first access (this also
+    # lets pickle find it in a fresh process)
+    if name == 'Response':
+        return _response_type()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _response_type():
+    global _response_class
+    if _response_class is None:
+        import requests
+
+        class Response(requests.Response):
+            '''
+            requests.Response whose json() decodes with the codec. Bodies the codec can't decode are
+            passed to requests, so callers still get requests' JSONDecodeError.
+            '''
+
+            def json(self, **kwargs):
+                if not kwargs:
+                    try:
+                        return loads(self.content)
+                    except ValueError:
+                        pass
+                return super().json(**kwargs)
+
+        Response.__module__ = __name__
+        Response.__qualname__ = 'Response'
+        _response_class = Response
+    return _response_class
+
+
+def wrap_response(response):
+    '''
+    Makes response.json() use the codec (the response itself is returned).
+    '''
+    import requests
+    if type(response) is requests.Response:
+        response.__class__ = _response_type()
+    return response
+
+
+def encode_json_body(kwargs, headers):
+    '''
+    Replaces a json= request argument by a body encoded with the codec (setting the Content-Type
+    unless the caller did). Returns the headers to send.
+    '''
+    body = kwargs.pop('json', None)
+    if body is None:
+        return headers
+    kwargs['data'] = dumps(body)
+    headers = dict(headers or {})
+    if not any(name.lower() == 'content-type' for name in headers):
+        headers['Content-Type'] = 'application/json'
+    return headers
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from TrimblePy.common import codec
+from TrimblePy.common.locks import default_cache_dir
+
+
+class CachedResponse:
+    '''
+    Response served from the ResponseCache after the server answered 304 Not Modified.
+    Shaped like requests.Response for the attributes the API clients use.
+    '''
+
+    status_code = 200
+    ok = True
+    from_cache = True
+
+    def __init__(self, cache, key, url, headers, content, validator=None):
+        self.cache = cache
+        self.key = key
+        self.validator = validator
+        self.url = url
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        if not self.cache.shared_json:
+            return codec.loads(self.content)
+        # shared between hits of the same version - treat it as read-only
+        return self.cache._decoded(self.key, self.validator, self.content)
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ResponseCache:
+    '''
+    Opt-in, on-disk cache of GET responses revalidated with ETag / Last-Modified.
+
+    Bodies are stored as files keyed by url and auth scope (so users never see each other's
+    responses) with a SQLite index shared by every process using the same directory. Cached
+    requests are sent with If-None-Match / If-Modified-Since; a 304 is answered from disk without
+    downloading the body again. Every json() call decodes a fresh copy unless shared_json is set, in
+    which case the decoded json of a version is kept in memory and the same object is handed to
+    every caller - only for callers that don't modify the results. Entries are evicted least
+    recently used first once the bodies exceed max_bytes.
+
+    Usage:
+        transport = Transport(cache=ResponseCache(max_bytes=512 * 1024 * 1024))
+        auth = Authentication(token_retrieval_method='env', region='ap', transport=transport)
+        TrimbleFileApi(auth, project_id).get_tags()   # cached methods revalidate from now on
+        transport.cache.stats()
+    '''
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024, memory_items=256, shared_json=False):
+        """
+        Args:
+            directory (str, optional): Folder for the bodies and index. Defaults to ~/.trimblepy/http_cache.
+            max_bytes (int, optional): Size limit of the stored bodies. Defaults to 256 MB.
+            memory_items (int, optional): Number of decoded json bodies kept in memory with shared_json. Defaults to 256.
+            shared_json (bool, optional): Hand out one shared, read-only decoded object per version instead
+                of decoding every hit. Defaults to False.
+        """
+        self.directory = directory or default_cache_dir('http_cache')
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.shared_json = shared_json
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __getstate__(self):
+        return {'directory': self.directory, 'max_bytes': self.max_bytes, 'memory_items': self.memory_items, 'shared_json': self.shared_json}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(os.path.join(self.directory, 'index.db'), timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, url TEXT, etag TEXT, last_modified TEXT, headers TEXT, size INTEGER, accessed REAL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def key(url, scope):
+        return hashlib.sha256(f'{scope}\n{url}'.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, key + '.body')
+
+    def lookup(self, url, scope):
+        '''
+        Returns the index entry for url / scope, or None if it isn't cached.
+        '''
+        from requests.structures import CaseInsensitiveDict
+        key = self.key(url, scope)
+        row = self._connection().execute(
+            'SELECT etag, last_modified, headers FROM entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or not os.path.exists(self._body_path(key)):
+            return None
+        # stored as a plain dict - looked up case-insensitively again, like requests.Response.headers
+        headers = CaseInsensitiveDict(json.loads(row[2]))
+        return {'key': key, 'url': url, 'etag': row[0], 'last_modified': row[1], 'headers': headers}
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def revalidated(self, entry):
+        '''
+        Builds the response for a 304 from the stored body.
+        '''
+        from requests.structures import CaseInsensitiveDict
+        key = entry['key']
+        try:
+            with open(self._body_path(key), 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+        self._connection().execute('UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key))
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(content)
+        headers = CaseInsensitiveDict(entry['headers'])
+        return CachedResponse(self, key, entry['url'], headers, content, entry['etag'] or entry['last_modified'])
+
+    def _decoded(self, key, validator, content):
+        # one decoded version per key, tagged with the validator it was stored under
+        with self._lock:
+            memo = self._memory.get(key)
+            if memo is not None and memo[0] == validator:
+                self._memory.move_to_end(key)
+                return memo[1]
+        value = codec.loads(content)
+        with self._lock:
+            self._memory[key] = (validator, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+        return value
+
+    def store(self, url, scope, response):
+        '''
+        Stores a 200 response if it carries a validator (ETag or Last-Modified).
+        '''
+        with self._lock:
+            self.misses += 1
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        key = self.key(url, scope)
+        content = response.content
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, self._body_path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._connection().execute(
+            'INSERT OR REPLACE INTO entries (key, url, etag, last_modified, headers, size, accessed) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, url, etag, last_modified, json.dumps(dict(response.headers)), len(content), time.time()),
+        )
+        with self._lock:
+            self.stores += 1
+            self._memory.pop(key, None)
+        self._evict()
+
+    def _evict(self):
+        connection = self._connection()
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in connection.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall():
+            if total <= self.max_bytes:
+                break
+            connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        '''
+        Returns the hit / miss counters of this process and the size of the cache on disk.
+        '''
+        connection = self._connection()
+        entries, size = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'bytes_saved': self.bytes_saved,
+                'entries': entries,
+                'bytes': size,
+            }
+
+    def clear(self):
+        connection = self._connection()
+        for (key,) in connection.execute('SELECT key FROM entries').fetchall():
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+        connection.execute('DELETE FROM entries')
+        with self._lock:
+            self._memory.clear()
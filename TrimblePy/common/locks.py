@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+def default_cache_dir(*parts):
+    '''
+    Returns (and creates) a folder under ~/.trimblepy for state shared by every process of this user.
+    '''
+    folder = os.path.join(os.path.expanduser('~'), '.trimblepy', *parts)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def default_lock_path(name):
+    '''
+    Returns a path in the system temp folder for a named lock shared by every process on this machine.
+    '''
+    return os.path.join(tempfile.gettempdir(), f'trimblepy_{name}.lock')
+
+
+class ProcessLock:
+    '''
+    Inter-process lock backed by an exclusive SQLite transaction.
+
+    SQLite's file locking works the same on Windows and Linux, so this coordinates threads and
+    processes on one machine without any extra dependency. Every acquisition opens its own
+    connection, which makes a single ProcessLock safe to share between threads.
+
+    Usage:
+        with ProcessLock(path):
+            ...
+    '''
+
+    def __init__(self, path, timeout=60):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __getstate__(self):
+        return {'path': self.path, 'timeout': self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def acquire(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                connection.execute('BEGIN EXCLUSIVE')
+                break
+            except sqlite3.OperationalError:
+                if time.monotonic() > deadline:
+                    connection.close()
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                time.sleep(0.05)
+        return connection
+
+    def __enter__(self):
+        connection = self.acquire()
+        self._local.connection = connection
+        return connection
+
+    def __exit__(self, exc_type, exc, tb):
+        connection = self._local.connection
+        self._local.connection = None
+        try:
+            connection.execute('ROLLBACK')
+        finally:
+            connection.close()
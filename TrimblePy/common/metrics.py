@@ -0,0 +1,253 @@
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+# upper bounds (seconds) of the latency histogram buckets - the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_STATIC_SEGMENT = re.compile(r'^(?:[a-z][a-z_\-]*|v?\d+\.\d+)$')
+
+
+def endpoint_template(url):
+    '''
+    Reduces a request url to its endpoint template, e.g.
+    https://app.connect.trimble.com/tc/api/2.0/models/Xy3k_7/entities?top=1000 -> /tc/api/2.0/models/{id}/entities
+    Path segments that aren't plain lowercase words or version numbers are treated as ids.
+    '''
+    segments = urlsplit(url).path.split('/')
+    return '/'.join(segment if not segment or _STATIC_SEGMENT.match(segment) else '{id}' for segment in segments)
+
+
+class Histogram:
+    '''
+    Fixed-bucket histogram. Percentiles are interpolated inside the bucket they fall in.
+    '''
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(lower + (upper - lower) * (rank - cumulative) / count, self.max)
+            cumulative += count
+        return self.max
+
+
+class EndpointStats:
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.statuses = Counter()
+        self.latency = Histogram()
+
+    def to_dict(self):
+        latency = self.latency
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'bytes': self.bytes,
+            'statuses': dict(self.statuses),
+            'latency_mean': latency.total / latency.count if latency.count else 0.0,
+            'latency_p50': latency.percentile(0.5),
+            'latency_p95': latency.percentile(0.95),
+            'latency_p99': latency.percentile(0.99),
+            'latency_max': latency.max,
+        }
+
+
+class Metrics:
+    '''
+    Per-endpoint request metrics collected by the transports.
+
+    Every request is recorded under (method, endpoint template) with its final status code, the
+    number of retries, the bytes received and its latency (including retries). Hooks are called
+    with each request event; export() hands the collected metrics to the exporters (in-memory
+    snapshots, JSON-lines, Prometheus text). Transports without metrics skip all of this.
+
+    Usage:
+        metrics = Metrics(exporters=[JsonLinesExporter('metrics.jsonl')])
+        auth = Authentication(token_retrieval_method='env', region='ap', transport=Transport(metrics=metrics))
+        ...
+        metrics.snapshot()    # {'GET /tc/api/2.0/models/{id}/entities': {'requests': 120, 'latency_p95': 0.8, ...}}
+        metrics.export()
+    '''
+
+    def __init__(self, hooks=None, exporters=None):
+        """
+        Args:
+            hooks (list, optional): Callables invoked with the event dictionary of every request.
+            exporters (list, optional): Exporters called by export().
+        """
+        self.hooks = list(hooks or [])
+        self.exporters = list(exporters or [])
+        self.endpoints = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # each process collects its own metrics
+        return {'hooks': self.hooks, 'exporters': self.exporters}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def record(self, method, url, status, elapsed, size=0, retries=0, error=None):
+        """
+        Records a finished request.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request url.
+            status (int): Final status code, or None if the request raised.
+            elapsed (float): Seconds from the first attempt to the final response.
+            size (int, optional): Bytes received. Defaults to 0.
+            retries (int, optional): Number of attempts after the first. Defaults to 0.
+            error (Exception, optional): The exception the request raised.
+        """
+        key = f'{method} {endpoint_template(url)}'
+        with self._lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            stats.requests += 1
+            stats.retries += retries
+            stats.bytes += size
+            stats.latency.observe(elapsed)
+            if status is None or status >= 400:
+                stats.errors += 1
+            stats.statuses[status if status is not None else 'error'] += 1
+        if self.hooks:
+            event = {
+                'time': time.time(),
+                'endpoint': key,
+                'url': url,
+                'status': status,
+                'elapsed': elapsed,
+                'bytes': size,
+                'retries': retries,
+                'error': repr(error) if error is not None else None,
+            }
+            for hook in self.hooks:
+                hook(event)
+
+    def export(self):
+        '''
+        Passes the current metrics to every exporter.
+        '''
+        for exporter in self.exporters:
+            exporter.export(self)
+
+    def snapshot(self):
+        '''
+        Returns a dictionary of the per-endpoint metrics collected so far.
+        '''
+        with self._lock:
+            return {key: stats.to_dict() for key, stats in self.endpoints.items()}
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+            self.started = time.time()
+
+    def to_prometheus(self, prefix='trimblepy'):
+        '''
+        Renders the metrics in the Prometheus text exposition format.
+        '''
+        # every line of a metric family has to be in one group, so the families are written one after another
+        with self._lock:
+            endpoints = [(key.split(' ', 1), stats) for key, stats in sorted(self.endpoints.items())]
+            lines = [f'# TYPE {prefix}_requests_total counter']
+            for (method, template), stats in endpoints:
+                for status, count in sorted(stats.statuses.items(), key=lambda item: str(item[0])):
+                    lines.append(f'{prefix}_requests_total{{method="{method}",endpoint="{template}",status="{status}"}} {count}')
+            lines.append(f'# TYPE {prefix}_retries_total counter')
+            for (method, template), stats in endpoints:
+                lines.append(f'{prefix}_retries_total{{method="{method}",endpoint="{template}"}} {stats.retries}')
+            lines.append(f'# TYPE {prefix}_response_bytes_total counter')
+            for (method, template), stats in endpoints:
+                lines.append(f'{prefix}_response_bytes_total{{method="{method}",endpoint="{template}"}} {stats.bytes}')
+            lines.append(f'# TYPE {prefix}_request_duration_seconds histogram')
+            for (method, template), stats in endpoints:
+                labels = f'method="{method}",endpoint="{template}"'
+                cumulative = 0
+                for bound, count in zip(stats.latency.bounds + (float('inf'),), stats.latency.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{prefix}_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'{prefix}_request_duration_seconds_sum{{{labels}}} {stats.latency.total}')
+                lines.append(f'{prefix}_request_duration_seconds_count{{{labels}}} {stats.latency.count}')
+        return '\n'.join(lines) + '\n'
+
+
+class SnapshotExporter:
+    '''
+    Keeps every exported snapshot in memory (with its timestamp) in self.snapshots.
+    '''
+
+    def __init__(self):
+        self.snapshots = []
+
+    def export(self, metrics):
+        self.snapshots.append((time.time(), metrics.snapshot()))
+
+
+class JsonLinesExporter:
+    '''
+    Appends one JSON line per endpoint with the current metrics (plus a timestamp) to a file.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, metrics):
+        now = time.time()
+        with open(self.path, 'a') as f:
+            for endpoint, values in metrics.snapshot().items():
+                f.write(json.dumps({'time': now, 'endpoint': endpoint, **values}) + '\n')
+
+
+class PrometheusExporter:
+    '''
+    Writes the metrics in Prometheus text format, e.g. for the node_exporter textfile collector.
+    '''
+
+    def __init__(self, path, prefix='trimblepy'):
+        self.path = path
+        self.prefix = prefix
+
+    def export(self, metrics):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(metrics.to_prometheus(self.prefix))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,143 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# Endpoints like projects/{id}/users and bcf topics return one page per response and the url of the
+# next page in a `next` header. The helpers below follow those links and request page N+1 (on a
+# background thread, or as a task for the async clients) while page N is decoded and consumed.
+
+
+def _json(response):
+    return response.json()
+
+
+def iter_pages(get, url, decode=None, limit=None, prefetch=True):
+    """
+    Yields the decoded pages of a `next`-header paginated endpoint.
+
+    Args:
+        get (callable): Sends a GET for a url and returns the response, e.g.
+            lambda url: transport.get(url, headers=headers).
+        url (str): Url of the first page.
+        decode (callable, optional): Turns a response into a list of items. Defaults to response.json().
+        limit (int, optional): Stop requesting pages once this many items were yielded. Defaults to all.
+        prefetch (bool, optional): Request the next page while the current one is consumed. Defaults to True.
+
+    Yields:
+        list: The items of a page.
+    """
+    decode = decode or _json
+    pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    upcoming = None
+    try:
+        response = get(url)
+        count = 0
+        while True:
+            response.raise_for_status()
+            next_url = response.headers.get('next')
+            page = decode(response)
+            count += len(page)
+            if limit is not None and count >= limit:
+                next_url = None
+            upcoming = pool.submit(get, next_url) if next_url and pool is not None else None
+            yield page
+            if not next_url:
+                return
+            response = upcoming.result() if upcoming is not None else get(next_url)
+            upcoming = None
+    finally:
+        if upcoming is not None:
+            upcoming.cancel()
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+def paginate(get, url, decode=None, limit=None, stop=None, prefetch=True):
+    """
+    Yields the items of a `next`-header paginated endpoint - see iter_pages.
+
+    Args:
+        limit (int, optional): Maximum number of items. Defaults to all.
+        stop (callable, optional): Called with each item; iteration ends at the first item it returns True
+            for (that item isn't yielded) and no further pages are requested.
+    """
+    yielded = 0
+    for page in iter_pages(get, url, decode=decode, limit=limit, prefetch=prefetch):
+        for item in page:
+            if (limit is not None and yielded >= limit) or (stop is not None and stop(item)):
+                return
+            yield item
+            yielded += 1
+
+
+def collect(get, url, decode=None, limit=None, stop=None, prefetch=True):
+    '''
+    Returns the items of a `next`-header paginated endpoint as one list - see paginate.
+    '''
+    if limit is None and stop is None:
+        data = []
+        for page in iter_pages(get, url, decode=decode, prefetch=prefetch):
+            data.extend(page)
+        return data
+    return list(paginate(get, url, decode=decode, limit=limit, stop=stop, prefetch=prefetch))
+
+
+# -----------------------------------------------------------------
+# ASYNC
+# -----------------------------------------------------------------
+
+async def aiter_pages(get, url, decode=None, limit=None, prefetch=True):
+    '''
+    Async counterpart of iter_pages - get is a coroutine function.
+    '''
+    import asyncio
+    decode = decode or _json
+    upcoming = None
+    try:
+        response = await get(url)
+        count = 0
+        while True:
+            response.raise_for_status()
+            next_url = response.headers.get('next')
+            page = decode(response)
+            count += len(page)
+            if limit is not None and count >= limit:
+                next_url = None
+            upcoming = asyncio.ensure_future(get(next_url)) if next_url and prefetch else None
+            yield page
+            if not next_url:
+                return
+            response = await upcoming if upcoming is not None else await get(next_url)
+            upcoming = None
+    finally:
+        if upcoming is not None:
+            upcoming.cancel()
+
+
+async def apaginate(get, url, decode=None, limit=None, stop=None, prefetch=True):
+    '''
+    Async counterpart of paginate.
+    '''
+    yielded = 0
+    pages = aiter_pages(get, url, decode=decode, limit=limit, prefetch=prefetch)
+    try:
+        async for page in pages:
+            for item in page:
+                if (limit is not None and yielded >= limit) or (stop is not None and stop(item)):
+                    return
+                yield item
+                yielded += 1
+    finally:
+        await pages.aclose()
+
+
+async def acollect(get, url, decode=None, limit=None, stop=None, prefetch=True):
+    '''
+    Async counterpart of collect.
+    '''
+    data = []
+    if limit is None and stop is None:
+        async for page in aiter_pages(get, url, decode=decode, prefetch=prefetch):
+            data.extend(page)
+        return data
+    async for item in apaginate(get, url, decode=decode, limit=limit, stop=stop, prefetch=prefetch):
+        data.append(item)
+    return data
@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import threading
+import time
+
+FAMILIES = ('tc', 'model', 'pset', 'topic', 'org')
+
+
+class RateLimiter:
+    '''
+    Client-side token-bucket rate limiter keyed by endpoint family ('tc', 'model', 'pset', 'topic', 'org').
+
+    Each family refills at rates[family] requests per second up to burst tokens. Without a
+    shared_path the buckets live in memory and are shared by the threads of this process. With a
+    shared_path they are kept in a SQLite database, so every process using the same file draws
+    from the same buckets - e.g. several jobs against one tenant, or multiprocessing.Pool workers.
+
+    Usage:
+        limiter = RateLimiter({'model': 20, 'pset': 10}, shared_path='limits.db')
+        transport = Transport(rate_limiter=limiter)
+    '''
+
+    def __init__(self, rates, burst=None, shared_path=None):
+        """
+        Args:
+            rates (dict): Requests per second for each endpoint family. Families that aren't listed are not limited.
+            burst (dict or int, optional): Bucket size per family (or for all families). Defaults to one second of requests.
+            shared_path (str, optional): SQLite file used to share the buckets across processes.
+        """
+        self.rates = dict(rates)
+        if burst is None:
+            burst = {}
+        if not isinstance(burst, dict):
+            burst = {family: burst for family in self.rates}
+        self.burst = {family: max(burst.get(family, rate), 1) for family, rate in self.rates.items()}
+        self.shared_path = shared_path
+        self.prefixes = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in ('_lock', '_local'):
+            del state[key]
+        state['_buckets'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def register_endpoints(self, endpoints):
+        '''
+        Maps the urls in an Authentication.endpoints dictionary to their family.
+        '''
+        for family in FAMILIES:
+            url = endpoints.get(family)
+            if url:
+                self.prefixes[url] = family
+
+    def family_for(self, url):
+        best = None
+        for prefix, family in self.prefixes.items():
+            if url.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+                best = (prefix, family)
+        return best[1] if best else None
+
+    def _take(self, tokens, updated, family, now):
+        rate, burst = self.rates[family], self.burst[family]
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        return tokens, (1 - tokens) / rate
+
+    def _try_acquire_local(self, family):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(family, (self.burst[family], now))
+            tokens, wait = self._take(tokens, updated, family, now)
+            self._buckets[family] = (tokens, now)
+        return wait
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            folder = os.path.dirname(self.shared_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            connection = sqlite3.connect(self.shared_path, timeout=30, isolation_level=None)
+            connection.execute('CREATE TABLE IF NOT EXISTS buckets (family TEXT PRIMARY KEY, tokens REAL, updated REAL)')
+            self._local.connection = connection
+        return connection
+
+    def _try_acquire_shared(self, family):
+        # wall clock, since monotonic clocks aren't comparable between processes
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated FROM buckets WHERE family = ?', (family,)).fetchone()
+            tokens, updated = row if row else (self.burst[family], now)
+            tokens, wait = self._take(tokens, min(updated, now), family, now)
+            connection.execute('INSERT OR REPLACE INTO buckets (family, tokens, updated) VALUES (?, ?, ?)', (family, tokens, now))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return wait
+
+    def try_acquire(self, url):
+        """
+        Takes a token for the url's family if one is available.
+
+        Returns:
+            float: 0 if the request may be sent now, otherwise the seconds to wait before trying again.
+        """
+        family = self.family_for(url)
+        if family is None or family not in self.rates:
+            return 0.0
+        if self.shared_path:
+            return self._try_acquire_shared(family)
+        return self._try_acquire_local(family)
+
+    def acquire(self, url):
+        '''
+        Blocks until a request to url may be sent.
+        '''
+        wait = self.try_acquire(url)
+        while wait > 0:
+            time.sleep(wait)
+            wait = self.try_acquire(url)
@@ -0,0 +1,147 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from TrimblePy.common.locks import ProcessLock, default_cache_dir
+
+REGIONS_URL = 'https://app31.connect.trimble.com/tc/api/2.0/regions'
+
+# Authentication.endpoints key -> field in the regions document
+ENDPOINT_FIELDS = {
+    'tc': 'tc-api',
+    'objects-sync': 'objects-sync-api',
+    'org': 'org-api',
+    'pset': 'pset-api',
+    'projects': 'projects-api',
+    'wopi': 'wopi-api',
+    'batch': 'batch-api',
+    'user': 'user-api',
+    'model': 'model-api',
+    'topic': 'topic-api',
+    'origin': 'origin',
+}
+
+
+class RegionCache:
+    '''
+    On-disk, TTL based cache of the Trimble Connect regions document.
+
+    The document is stored in one json file shared by every process of the user. It is only
+    re-downloaded once it is older than ttl seconds, and the last good copy is kept if the
+    regions service can't be reached.
+    '''
+
+    def __init__(self, path=None, ttl=86400, transport=None, url=REGIONS_URL):
+        """
+        Args:
+            path (str, optional): Location of the cached regions json. Defaults to ~/.trimblepy/regions.json.
+            ttl (int, optional): Seconds before the cached document is refreshed. Defaults to one day.
+            transport (Transport, optional): Transport used to download the document. Defaults to the process-wide transport.
+            url (str, optional): Address of the regions document. Defaults to REGIONS_URL.
+        """
+        self.path = path or os.path.join(default_cache_dir(), 'regions.json')
+        self.ttl = ttl
+        self.transport = transport
+        self.url = url
+        self.lock = ProcessLock(self.path + '.lock')
+        self._regions = None
+        self._loaded_at = 0
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f), os.path.getmtime(self.path)
+        except (OSError, ValueError):
+            return None, 0
+
+    def _write(self, regions):
+        folder = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(regions, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _download(self):
+        if self.transport is None:
+            from TrimblePy.common.transport import get_default_transport
+            self.transport = get_default_transport()
+        response = self.transport.get(self.url, headers={"accept": "application/json"})
+        response.raise_for_status()
+        return response.json()
+
+    def _is_fresh(self, loaded_at):
+        return time.time() - loaded_at < self.ttl
+
+    def get_regions(self, refresh=False):
+        """
+        Returns the regions document, downloading it only when the cached copy is missing or stale.
+
+        Args:
+            refresh (bool, optional): Ignore the ttl and download the document. Defaults to False.
+
+        Returns:
+            list: One dictionary per service region.
+        """
+        if not refresh and self._regions is not None and self._is_fresh(self._loaded_at):
+            return self._regions
+        regions, loaded_at = self._read()
+        if refresh or regions is None or not self._is_fresh(loaded_at):
+            with self.lock:
+                # another process may have refreshed the file while we waited
+                regions, loaded_at = self._read()
+                if refresh or regions is None or not self._is_fresh(loaded_at):
+                    try:
+                        regions = self._download()
+                        self._write(regions)
+                        loaded_at = time.time()
+                    except Exception as e:
+                        if regions is None:
+                            raise
+                        print(f"Could not refresh regions ({e}), using the cached copy.")
+        self._regions, self._loaded_at = regions, loaded_at
+        return regions
+
+    @staticmethod
+    def _endpoints_from(region_info):
+        return {key: region_info.get(field) for key, field in ENDPOINT_FIELDS.items()}
+
+    def get_endpoints(self, region):
+        """
+        Returns the endpoints for one region in the same shape as Authentication.endpoints.
+
+        Args:
+            region (str): Service region, e.g. 'na', 'eu', 'ap', 'ap2'.
+
+        Returns:
+            dict: Endpoint urls keyed by api name, or an empty dict if the region is unknown.
+        """
+        region = region.lower()
+        for region_info in self.get_regions():
+            if region_info['serviceRegion'] == region:
+                return self._endpoints_from(region_info)
+        return {}
+
+    def get_all_endpoints(self):
+        '''
+        Returns the endpoints of every region at once, keyed by service region.
+        '''
+        return {region_info['serviceRegion']: self._endpoints_from(region_info) for region_info in self.get_regions()}
+
+
+_default_region_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_region_cache():
+    global _default_region_cache
+    if _default_region_cache is None:
+        with _default_lock:
+            if _default_region_cache is None:
+                _default_region_cache = RegionCache()
+    return _default_region_cache
@@ -0,0 +1,137 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class RetryPolicy:
+    '''
+    Retry / backoff settings applied by the Transport to every request.
+
+    Failed attempts are retried with exponential backoff and full jitter. A Retry-After header on
+    a 429/503 response overrides the computed delay. Only idempotent methods are retried after a
+    connection error or 5xx, because the server may already have acted on them; a 429 is retried
+    for every method since throttled requests are rejected before they are processed. No attempt
+    starts after the per-call deadline has passed, and the connect / read timeouts of an attempt are
+    cut to the time left before it. The read timeout bounds each wait for data, so a response that
+    keeps arriving can still be read to its end after the deadline.
+    '''
+
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+    def __init__(self, max_attempts=5, backoff_factor=0.5, max_backoff=60, deadline=300, jitter=True,
+                 retry_statuses=(429, 500, 502, 503, 504), respect_retry_after=True):
+        """
+        Args:
+            max_attempts (int, optional): Total attempts including the first one. Defaults to 5.
+            backoff_factor (float, optional): Base delay in seconds, doubled after every attempt. Defaults to 0.5.
+            max_backoff (float, optional): Upper bound for a single delay in seconds. Defaults to 60.
+            deadline (float, optional): Seconds after which no new attempt is started and no attempt waits
+                on the server any longer. Defaults to 300.
+            jitter (bool, optional): Randomise delays between 0 and the exponential backoff. Defaults to True.
+            retry_statuses (tuple, optional): Response status codes that are retried.
+            respect_retry_after (bool, optional): Wait as long as the server's Retry-After header asks. Defaults to True.
+        """
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.respect_retry_after = respect_retry_after
+
+    def is_idempotent(self, method):
+        return method.upper() in self.IDEMPOTENT_METHODS
+
+    def should_retry_status(self, method, status_code, idempotent=None):
+        if status_code not in self.retry_statuses:
+            return False
+        if status_code == 429:
+            return True
+        return self.is_idempotent(method) if idempotent is None else idempotent
+
+    def should_retry_error(self, method, idempotent=None):
+        return self.is_idempotent(method) if idempotent is None else idempotent
+
+    @staticmethod
+    def retry_after(response):
+        '''
+        Returns the delay requested by a Retry-After header (seconds or HTTP date), or None.
+        '''
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max((when - datetime.now(timezone.utc)).total_seconds(), 0)
+
+    def backoff(self, attempt, response=None):
+        """
+        Returns how long to wait before the next attempt.
+
+        Args:
+            attempt (int): Number of attempts made so far (1 after the first failure).
+            response (requests.Response, optional): The failed response, checked for Retry-After.
+        """
+        if self.respect_retry_after:
+            delay = self.retry_after(response)
+            if delay is not None:
+                return delay
+        delay = min(self.backoff_factor * (2 ** (attempt - 1)), self.max_backoff)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def next_delay(self, attempt, started, response=None):
+        """
+        Returns the delay before the next attempt, or None if there are no attempts left or the
+        deadline would pass first.
+
+        Args:
+            attempt (int): Number of attempts made so far.
+            started (float): time.monotonic() when the first attempt started.
+            response (requests.Response, optional): The failed response, checked for Retry-After.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt, response)
+        if self.deadline is not None and time.monotonic() - started + delay > self.deadline:
+            return None
+        return delay
+
+    def attempt_timeout(self, timeout, started):
+        """
+        Returns the timeout for the next attempt, capped at the time left before the deadline.
+
+        Args:
+            timeout (float or tuple): Seconds, or a (connect, read) tuple. None means no timeout.
+            started (float): time.monotonic() when the first attempt started.
+        """
+        if self.deadline is None:
+            return timeout
+        left = max(self.deadline - (time.monotonic() - started), 0.001)
+        if isinstance(timeout, tuple):
+            return tuple(left if part is None else min(part, left) for part in timeout)
+        return left if timeout is None else min(timeout, left)
+
+    def wait(self, attempt, started, response=None):
+        """
+        Sleeps before the next attempt.
+
+        Returns:
+            bool: False (without sleeping) if there are no attempts left or the deadline would pass first.
+        """
+        delay = self.next_delay(attempt, started, response)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
@@ -0,0 +1,157 @@
+import codecs
+import json
+import sys
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+class _Buffer:
+    '''
+    Text buffer over an iterator of byte chunks, decoded as UTF-8 without splitting characters.
+    '''
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        '''
+        Appends the next chunk to the buffer. Returns False once the stream is exhausted.
+        '''
+        if self.eof:
+            return False
+        # drop what has been consumed so the buffer stays around one chunk long
+        self.text = self.text[self.pos:]
+        self.pos = 0
+        for chunk in self.chunks:
+            if chunk:
+                self.text += self.decoder.decode(chunk)
+                return True
+        self.text += self.decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        '''
+        Skips whitespace and returns the next character ('' at the end of the stream).
+        '''
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in the json stream, found {found or 'end of stream'!r}")
+        self.pos += 1
+
+    def value(self, decoder):
+        '''
+        Decodes the next complete json value, reading more chunks until it is complete.
+        '''
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+                # a number cut by the end of the chunk (12|34, 1|.5, 1|e3) decodes as a shorter number
+                if self.eof or (end < len(self.text) and self.text[end] not in _NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_json_items(chunks, key='items'):
+    """
+    Yields the elements of the array stored under key in a top-level json object, parsing the
+    stream incrementally so the whole document is never held in memory.
+
+    Args:
+        chunks (iterable): Byte chunks of the document, e.g. response.iter_content(65536).
+        key (str, optional): Name of the array to stream. Defaults to 'items'.
+
+    Yields:
+        The decoded array elements, one at a time. Other members of the object are skipped.
+    """
+    decoder = json.JSONDecoder()
+    buffer = _Buffer(chunks)
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        return
+    while True:
+        name = buffer.value(decoder)
+        buffer.expect(':')
+        if name == key and buffer.peek() == '[':
+            buffer.pos += 1
+            if buffer.peek() == ']':
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.value(decoder)
+                    if buffer.peek() == ',':
+                        buffer.pos += 1
+                        continue
+                    buffer.expect(']')
+                    break
+        else:
+            buffer.value(decoder)
+        if buffer.peek() == ',':
+            buffer.pos += 1
+            continue
+        buffer.expect('}')
+        return
+
+
+class ColumnarSink:
+    '''
+    Collects dictionaries as one list per key instead of one dict per item, so streamed items can
+    be dropped as soon as they are appended. Items missing a key get None in that column. String
+    values of the interned columns (ids repeated across many rows) are stored once.
+
+    Usage:
+        sink = ColumnarSink(intern=('pid', 'cid', 'mid'))
+        for item in iter_json_items(response.iter_content(65536)):
+            sink.append(item)
+        df = sink.to_frame()
+    '''
+
+    def __init__(self, intern=()):
+        """
+        Args:
+            intern (iterable, optional): Keys whose string values are interned. Defaults to none.
+        """
+        self.columns = {}
+        self.rows = 0
+        self.intern = set(intern)
+
+    def append(self, item):
+        columns = self.columns
+        for key, value in item.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [None] * self.rows
+            if key in self.intern and type(value) is str:
+                value = sys.intern(value)
+            column.append(value)
+        self.rows += 1
+        if len(item) != len(columns):
+            for column in columns.values():
+                if len(column) < self.rows:
+                    column.append(None)
+
+    def __len__(self):
+        return self.rows
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.columns)
@@ -0,0 +1,127 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+from TrimblePy.common.locks import ProcessLock, default_lock_path
+
+
+class TokenManager:
+    '''
+    Keeps an Authentication's tokens fresh in the background.
+
+    A daemon thread renews the tokens refresh_margin seconds before they expire, so request threads
+    never wait on id.trimble.com. Renewals are single-flight: threads share the Authentication's
+    renewal lock and processes share a ProcessLock. Whoever gets the lock first checks the token
+    store (.env / SQL) before renewing, so workers pick up a token another process already renewed
+    instead of requesting their own.
+
+    Usage:
+        auth = Authentication(token_retrieval_method='env', region='ap')
+        auth.get_token()
+        manager = TokenManager(auth).start()
+    '''
+
+    def __init__(self, authentication, refresh_margin=300, lock_path=None, retry_interval=30):
+        """
+        Args:
+            authentication (Authentication): The Authentication whose tokens are managed.
+            refresh_margin (int, optional): Seconds before expiry to renew the tokens. Defaults to 300.
+            lock_path (str, optional): Path of the inter-process lock file. Defaults to a per-client file in the temp folder.
+            retry_interval (int, optional): Seconds to wait before trying again after a failed renewal. Defaults to 30.
+        """
+        self.authentication = authentication
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        if lock_path is None:
+            client_key = hashlib.sha1(str(authentication.client_id).encode('utf-8')).hexdigest()[:12]
+            lock_path = default_lock_path(f'token_{client_key}')
+        self.lock = ProcessLock(lock_path)
+        self._stop = threading.Event()
+        self._thread = None
+        authentication.token_manager = self
+
+    def __getstate__(self):
+        # the background thread stays in the parent - workers only share the locking
+        state = self.__dict__.copy()
+        del state['_stop']
+        state['_thread'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._stop = threading.Event()
+
+    def _needs_refresh(self, stale_token=None):
+        auth = self.authentication
+        if not auth.access_token:
+            return True
+        if stale_token is not None:
+            return auth.access_token == stale_token
+        if not auth.expires_in:
+            return False
+        return datetime.now() > auth.expires_in - timedelta(seconds=self.refresh_margin)
+
+    def _adopt_stored_tokens(self, stale_token=None):
+        '''
+        Takes the tokens from the store if another process has already renewed them.
+        '''
+        auth = self.authentication
+        access_token, refresh_token, expires_in = auth._read_stored_tokens()
+        if not access_token or not refresh_token or access_token == stale_token:
+            return False
+        if expires_in and auth.expires_in and expires_in <= auth.expires_in:
+            return False
+        auth.access_token, auth.refresh_token, auth.expires_in = access_token, refresh_token, expires_in
+        return True
+
+    def refresh(self, stale_token=None):
+        """
+        Renews the tokens unless another thread or process already has.
+
+        Args:
+            stale_token (str, optional): The access token that was rejected. Without it the tokens are only
+                renewed when they are within refresh_margin of expiring.
+
+        Returns:
+            bool: True if a valid access token is available.
+        """
+        auth = self.authentication
+        with auth._renew_lock:
+            if not self._needs_refresh(stale_token):
+                return True
+            with self.lock:
+                if self._adopt_stored_tokens(stale_token) and not self._needs_refresh():
+                    return True
+                if not auth.refresh_token:
+                    return False
+                return auth.renew_tokens(auth.refresh_token) is True
+
+    def _seconds_until_refresh(self):
+        expires_in = self.authentication.expires_in
+        if not expires_in:
+            return self.retry_interval
+        due = expires_in - timedelta(seconds=self.refresh_margin)
+        return max((due - datetime.now()).total_seconds(), 0)
+
+    def _run(self):
+        while not self._stop.wait(self._seconds_until_refresh()):
+            try:
+                renewed = self.refresh()
+            except Exception as e:
+                print(f"Background token refresh failed: {e}")
+                renewed = False
+            if not renewed:
+                self._stop.wait(self.retry_interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='trimblepy-token-refresh', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import tempfile
+
+from TrimblePy.common.locks import ProcessLock, default_lock_path
+
+
+class EnvTokenState:
+    '''
+    In-memory view of the tokens kept in a .env file.
+
+    The file is parsed once and reads are served from memory. Before each read the file's
+    modification time is checked (a single stat call), so tokens rotated by another process are
+    picked up without re-parsing the file every time. Writes replace the file atomically with all
+    changed keys in one go.
+    '''
+
+    def __init__(self, path='.env'):
+        self.path = path
+        self._values = {}
+        self._mtime = None
+        self._loaded = False
+        lock_key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+        self.lock = ProcessLock(default_lock_path(f'env_{lock_key}'))
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload(self):
+        from dotenv import dotenv_values
+        mtime = self._current_mtime()
+        self._values = dict(dotenv_values(self.path)) if mtime is not None else {}
+        self._mtime = mtime
+        self._loaded = True
+
+    def _refresh_if_changed(self):
+        if not self._loaded or self._current_mtime() != self._mtime:
+            self.reload()
+
+    def get(self, key, default=None):
+        self._refresh_if_changed()
+        value = self._values.get(key)
+        return default if value is None else value
+
+    def update(self, values):
+        """
+        Writes several keys to the file in one atomic replace, keeping every other line untouched.
+
+        Args:
+            values (dict): Keys and values to set.
+        """
+        with self.lock:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    lines = f.read().splitlines()
+            except FileNotFoundError:
+                lines = []
+            remaining = dict(values)
+            for i, line in enumerate(lines):
+                key = line.split('=', 1)[0].strip()
+                if key.startswith('export '):
+                    key = key[len('export '):].strip()
+                if '=' in line and key in remaining:
+                    lines[i] = self._format(key, remaining.pop(key))
+            lines.extend(self._format(key, value) for key, value in remaining.items())
+
+            folder = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.env.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            self.reload()
+
+    @staticmethod
+    def _format(key, value):
+        value = '' if value is None else str(value)
+        return "{}='{}'".format(key, value.replace("'", "\\'"))
@@ -0,0 +1,248 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+from TrimblePy.common import codec
+from TrimblePy.common.retry import RetryPolicy
+
+
+class Transport:
+    '''
+    Shared HTTP transport used by every API client.
+
+    Keeps one keep-alive connection pool per endpoint host so repeated calls to
+    the same Trimble Connect service reuse their TCP/TLS connections instead of
+    paying a new handshake on each request.
+    '''
+
+    def __init__(self, pool_maxsize=32, pool_block=False, timeout=(10, 300), compression=True, retry=None, rate_limiter=None, cache=None, metrics=None):
+        """
+        Initializes a new Transport.
+
+        Args:
+            pool_maxsize (int, optional): Maximum number of kept-alive connections per host. Defaults to 32.
+            pool_block (bool, optional): Block when the pool for a host is exhausted instead of opening
+                throwaway connections. Defaults to False.
+            timeout (float or tuple, optional): Default (connect, read) timeout in seconds. Defaults to (10, 300).
+            compression (bool, optional): Ask the server for gzip/deflate encoded responses. Defaults to True.
+            retry (RetryPolicy, optional): Retry / backoff policy applied to every request. Defaults to RetryPolicy().
+            rate_limiter (RateLimiter, optional): Client-side rate limiter applied before every attempt. Defaults to None.
+            cache (ResponseCache, optional): Conditional-request cache used by the calls that ask for it. Defaults to None.
+            metrics (Metrics, optional): Collects per-endpoint request metrics. Defaults to None.
+        """
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.timeout = timeout
+        self.compression = compression
+        self.retry = retry or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = metrics
+        self._session = None
+        self._hosts = set()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # sessions and locks can't cross process boundaries (multiprocessing.Pool pickles the api objects)
+        state = self.__dict__.copy()
+        state['_session'] = None
+        state['_hosts'] = set()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    session = requests.Session()
+                    session.headers['Accept-Encoding'] = 'gzip, deflate' if self.compression else 'identity'
+                    self._session = session
+        return self._session
+
+    @staticmethod
+    def _host_prefix(url):
+        parts = urlsplit(url)
+        return f'{parts.scheme}://{parts.netloc}/'
+
+    def mount(self, url):
+        '''
+        Mounts a dedicated connection pool for the host of the given url (no-op if it already has one).
+        '''
+        prefix = self._host_prefix(url)
+        if prefix in self._hosts:
+            return
+        session = self.session
+        with self._lock:
+            if prefix not in self._hosts:
+                from requests.adapters import HTTPAdapter
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, pool_block=self.pool_block)
+                session.mount(prefix, adapter)
+                self._hosts.add(prefix)
+
+    def mount_endpoints(self, endpoints):
+        '''
+        Pre-mounts pools for every endpoint in an Authentication.endpoints dictionary (and registers
+        them with the rate limiter).
+        '''
+        if self.rate_limiter is not None:
+            self.rate_limiter.register_endpoints(endpoints)
+        for url in endpoints.values():
+            if url and url.startswith('http'):
+                self.mount(url)
+
+    def request(self, method, url, headers=None, timeout=None, retry=None, idempotent=None, **kwargs):
+        """
+        Sends a request, retrying it according to the retry policy.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request url.
+            headers (dict, optional): Request headers.
+            timeout (float or tuple, optional): Overrides the transport's default timeout.
+            retry (RetryPolicy, optional): Overrides the transport's retry policy for this call.
+            idempotent (bool, optional): Overrides whether the call is safe to repeat (by default GET, HEAD,
+                OPTIONS, PUT and DELETE are).
+            **kwargs: Passed on to requests.Session.request. A json= body is encoded with the codec.
+
+        Returns:
+            requests.Response: The last response, whose json() decodes with the codec. Connection errors
+            are raised once the retries are used up.
+        """
+        import requests
+        self.mount(url)
+        headers = codec.encode_json_body(kwargs, headers)
+        if timeout is None:
+            timeout = self.timeout
+        policy = retry or self.retry
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(url)
+            try:
+                response = self.session.request(method, url, headers=headers, timeout=policy.attempt_timeout(timeout, started), **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                if policy.should_retry_error(method, idempotent) and policy.wait(attempt, started):
+                    continue
+                if self.metrics is not None:
+                    self.metrics.record(method, url, None, time.monotonic() - started, 0, attempt - 1, err)
+                raise
+            if policy.should_retry_status(method, response.status_code, idempotent) and policy.wait(attempt, started, response):
+                response.close()
+                continue
+            if self.metrics is not None:
+                # streamed bodies haven't been read yet, so only their declared length is known
+                size = int(response.headers.get('Content-Length') or 0) if kwargs.get('stream') else len(response.content)
+                self.metrics.record(method, url, response.status_code, time.monotonic() - started, size, attempt - 1)
+            return codec.wrap_response(response)
+
+    def get(self, url, headers=None, **kwargs):
+        return self.request('GET', url, headers=headers, **kwargs)
+
+    def post(self, url, headers=None, **kwargs):
+        return self.request('POST', url, headers=headers, **kwargs)
+
+    def put(self, url, headers=None, **kwargs):
+        return self.request('PUT', url, headers=headers, **kwargs)
+
+    def patch(self, url, headers=None, **kwargs):
+        return self.request('PATCH', url, headers=headers, **kwargs)
+
+    def delete(self, url, headers=None, **kwargs):
+        return self.request('DELETE', url, headers=headers, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._hosts = set()
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport():
+    '''
+    Returns the process-wide Transport shared by Authentication objects that weren't given their own.
+    '''
+    global _default_transport
+    if _default_transport is None:
+        with _default_lock:
+            if _default_transport is None:
+                _default_transport = Transport()
+    return _default_transport
+
+
+class AuthorizedTransport:
+    '''
+    A Transport bound to an Authentication.
+
+    The bearer token is read from the Authentication when each request is sent, so clients keep
+    working after the tokens are renewed. A 401 triggers a single renewal (shared by every thread
+    that saw the same stale token) and the request is replayed once with the new token.
+
+    GET requests made with cache=True are revalidated against the transport's ResponseCache (if it
+    has one) - a 304 is answered with the stored body.
+    '''
+
+    def __init__(self, transport, authentication):
+        self.transport = transport
+        self.authentication = authentication
+
+    def _authorize(self, headers):
+        token = self.authentication.current_access_token()
+        headers['Authorization'] = f'Bearer {token}'
+        return token
+
+    def request(self, method, url, headers=None, cache=False, **kwargs):
+        headers = dict(headers or {})
+        token = self._authorize(headers)
+        store = self.transport.cache if cache and method == 'GET' else None
+        entry = None
+        if store is not None:
+            scope = self.authentication.cache_scope()
+            entry = store.lookup(url, scope)
+            if entry is not None:
+                headers.update(store.conditional_headers(entry))
+        response = self.transport.request(method, url, headers=headers, **kwargs)
+        if response.status_code == 401 and self.authentication.renew_tokens_once(token):
+            response.close()
+            self._authorize(headers)
+            response = self.transport.request(method, url, headers=headers, **kwargs)
+        if store is not None:
+            if response.status_code == 304 and entry is not None:
+                cached = store.revalidated(entry)
+                if cached is not None:
+                    response.close()
+                    return cached
+                # the body vanished from disk - fetch it again without validators
+                for name in ('If-None-Match', 'If-Modified-Since'):
+                    headers.pop(name, None)
+                response = self.transport.request(method, url, headers=headers, **kwargs)
+            if response.status_code == 200:
+                store.store(url, scope, response)
+        return response
+
+    def get(self, url, headers=None, **kwargs):
+        return self.request('GET', url, headers=headers, **kwargs)
+
+    def post(self, url, headers=None, **kwargs):
+        return self.request('POST', url, headers=headers, **kwargs)
+
+    def put(self, url, headers=None, **kwargs):
+        return self.request('PUT', url, headers=headers, **kwargs)
+
+    def patch(self, url, headers=None, **kwargs):
+        return self.request('PATCH', url, headers=headers, **kwargs)
+
+    def delete(self, url, headers=None, **kwargs):
+        return self.request('DELETE', url, headers=headers, **kwargs)
@@ -0,0 +1,116 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ActivityCheckpoint:
+    '''
+    Position of an activities export, stored as a small json file.
+
+    The checkpoint holds the id of the last activity of the last page the caller finished with, so
+    a restarted export continues with the page after it. It is written to a temporary file and
+    renamed into place, so a crash never leaves a half written checkpoint behind.
+    '''
+
+    def __init__(self, path, project_id):
+        """
+        Args:
+            path (str): The checkpoint file.
+            project_id (str): Project of the export - a checkpoint of another project is refused.
+        """
+        self.path = path
+        self.project_id = project_id
+        self.last_id = None
+        self.pages = 0
+        self.activities = 0
+        self.done = False
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                state = json.load(f)
+            if state.get('project_id') != project_id:
+                raise ValueError(f"Checkpoint {path} belongs to project {state.get('project_id')}, not {project_id}")
+            self.last_id = state.get('last_id')
+            self.pages = state.get('pages', 0)
+            self.activities = state.get('activities', 0)
+            self.done = state.get('done', False)
+
+    def save(self):
+        state = {
+            'project_id': self.project_id,
+            'last_id': self.last_id,
+            'pages': self.pages,
+            'activities': self.activities,
+            'done': self.done,
+            'updated': time.time(),
+        }
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def advance(self, page):
+        self.last_id = page[-1]['id']
+        self.pages += 1
+        self.activities += len(page)
+        self.save()
+
+    def finish(self):
+        self.done = True
+        self.save()
+
+
+def iter_activity_pages(file_api, checkpoint=None, inspected=None, max_pages=None, prefetch=True):
+    """
+    Yields the project's activities page by page, newest first.
+
+    Only the page being processed (and the one being prefetched) is held in memory. With prefetch the
+    next page is requested on a background thread as soon as a page arrives, so the request overlaps
+    with the caller's work on the current page.
+
+    Args:
+        file_api (TrimbleFileApi): Client of the project.
+        checkpoint (str, optional): Checkpoint file. A page counts as done once the caller asks for the next
+            one; a restarted run continues after the last page done, and yields nothing once the feed was
+            read to its end (delete the file to start over). Defaults to no checkpoint.
+        inspected (set, optional): Activity ids already seen - stops after the page whose last activity is one.
+        max_pages (int, optional): Maximum number of pages to yield. Defaults to all.
+        prefetch (bool, optional): Fetch the next page while the current one is processed. Defaults to True.
+
+    Yields:
+        list: A page of activity dictionaries.
+    """
+    if inspected is not None and not isinstance(inspected, (set, frozenset)):
+        inspected = set(inspected)
+    state = ActivityCheckpoint(checkpoint, file_api.project_id) if checkpoint else None
+    if state is not None and state.done:
+        return
+    base = f'{file_api.BASE_URL}activities?projectId={file_api.project_id}'
+
+    def fetch(last_id):
+        url = base if last_id is None else f'{base}&lastId={last_id}'
+        return file_api.safe_request(url).json()
+
+    pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = fetch(state.last_id if state is not None else None)
+        pages = 0
+        while page:
+            last_id = page[-1]['id']
+            pages += 1
+            more = not (inspected is not None and last_id in inspected) and (max_pages is None or pages < max_pages)
+            upcoming = pool.submit(fetch, last_id) if more and pool is not None else None
+            yield page
+            if state is not None:
+                state.advance(page)
+            if not more:
+                return
+            page = upcoming.result() if upcoming is not None else fetch(last_id)
+        if state is not None:
+            state.finish()
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
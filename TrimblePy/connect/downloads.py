@@ -0,0 +1,536 @@
+import hashlib
+import math
+import mmap
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+_UNSAFE_NAME_CHARS = re.compile(r'[<>:"\\|?*\x00-\x1f]')
+
+
+class RangeNotSupported(Exception):
+    '''
+    The download server ignored a Range request, so the file can't be split into segments.
+    '''
+
+
+class DownloadError(Exception):
+    pass
+
+
+class _Superseded(Exception):
+    # raised in a segment's transfer once its file fell back to a single stream
+    pass
+
+
+class _Job:
+    '''
+    Download state of one file, shared by the tasks of its segments.
+    '''
+
+    def __init__(self, file, path):
+        self.id = getattr(file, 'id', file)
+        self.version_id = getattr(file, 'versionId', None)
+        self.md5 = _clean(getattr(file, 'md5', None))
+        size = _clean(getattr(file, 'size', None))
+        self.size = int(size) if size is not None else None
+        self.path = path
+        self.url = None
+        self.segments = []
+        self.remaining = 0
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.active = 0
+        self.generation = 0
+        self.error = None
+        self.bytes = 0
+
+    def part_path(self, index):
+        tag = re.sub(r'[^A-Za-z0-9._-]', '_', str(self.version_id or self.id))
+        return f'{self.path}.{tag}.part{index}'
+
+
+def _clean(value):
+    # missing snapshot values come through pandas as NaN
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+class Downloader:
+    '''
+    Bulk download engine for project files.
+
+    Every file is streamed to disk in chunks - never held in memory - through a part file next to
+    its target, which is renamed into place once its md5 matches the snapshot. Files larger than
+    segment_size are split into HTTP Range segments downloaded in parallel. All transfers share one
+    pool of `workers` connections. Download urls are resolved when a file's first transfer starts,
+    so the signed urls of a long queue don't expire while it waits.
+
+    An interrupted run is resumed by running it again: finished files whose size and md5 match are
+    skipped, and part files continue where they stopped.
+
+    Usage:
+        downloader = Downloader(file_api, workers=16)
+        results = downloader.download(file_api.get_file_table(), 'C:/models')
+    '''
+
+    def __init__(self, file_api, workers=8, segment_size=64 * 1024 * 1024, max_segments=8, chunk_size=1024 * 1024,
+                 verify=True, progress=True):
+        """
+        Args:
+            file_api (TrimbleFileApi): Client used to resolve download urls and fetch the files.
+            workers (int, optional): Concurrent transfers (connections). Defaults to 8.
+            segment_size (int, optional): Files larger than this are split into Range segments of about
+                this size. Defaults to 64 MB.
+            max_segments (int, optional): Maximum number of segments per file. Defaults to 8.
+            chunk_size (int, optional): Bytes read from the network per write. Defaults to 1 MB.
+            verify (bool, optional): Check the md5 of every file against the snapshot. Defaults to True.
+            progress (bool, optional): Show a progress bar with the throughput. Defaults to True.
+        """
+        self.file_api = file_api
+        self.workers = workers
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.chunk_size = chunk_size
+        self.verify = verify
+        self.progress = progress
+        self._bar = None
+        self._bar_lock = threading.Lock()
+
+    # -----------------------------------------------------------------
+    # PLANNING
+    # -----------------------------------------------------------------
+
+    def path_for(self, file, directory, keep_paths):
+        '''
+        Returns where a file is saved: directory/<folder path>/<name> (or directory/<name>).
+        '''
+        name = getattr(file, 'name', None) or str(getattr(file, 'id', file))
+        parts = []
+        full_path = _clean(getattr(file, 'full_path', None))
+        if keep_paths and full_path:
+            parts = [part for part in str(full_path).split('/') if part]
+        parts.append(name)
+        return os.path.join(directory, *(_UNSAFE_NAME_CHARS.sub('_', part).strip() or '_' for part in parts))
+
+    def _segments(self, job):
+        if job.size is None or job.size <= self.segment_size:
+            return [(0, job.size)]
+        count = min(self.max_segments, -(-job.size // self.segment_size))
+        step = -(-job.size // count)
+        return [(start, min(start + step, job.size)) for start in range(0, job.size, step)]
+
+    def _is_complete(self, job):
+        if not os.path.exists(job.path):
+            return False
+        if job.size is not None and os.path.getsize(job.path) != job.size:
+            return False
+        if self.verify and job.md5:
+            return file_md5(job.path) == job.md5.lower()
+        return job.size is not None
+
+    # -----------------------------------------------------------------
+    # TRANSFER
+    # -----------------------------------------------------------------
+
+    def _url(self, job):
+        with job.lock:
+            if job.url is None:
+                job.url = self.file_api.download_url(job.id, job.version_id)
+            return job.url
+
+    def _renew_url(self, job, stale):
+        with job.lock:
+            if job.url == stale:
+                job.url = self.file_api.download_url(job.id, job.version_id, refresh=True)
+            return job.url
+
+    def _advance(self, count):
+        if self._bar is not None:
+            with self._bar_lock:
+                self._bar.update(count)
+
+    def _fetch_segment(self, job, segments, index, generation=0):
+        '''
+        Downloads segment index of a job into its part file, continuing a partial part file. Stops with
+        _Superseded as soon as the job's generation moves on.
+        '''
+        start, end = segments[index]
+        part = job.part_path(index)
+        done = os.path.getsize(part) if os.path.exists(part) else 0
+        if end is not None and done >= end - start:
+            return
+        ranged = done > 0 or len(segments) > 1
+        headers = dict(self.file_api.headers)
+        if ranged:
+            headers['Range'] = f'bytes={start + done}-' + (f'{end - 1}' if end is not None else '')
+        url = self._url(job)
+        response = self.file_api.transport.get(url, headers=headers, stream=True)
+        try:
+            if response.status_code in (401, 403):
+                # the signed url expired while the file was queued
+                response.close()
+                response = self.file_api.transport.get(self._renew_url(job, url), headers=headers, stream=True)
+            response.raise_for_status()
+            mode = 'ab'
+            if ranged and response.status_code != 206:
+                if len(segments) > 1:
+                    raise RangeNotSupported(job.id)
+                mode = 'wb'  # the whole file came back - start the part over
+                self._advance(-done)
+            with open(part, mode) as f:
+                for chunk in response.iter_content(self.chunk_size):
+                    if job.generation != generation:
+                        raise _Superseded(job.id)
+                    f.write(chunk)
+                    self._advance(len(chunk))
+        finally:
+            response.close()
+
+    def _finish(self, job):
+        '''
+        Joins the part files, checks the md5 and moves the file into place.
+        '''
+        first = job.part_path(0)
+        with open(first, 'ab') as out:
+            for index in range(1, len(job.segments)):
+                part = job.part_path(index)
+                with open(part, 'rb') as f:
+                    while True:
+                        block = f.read(self.chunk_size)
+                        if not block:
+                            break
+                        out.write(block)
+                os.remove(part)
+        size = os.path.getsize(first)
+        if job.size is not None and size != job.size:
+            os.remove(first)
+            raise DownloadError(f'{job.id}: got {size} bytes, expected {job.size}')
+        if self.verify and job.md5 and file_md5(first) != job.md5.lower():
+            os.remove(first)
+            raise DownloadError(f'{job.id}: md5 mismatch')
+        os.replace(first, job.path)
+        job.bytes = size
+
+    def _run_segment(self, job, index, generation=0):
+        with job.lock:
+            if generation != job.generation:
+                return  # the file fell back to a single stream after this task was queued
+            segments = job.segments
+            job.active += 1
+        try:
+            self._transfer(job, segments, index, generation)
+        finally:
+            with job.lock:
+                job.active -= 1
+                job.idle.notify_all()
+
+    def _fall_back(self, job, generation):
+        '''
+        Switches a segmented job to a single stream: stops its other segments, waits until none of them
+        is still writing, then removes the part files. Returns the new generation, or None if another
+        segment already did this.
+        '''
+        with job.lock:
+            if generation != job.generation:
+                return None
+            job.generation += 1
+            # the calling task is the only one left once the others see the new generation
+            job.idle.wait_for(lambda: job.active == 1)
+            for i in range(len(job.segments)):
+                part = job.part_path(i)
+                if os.path.exists(part):
+                    self._advance(-os.path.getsize(part))
+                    os.remove(part)
+            job.segments = [(0, job.size)]
+            job.remaining = 1
+            return job.generation
+
+    def _transfer(self, job, segments, index, generation):
+        try:
+            self._fetch_segment(job, segments, index, generation)
+        except _Superseded:
+            return
+        except RangeNotSupported:
+            generation = self._fall_back(job, generation)
+            if generation is not None:
+                self._transfer(job, job.segments, 0, generation)
+            return
+        except Exception as err:
+            error = err
+        else:
+            error = None
+        with job.lock:
+            if generation != job.generation:
+                return
+            job.error = job.error or error
+            job.remaining -= 1
+            last = job.remaining == 0
+        if last and job.error is None:
+            try:
+                self._finish(job)
+            except Exception as err:
+                job.error = err
+
+    def download(self, files, directory, keep_paths=True):
+        """
+        Downloads files into directory.
+
+        Args:
+            files: FileTable, {id: TrimbleFile} dictionary, or iterable of TrimbleFile objects or file ids.
+            directory (str): Target folder.
+            keep_paths (bool, optional): Recreate the project's folder structure under directory. Defaults to True.
+
+        Returns:
+            list: One {'id', 'versionId', 'path', 'status', 'bytes', 'error'} dictionary per file, status being
+            'downloaded', 'skipped' (already complete on disk) or 'failed'.
+        """
+        if hasattr(files, 'values'):
+            files = files.values()
+        jobs = [_Job(file, self.path_for(file, directory, keep_paths)) for file in files]
+        started = time.monotonic()
+        results = {}
+        pending = []
+        for job in jobs:
+            if self._is_complete(job):
+                results[id(job)] = 'skipped'
+                continue
+            os.makedirs(os.path.dirname(job.path) or '.', exist_ok=True)
+            job.segments = self._segments(job)
+            job.remaining = len(job.segments)
+            pending.append(job)
+
+        if self.progress:
+            from tqdm import tqdm
+            total = sum(job.size for job in pending) if all(job.size is not None for job in pending) else None
+            self._bar = tqdm(total=total, unit='B', unit_scale=True, unit_divisor=1024, desc='Downloading')
+            # count what earlier runs already fetched
+            self._advance(sum(os.path.getsize(job.part_path(i)) for job in pending
+                              for i in range(len(job.segments)) if os.path.exists(job.part_path(i))))
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                tasks = [pool.submit(self._run_segment, job, index) for job in pending for index in range(len(job.segments))]
+                for task in as_completed(tasks):
+                    task.result()
+        finally:
+            if self._bar is not None:
+                self._bar.close()
+                self._bar = None
+
+        report = []
+        for job in jobs:
+            status = results.get(id(job)) or ('failed' if job.error is not None else 'downloaded')
+            report.append({
+                'id': job.id,
+                'versionId': job.version_id,
+                'path': job.path,
+                'status': status,
+                'bytes': job.bytes,
+                'error': str(job.error) if job.error is not None else None,
+            })
+        elapsed = time.monotonic() - started
+        downloaded = sum(item['bytes'] for item in report)
+        counts = {status: sum(item['status'] == status for item in report) for status in ('downloaded', 'skipped', 'failed')}
+        print(f"Downloaded {counts['downloaded']} files ({downloaded / 2 ** 20:.1f} MB in {elapsed:.1f}s, "
+              f"{downloaded / 2 ** 20 / max(elapsed, 1e-9):.1f} MB/s), skipped {counts['skipped']}, failed {counts['failed']}")
+        return report
+
+
+def file_md5(path, chunk_size=1024 * 1024):
+    '''
+    Returns the hex md5 of a file, read in chunks.
+    '''
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def url_expiry(url):
+    '''
+    Returns when a signed download url expires (epoch seconds) from its query string - S3 (X-Amz-Date +
+    X-Amz-Expires, or Expires), Azure (se) - or None if it doesn't say.
+    '''
+    query = {key.lower(): values[-1] for key, values in parse_qs(urlsplit(url).query).items()}
+    try:
+        if 'x-amz-date' in query and 'x-amz-expires' in query:
+            signed = datetime.strptime(query['x-amz-date'], '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc)
+            return signed.timestamp() + int(query['x-amz-expires'])
+        if 'expires' in query:
+            return float(query['expires'])
+        if 'se' in query:
+            return datetime.fromisoformat(query['se'].replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        pass
+    return None
+
+
+class DownloadUrlCache:
+    '''
+    Short-lived cache of signed download urls, shared by the threads of one TrimbleFileApi.
+
+    A url is kept until shortly before the expiry in its signature (margin seconds), and at most
+    max_age seconds - the expiry isn't always readable from the url.
+    '''
+
+    def __init__(self, max_age=300, margin=60):
+        """
+        Args:
+            max_age (float, optional): Longest time a url is reused. Defaults to 5 minutes.
+            margin (float, optional): Seconds before the signed expiry a url stops being handed out. Defaults to 60.
+        """
+        self.max_age = max_age
+        self.margin = margin
+        self._urls = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'max_age': self.max_age, 'margin': self.margin}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def get(self, file_id, version_id=None):
+        with self._lock:
+            entry = self._urls.get((file_id, version_id))
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._urls[(file_id, version_id)]
+                return None
+            return entry[0]
+
+    def put(self, file_id, version_id, url):
+        now = time.time()
+        expires = now + self.max_age
+        signed = url_expiry(url)
+        if signed is not None:
+            expires = min(expires, signed - self.margin)
+        with self._lock:
+            if expires > now:
+                self._urls[(file_id, version_id)] = (url, expires)
+            # drop expired urls now and then so a long session doesn't accumulate them
+            if len(self._urls) > 10000:
+                self._urls = {key: entry for key, entry in self._urls.items() if entry[1] > now}
+
+    def clear(self):
+        with self._lock:
+            self._urls.clear()
+
+    def __len__(self):
+        return len(self._urls)
+
+
+def save_chunks(chunks, path, md5=None):
+    """
+    Writes chunks to path through a temporary file that is renamed into place once complete.
+
+    Args:
+        chunks (iterable): bytes chunks, e.g. response.iter_content(1024 * 1024).
+        path (str): Target file.
+        md5 (str, optional): Expected md5. A mismatch raises DownloadError and path is left untouched.
+
+    Returns:
+        int: Number of bytes written.
+    """
+    digest = hashlib.md5()
+    size = 0
+    part = f'{path}.part'
+    try:
+        with open(part, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        if md5 and digest.hexdigest() != md5.lower():
+            raise DownloadError(f'{path}: md5 {digest.hexdigest()}, expected {md5}')
+        os.replace(part, path)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    return size
+
+
+class MappedFile:
+    '''
+    Read-only memory map of a downloaded file.
+
+    The operating system pages the file in from disk as it is read and can drop the pages again
+    under memory pressure, so even a model larger than the free memory can be searched, sliced or
+    handed to a parser without a copy on the Python heap. The map is file-like (read, readline,
+    seek) and supports the buffer protocol (memoryview, re, hashlib, numpy.frombuffer).
+
+    Usage:
+        with file_api.open_mapped(file_id) as mapped:
+            header = mapped[:1024]
+            walls = len(re.findall(rb'IFCWALL\\(', mapped.map))   # scans the file without loading it
+            df = pd.read_csv(mapped.path)            # or hand the path to a parser
+    '''
+
+    def __init__(self, path, delete=False):
+        """
+        Args:
+            path (str): File to map.
+            delete (bool, optional): Delete the file when the map is closed (for temporary downloads). Defaults to False.
+        """
+        self.path = path
+        self.delete = delete
+        self._file = open(path, 'rb')
+        # an empty file can't be mapped
+        size = os.fstat(self._file.fileno()).st_size
+        self.map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, key):
+        if self.map is None:
+            return b''[key]
+        return self.map[key]
+
+    def memoryview(self):
+        '''
+        Returns a zero-copy memoryview of the file - release it before closing the map.
+        '''
+        return memoryview(self.map if self.map is not None else b'')
+
+    def read(self, size=-1):
+        return self.map.read(size) if self.map is not None else b''
+
+    def readline(self):
+        return self.map.readline() if self.map is not None else b''
+
+    def seek(self, offset, whence=0):
+        return self.map.seek(offset, whence) if self.map is not None else 0
+
+    def tell(self):
+        return self.map.tell() if self.map is not None else 0
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if not self._file.closed:
+            self._file.close()
+            if self.delete:
+                os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __repr__(self):
+        return f"<MappedFile {self.path} ({self.size} bytes)>"
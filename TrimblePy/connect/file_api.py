@@ -1,24 +1,62 @@
-import requests
-import pandas as pd
-import time
+from TrimblePy.common.codec import RecordSchema, decode_records
+from TrimblePy.common.pagination import collect
+from TrimblePy.connect.downloads import DownloadUrlCache
+from TrimblePy.common.retry import RetryPolicy
+
+# snapshot fields that repeat across many items (parent folders, users, types)
+SNAPSHOT_INTERNED_KEYS = ('pid', 'ptp', 'tp', 'cid', 'mid', 'chid')
+
+# snapshot field -> TrimbleFile attribute
+SNAPSHOT_COLUMNS = {
+    "id": "id",
+    "vid": "versionId",
+    "nm": "name",
+    "pid": "parentId",
+    "ptp": "parentType",
+    "tp": "fileType",
+    "ct": "createdTime",
+    "mt": "modifiedTime",
+    "cid": "createdBy",
+    "mid": "modifiedBy",
+    "sz": "size",
+    "del": "deleted",
+    "md5": "md5",
+    "rv": "revision",
+    "chid": "checkoutBy",
+    "cht": "checkoutTime",
+    "tn": "thumbnail"
+}
+
+# snapshot fields in the order of the TrimbleFile constructor arguments (full_path and parent_folder
+# are worked out from the folders, deleted comes last)
+SNAPSHOT_FIELDS = RecordSchema('SnapshotRecord', [(name, None) for name in (
+    'id', 'vid', 'nm', 'pid', 'ptp', 'tp', 'ct', 'mt', 'cid', 'mid', 'sz', 'md5', 'rv', 'tn', 'chid', 'cht', 'del',
+)])
 
 class TrimbleFileApi:
 
-    def __init__(self, authentication, project_id=None):
+    def __init__(self, authentication, project_id=None, blob_cache=None):
             """
             Initializes a new instance of the FileAPI class.
 
             Parameters:
             authentication (Authentication): An instance of the Authentication class.
+            blob_cache (BlobCache or bool, optional): Serve repeated downloads of a file version from disk.
+                True uses a BlobCache in ~/.trimblepy/blobs. Defaults to no cache.
 
             """
             self.authentication = authentication
             self.BASE_URL = self.authentication.endpoints['tc']
+            self.transport = self.authentication.get_transport()
             self.headers = {
-                "Authorization": f"Bearer {self.authentication.access_token}",
                 "Accept": "application/json"
             }
             self.project_id = project_id
+            if blob_cache is True:
+                from TrimblePy.common.blob_cache import BlobCache
+                blob_cache = BlobCache()
+            self.blob_cache = blob_cache or None
+            self.url_cache = DownloadUrlCache()
 
     def get_projects(self, fullyLoaded=True, minimal=False, sort='-lastVisited'):
         '''
@@ -27,19 +65,41 @@ class TrimbleFileApi:
         sort: Supported sorting fields are "name", "size", "lastVisited", "modified", "updatedOn". Prefix with "+" for ascending and "-" for descending sort order. Default is "-lastVisited"
         '''
         url = f'{self.BASE_URL}projects?fullyLoaded={fullyLoaded}&minimal={minimal}&sort={sort}'
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
         return response.json()
         
         
 
     def get_file_snapshot(self):
         url = f'{self.BASE_URL}files/fs/snapshot?projectId={self.project_id}&includeDeleted=false&includeAttachment=false&maxItems=100000'
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
         return response.json()
+
+    def stream_file_snapshot(self, sink=None, chunk_size=65536):
+        '''
+        Streams the snapshot items into sink as they are parsed from the response, without holding
+        the whole body or item list in memory.
+        sink: object with an append(item) method (e.g. a list or ColumnarSink) or a callable taking each item. Defaults to a ColumnarSink.
+        Returns the sink.
+        '''
+        from TrimblePy.common.streaming import ColumnarSink, iter_json_items
+        if sink is None:
+            sink = ColumnarSink(intern=SNAPSHOT_INTERNED_KEYS)
+        append = getattr(sink, 'append', sink)
+        url = f'{self.BASE_URL}files/fs/snapshot?projectId={self.project_id}&includeDeleted=false&includeAttachment=false&maxItems=100000'
+        response = self.transport.get(url, headers=self.headers, stream=True)
+        try:
+            response.raise_for_status()
+            for item in iter_json_items(response.iter_content(chunk_size)):
+                append(item)
+        finally:
+            response.close()
+        return sink
     
     def build_index(self, dfs):
-        id_to_parent = dfs.set_index('id')['parentId'].to_dict()
-        id_to_name = dfs.set_index('id')['name'].to_dict()
+        ids = dfs['id'].tolist()
+        id_to_parent = dict(zip(ids, dfs['parentId'].tolist()))
+        id_to_name = dict(zip(ids, dfs['name'].tolist()))
         return id_to_parent, id_to_name
 
     def get_full_path(self, row, id_to_parent, id_to_name):
@@ -50,118 +110,360 @@ class TrimbleFileApi:
             parentId = id_to_parent.get(parentId)
         return '/'.join(path)
 
-    def download(self, id):
-        file_download_url = f"{self.BASE_URL}files/fs/{id}/downloadurl"
-        res = requests.get(file_download_url, headers=self.headers)
-        file = requests.get(res.json()['url'],headers=self.headers)
-        return file.content
-    
-    def download_url(self, id):
+    def resolve_paths(self, ids, id_to_parent, id_to_name):
+        '''
+        Returns {id: path} for every id, where path joins the names from the top of the tree down to and
+        including the item itself - the full_path of the items inside it. Each ancestor is resolved once
+        and reused by everything below it.
+        '''
+        paths = {}
+        for start in ids:
+            if start in paths:
+                continue
+            chain = []
+            seen = set()
+            node = start
+            while node and node not in paths and node not in seen:
+                chain.append(node)
+                seen.add(node)
+                node = id_to_parent.get(node)
+            # a parent link that loops back is cut where it closes
+            prefix = paths.get(node) if node and node not in seen else None
+            for node in reversed(chain):
+                name = id_to_name.get(node, '')
+                prefix = paths[node] = name if prefix is None else f'{prefix}/{name}'
+        return paths
+
+    def build_folder_paths(self, dfs):
+        '''
+        Builds the folder path table of a snapshot DataFrame (renamed columns, as in get_files): one row per
+        folder indexed by id, with its name, parentId, path (including its own name) and depth.
+        '''
+        folders = dfs.loc[dfs['fileType'] == 'FOLDER', ['id', 'name', 'parentId']].set_index('id')
+        id_to_parent, id_to_name = self.build_index(dfs)
+        paths = self.resolve_paths(folders.index, id_to_parent, id_to_name)
+        folders['path'] = folders.index.map(paths.get)
+        folders['depth'] = folders['path'].str.count('/')
+        return folders
+
+    def get_folder_paths(self):
+        '''
+        Returns the project's folder path table (see build_folder_paths), e.g. for folder-scoped queries:
+            folders = file_api.get_folder_paths()
+            model_folders = folders[folders['path'].str.startswith('Project/Models')].index
+        '''
+        import pandas as pd
+        dfs = pd.json_normalize(self.get_file_snapshot()['items'])
+        dfs.rename(columns=SNAPSHOT_COLUMNS, inplace=True)
+        return self.build_folder_paths(dfs)
+
+    def download(self, id, version_id=None, md5=None):
+        '''
+        Returns the content of a file as bytes.
+        version_id / md5: The version to download (e.g. from the snapshot). Defaults to the latest version. With a
+        blob_cache, passing them lets a cached version be returned without any request.
+        '''
+        if self.blob_cache is None:
+            res = self.transport.get(self.download_url(id, version_id), headers=self.headers)
+            return res.content
+        with open(self.cached_path(id, version_id, md5), 'rb') as f:
+            return f.read()
+
+    def download_url(self, id, version_id=None, refresh=False):
+        '''
+        Returns the signed download url of a file. Urls are reused until shortly before they expire (see url_cache).
+        refresh: Resolve a new url even if one is cached, e.g. after the server rejected it.
+        '''
+        if not refresh:
+            url = self.url_cache.get(id, version_id)
+            if url is not None:
+                return url
         file_download_url = f"{self.BASE_URL}files/fs/{id}/downloadurl"
-        res = requests.get(file_download_url, headers=self.headers)
-        return res.json()['url']
+        if version_id:
+            file_download_url += f"?versionId={version_id}"
+        res = self.transport.get(file_download_url, headers=self.headers)
+        url = res.json()['url']
+        self.url_cache.put(id, version_id, url)
+        return url
+
+    def download_urls(self, ids, version_ids=None, workers=16):
+        '''
+        Resolves the signed download urls of many files concurrently (at most workers requests at a time).
+        ids: File ids - a list, or a pandas Series (e.g. folder_df.id).
+        version_ids: Matching versionIds to resolve specific versions. Defaults to the latest versions.
+        Returns {id: url}, or a Series aligned with ids if ids is a Series, so it can be assigned as a column:
+            folder_df['dl_url'] = file_api.download_urls(folder_df.id)
+        Files that can't be resolved (deleted, no access) get None.
+        '''
+        from concurrent.futures import ThreadPoolExecutor
+        keys = list(ids)
+        versions = list(version_ids) if version_ids is not None else [None] * len(keys)
+
+        def resolve(key):
+            try:
+                return self.download_url(*key)
+            except (KeyError, ValueError, OSError):
+                # no url in the answer (deleted file, no access) or the request failed
+                return None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            urls = list(pool.map(resolve, zip(keys, versions)))
+        failed = sum(url is None for url in urls)
+        if failed:
+            print(f"Could not resolve download urls for {failed} of {len(urls)} files")
+        if hasattr(ids, 'index') and hasattr(ids, 'to_numpy'):
+            import pandas as pd
+            return pd.Series(urls, index=ids.index, name='download_url', dtype=object)
+        return dict(zip(keys, urls))
+
+    def cached_path(self, id, version_id=None, md5=None):
+        '''
+        Returns the path of a file version in the blob_cache, downloading it (streamed to disk) if it isn't cached yet.
+        Without version_id and md5 the latest version is looked up first.
+        '''
+        if version_id is None and md5 is None:
+            response = self.transport.get(f"{self.BASE_URL}files/{id}", headers=self.headers)
+            response.raise_for_status()
+            data = response.json()
+            version_id, md5 = data.get('versionId'), data.get('hash')
+        path = self.blob_cache.path(version_id, md5)
+        if path is None:
+            response = self.transport.get(self.download_url(id, version_id), headers=self.headers, stream=True)
+            try:
+                response.raise_for_status()
+                path = self.blob_cache.put_stream(response.iter_content(1024 * 1024), version_id, md5)
+            finally:
+                response.close()
+        return path
+
+    def download_to_file(self, id, path=None, version_id=None, md5=None, chunk_size=1024 * 1024):
+        '''
+        Streams a file to disk in chunks - it's never held in memory - and returns the path.
+        path: Where to save it. Defaults to the blob_cache (read-only) if there is one, otherwise a new temporary file to delete when done.
+        md5: Checked against the downloaded content when given.
+        '''
+        from TrimblePy.connect.downloads import save_chunks
+        if self.blob_cache is not None:
+            cached = self.cached_path(id, version_id, md5)
+            if path is None:
+                return cached
+            import shutil
+            shutil.copyfile(cached, path)
+            return path
+        if path is None:
+            import os
+            import tempfile
+            fd, path = tempfile.mkstemp(prefix='trimblepy-')
+            os.close(fd)
+        response = self.transport.get(self.download_url(id, version_id), headers=self.headers, stream=True)
+        try:
+            response.raise_for_status()
+            save_chunks(response.iter_content(chunk_size), path, md5)
+        finally:
+            response.close()
+        return path
+
+    def open_mapped(self, id, version_id=None, md5=None):
+        '''
+        Downloads a file to disk and returns it as a read-only MappedFile (a memory map), so large models can be
+        scanned or parsed without copies in memory. Close it when done - a temporary download is deleted then.
+            with file_api.open_mapped(id) as mapped:
+                walls = len(re.findall(rb'IFCWALL\(', mapped.map))
+        '''
+        from TrimblePy.connect.downloads import MappedFile
+        return MappedFile(self.download_to_file(id, version_id=version_id, md5=md5), delete=self.blob_cache is None)
+
+    def _parse_file(self, parse, id, version_id, md5):
+        # the parser reads the file from disk itself, so the content is never held as bytes / str / StringIO
+        path = self.download_to_file(id, version_id=version_id, md5=md5)
+        try:
+            return parse(path)
+        finally:
+            if self.blob_cache is None:
+                import os
+                os.remove(path)
+
+    def read_csv(self, id, version_id=None, md5=None, **kwargs):
+        '''
+        Downloads a CSV file into a DataFrame, parsed straight from disk (through the blob_cache if there is one). kwargs go to pandas.read_csv.
+        '''
+        import pandas as pd
+        return self._parse_file(lambda path: pd.read_csv(path, **kwargs), id, version_id, md5)
+
+    def read_excel(self, id, version_id=None, md5=None, **kwargs):
+        '''
+        Downloads an Excel file into a DataFrame, parsed straight from disk (through the blob_cache if there is one). kwargs go to pandas.read_excel.
+        '''
+        import pandas as pd
+        return self._parse_file(lambda path: pd.read_excel(path, **kwargs), id, version_id, md5)
+
+    def read_xml(self, id, version_id=None, md5=None, **kwargs):
+        '''
+        Downloads an XML file into a DataFrame, parsed straight from disk (through the blob_cache if there is one).
+        The encoding (e.g. UTF-16) is taken from the file. kwargs go to pandas.read_xml.
+        '''
+        import pandas as pd
+        return self._parse_file(lambda path: pd.read_xml(path, **kwargs), id, version_id, md5)
+
+    def read_xml_tree(self, id, version_id=None, md5=None):
+        '''
+        Downloads an XML file and parses it from disk into an element tree - lxml's if it is installed, otherwise
+        the standard library's. The encoding (e.g. UTF-16) is taken from the file.
+        '''
+        try:
+            import lxml.etree as ET
+        except ImportError:
+            import xml.etree.ElementTree as ET
+        return self._parse_file(ET.parse, id, version_id, md5)
+
+    def download_files(self, files, directory, keep_paths=True, workers=8, verify=True, progress=True):
+        '''
+        Downloads files to disk in parallel, streaming each one in chunks (big files in parallel Range
+        segments), resuming partial downloads and checking every file's md5 against the snapshot.
+        files: FileTable, {id: TrimbleFile} dictionary, or iterable of TrimbleFile objects or file ids.
+        keep_paths: Recreate the project's folder structure under directory.
+        Returns one result dictionary per file - see Downloader.download.
+        '''
+        from TrimblePy.connect.downloads import Downloader
+        downloader = Downloader(self, workers=workers, verify=verify, progress=progress)
+        return downloader.download(files, directory, keep_paths=keep_paths)
+
+    def get_file_records(self):
+        '''
+        Returns every snapshot item (files and folders) decoded straight into TrimbleFile objects, without full_path / parent_folder.
+        '''
+        url = f'{self.BASE_URL}files/fs/snapshot?projectId={self.project_id}&includeDeleted=false&includeAttachment=false&maxItems=100000'
+        response = self.transport.get(url, headers=self.headers)
+        response.raise_for_status()
+        return decode_records(response.content, SNAPSHOT_FIELDS, _snapshot_record, key='items')
 
-    def get_files(self):
+    def get_files(self, stream=False, typed=False):
+        '''
+        stream: Parse the snapshot incrementally into columns instead of loading the whole response - lowers peak memory on large projects.
+        typed: Decode the snapshot straight into TrimbleFile objects, skipping the DataFrame. Missing values are None instead of NaN.
+        '''
         print("Getting File Snapshot From Trimble...")
+        if typed:
+            return self._files_from_records(self.get_file_records())
+        if stream:
+            return self._files_from_frame(self.stream_file_snapshot().to_frame())
         fs = self.get_file_snapshot()
-        dfs = pd.json_normalize(fs['items'])
-        dfs.rename(columns={
-            "id": "id",
-            "vid": "versionId",
-            "nm": "name",
-            "pid": "parentId",
-            "ptp": "parentType",
-            "tp": "fileType",
-            "ct": "createdTime",
-            "mt": "modifiedTime",
-            "cid": "createdBy",
-            "mid": "modifiedBy",
-            "sz": "size",
-            "del": "deleted",
-            "md5": "md5",
-            "rv": "revision",
-            "chid": "checkoutBy",
-            "cht": "checkoutTime",
-            "tn": "thumbnail"
-        }, inplace=True)
+        return self._files_from_snapshot(fs)
 
-        files_df = dfs[dfs['fileType'] == 'FILE'].copy()
-        print("Creating Full Path For Files...")
-        id_to_parent, id_to_name = self.build_index(dfs)
+    def _files_from_snapshot(self, fs):
+        import pandas as pd
+        return self._files_from_frame(pd.json_normalize(fs['items']))
 
-        trimble_files = {}
-        for _, file_data in files_df.iterrows():
-            file_dict = file_data.to_dict()
+    def get_file_table(self, stream=False):
+        '''
+        Returns the project's files as a FileTable - the same data as get_files, stored as columns.
+        stream: Parse the snapshot incrementally (see get_files).
+        '''
+        from TrimblePy.connect.file_table import FileTable
+        print("Getting File Snapshot From Trimble...")
+        if stream:
+            dfs = self.stream_file_snapshot().to_frame()
+        else:
+            import pandas as pd
+            dfs = pd.json_normalize(self.get_file_snapshot()['items'])
+        table = FileTable(self._file_frame(dfs))
+        print("Done!")
+        return table
 
-            file_dict['full_path'] = self.get_full_path(file_dict, id_to_parent, id_to_name)
-            file_dict['parent_folder'] = id_to_name.get(file_dict['parentId'])
-            file_dict['deleted'] = file_dict.get('deleted', None)
+    def sync_files(self, path=None, full=False):
+        '''
+        Returns the project's files as a FileTable kept up to date incrementally from the activities feed
+        in a local store (see FileSync). The first call takes a full snapshot.
+        path: SQLite file of the store. Defaults to ~/.trimblepy/sync/<project_id>.db
+        full: Take a full snapshot even if an incremental update is possible.
+        '''
+        from TrimblePy.connect.file_sync import FileSync
+        return FileSync(self, path=path).sync(full=full)
+
+    def _files_from_frame(self, dfs):
+        files_df = self._file_frame(dfs)
 
-            trimble_file = TrimbleFile(**file_dict)
+        trimble_files = {}
+        columns = list(files_df.columns)
+        for values in zip(*(files_df[column].tolist() for column in columns)):
+            trimble_file = TrimbleFile(**dict(zip(columns, values)))
             trimble_files[trimble_file.id] = trimble_file  # Store in dictionary with id as key
 
         print("Done!")
         return trimble_files
 
+    def _file_frame(self, dfs):
+        '''
+        Renames the snapshot columns and returns the files with their full_path and parent_folder.
+        '''
+        dfs.rename(columns=SNAPSHOT_COLUMNS, inplace=True)
+
+        files_df = dfs[dfs['fileType'] == 'FILE'].copy()
+        print("Creating Full Path For Files...")
+        id_to_parent, id_to_name = self.build_index(dfs)
+        # every folder path is built once and joined to the files by parentId
+        paths = self.resolve_paths(files_df['parentId'].unique(), id_to_parent, id_to_name)
+        files_df['full_path'] = files_df['parentId'].map(lambda parentId: paths.get(parentId, ''))
+        files_df['parent_folder'] = files_df['parentId'].map(id_to_name.get)
+        if 'deleted' not in files_df:
+            files_df['deleted'] = None
+        return files_df
+
+    def _files_from_records(self, records):
+        print("Creating Full Path For Files...")
+        id_to_parent = {record.id: record.parentId for record in records}
+        id_to_name = {record.id: record.name for record in records}
+        paths = self.resolve_paths([record.parentId for record in records if record.fileType == 'FILE'], id_to_parent, id_to_name)
+        trimble_files = {}
+        for record in records:
+            if record.fileType == 'FILE':
+                record.full_path = paths.get(record.parentId, '')
+                record.parent_folder = id_to_name.get(record.parentId)
+                trimble_files[record.id] = record
+        print("Done!")
+        return trimble_files
+
     def safe_request(self, url, max_retries=3):
-        for i in range(max_retries):
-            try:
-                response = requests.get(url, headers=self.headers)
-                response.raise_for_status()
-                return response
-            except requests.RequestException as e:
-                if i < max_retries - 1:
-                    time.sleep(1)
-                    continue
-                else:
-                    raise e
+        '''
+        GET with the transport's backoff (honouring Retry-After), raising if the last attempt still failed.
+        '''
+        response = self.transport.get(url, headers=self.headers, retry=RetryPolicy(max_attempts=max_retries))
+        response.raise_for_status()
+        return response
+
+    def iter_activities(self, checkpoint=None, inspected=None, max_pages=None, prefetch=True):
+        '''
+        Yields the activities page by page (newest first) in constant memory, fetching the next page in the background
+        while the current one is processed.
+        checkpoint: json file recording the last page processed - a restarted export continues after it.
+        inspected: Set of activity ids already seen - stops after the page that reaches one.
+        See activities.iter_activity_pages.
+            for page in file_api.iter_activities(checkpoint='activities.checkpoint'):
+                writer.writerows(page)
+        '''
+        from TrimblePy.connect.activities import iter_activity_pages
+        return iter_activity_pages(self, checkpoint=checkpoint, inspected=inspected, max_pages=max_pages, prefetch=prefetch)
 
     def get_activities(self, inspected=None, max_depth=10000):
-        if inspected is None:
-            inspected_set = set()
-        else:
-            inspected_set = set(inspected) 
-        url = f'{self.BASE_URL}activities?projectId={self.project_id}'
-        response = self.safe_request(url)
         data_objects = []
-        data = response.json()
-        data_objects.extend(data)
-        depth = 0
-        while depth < max_depth:
+        for depth, page in enumerate(self.iter_activities(inspected=inspected, max_pages=max_depth + 1)):
             print(f"Getting page {depth} of activities...")
-            lastId = data[-1]['id']
-            if lastId in inspected_set:
-                break
-            url = f'{self.BASE_URL}activities?projectId={self.project_id}&lastId={lastId}'
-            response = self.safe_request(url)
-            data = response.json()
-            if not data:
-                break
-            data_objects.extend(data)
-            if data:
-                depth += 1
+            data_objects.extend(page)
         return data_objects
     
     def get_views(self):
         url = f'{self.BASE_URL}views?projectId={self.project_id}'
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers, cache=True)
         return response.json()
 
     # /projects/{projectId}/users
-    def get_project_users(self):
-        response = requests.get(
-            f"{self.BASE_URL}projects/{self.project_id}/users",
-            headers=self.headers,
-        )
-        data = response.json()
-        while response.headers.get("next"):
-            response = requests.get(
-                response.headers.get("next"),
-                headers=self.headers,
-            )
-            data = data + response.json()
-            print(len(data))
-        return data
+    def get_project_users(self, limit=None, stop=None):
+        '''
+        limit: Maximum number of users to return.
+        stop: Called with each user; the listing ends at the first user it returns True for.
+        '''
+        get = lambda url: self.transport.get(url, headers=self.headers, cache=True)
+        return collect(get, f"{self.BASE_URL}projects/{self.project_id}/users", limit=limit, stop=stop)
     
     def add_tag(self,tag):
         headers = self.headers | {"Content-Type": "application/json"}
@@ -169,7 +471,7 @@ class TrimbleFileApi:
             "label": tag,
             "projectId": self.project_id,
         }
-        response = requests.post(
+        response = self.transport.post(
             f"{self.BASE_URL}tags",
             headers=headers,
             json=tag_object,
@@ -178,22 +480,22 @@ class TrimbleFileApi:
     
     def get_tags(self):
         url = f'{self.BASE_URL}tags?projectId={self.project_id}&includeDeletedObjects=false'
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers, cache=True)
         return response.json()
     
     def get_tag(self,tag_id):
         url = f'{self.BASE_URL}tags/{tag_id}'
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
         return response.json()
     
     def get_tagged_objects(self,tag_id):
         url = f'{self.BASE_URL}tags/{tag_id}/objects'
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
         return response.json()
     
     def delete_tags(self,tag_id):
         url = f'{self.BASE_URL}tags/{tag_id}'
-        response = requests.delete(url, headers=self.headers)
+        response = self.transport.delete(url, headers=self.headers)
         return response
     
     def add_objects_to_tag(self,tag_id,object_list):
@@ -213,7 +515,7 @@ class TrimbleFileApi:
         '''
         headers = self.headers | {"Content-Type": "application/json"}
         tag_object = object_list
-        response = requests.post(
+        response = self.transport.post(
             f"{self.BASE_URL}tags/{tag_id}/objects",
             headers=headers,
             json=tag_object,
@@ -222,7 +524,7 @@ class TrimbleFileApi:
 
     def get_clashsets(self):
         url = f'{self.BASE_URL}clashsets?projectId={self.project_id}'
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers, cache=True)
         return response.json()
 
     def get_clash_details(self,clashsetId):
@@ -230,7 +532,7 @@ class TrimbleFileApi:
         clashsetId: id of clashset
         '''
         url = f'{self.BASE_URL}clashsets/{clashsetId}/items'
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
         return response.json()
     
     def delete_clash(self, clashsetId):
@@ -239,10 +541,9 @@ class TrimbleFileApi:
         '''
         headers = {
             'accept': '*/*',
-            'Authorization' : f'Bearer {self.authentication.access_token}',
         }
         url = f'{self.BASE_URL}clashsets/{clashsetId}'
-        response = requests.delete(url, headers=headers)
+        response = self.transport.delete(url, headers=headers)
         if response.content:
             return response.json()
         else:
@@ -266,7 +567,7 @@ class TrimbleFileApi:
             "models" : models
         }
         url = '{self.BASE_URL}clashsets'
-        response = requests.post(url, headers=headers, json=data)
+        response = self.transport.post(url, headers=headers, json=data)
         return response.json()
     
     def list_all_clash_items(self, clashsetId):
@@ -275,27 +576,36 @@ class TrimbleFileApi:
         '''
         headers = self.headers
         url = f'{self.BASE_URL}clashsets/{clashsetId}/items'
-        response = requests.get(url, headers=headers)
+        response = self.transport.get(url, headers=headers)
         return response.json()
     
     def get_todos(self):
         headers = self.headers
         url = f"{self.BASE_URL}todos?projectId={self.project_id}"
-        response = requests.get(url,headers=headers)
+        response = self.transport.get(url,headers=headers, cache=True)
         return response.json()
 
     def get_todo_attachments(self,todoId):
         headers = self.headers
         url = f"{self.BASE_URL}todos/{todoId}/attachments"
-        response = requests.get(url,headers=headers)
+        response = self.transport.get(url,headers=headers)
         return response.json()
     
     def get_2d_view(self,view_id):
         url = f"{self.BASE_URL}views2d/{view_id}"
-        response = requests.get(url,headers=self.headers)
+        response = self.transport.get(url,headers=self.headers)
         return response.json()
 
+def _snapshot_record(*values):
+    return TrimbleFile(*values[:-1], deleted=values[-1])
+
+
 class TrimbleFile:
+    __slots__ = (
+        'id', 'versionId', 'name', 'parentId', 'parentType', 'fileType', 'createdTime', 'modifiedTime', 'createdBy',
+        'modifiedBy', 'size', 'md5', 'revision', 'thumbnail', 'checkoutBy', 'checkoutTime', 'full_path', 'parent_folder', 'deleted',
+    )
+
     def __init__(self, id, versionId, name, parentId, parentType, fileType, createdTime, modifiedTime, createdBy, modifiedBy, size, md5, revision, thumbnail,checkoutBy=None,checkoutTime=None, full_path=None, parent_folder=None, deleted=None):
         self.id = id
         self.versionId = versionId
@@ -317,6 +627,9 @@ class TrimbleFile:
         self.full_path = full_path
         self.parent_folder = parent_folder
 
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
     def __repr__(self):
         return f"<TrimbleFile {self.name} at {self.full_path}>"
 
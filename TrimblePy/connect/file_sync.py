@@ -0,0 +1,291 @@
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from TrimblePy.common.locks import ProcessLock, default_cache_dir
+
+# snapshot fields stored per item - the same short names the snapshot uses
+ITEM_FIELDS = ('id', 'vid', 'nm', 'pid', 'ptp', 'tp', 'ct', 'mt', 'cid', 'mid', 'sz', 'del', 'md5', 'rv', 'chid', 'cht', 'tn')
+
+# activity object types whose changes are applied to the file tree
+SYNCED_TYPES = frozenset(['FILE', 'FOLDER'])
+
+
+class DriftDetected(Exception):
+    '''
+    The stored tree can't be brought up to date from the activities feed - a full snapshot is needed.
+    '''
+
+
+class FileSync:
+    '''
+    Keeps a local copy of a project's file tree up to date from the activities feed.
+
+    The last snapshot and the id of the newest activity applied to it (the high-water mark) are
+    stored in a SQLite file. sync() reads only the activities newer than the mark and refetches
+    the files and folders they touched (created, moved, renamed, deleted or given a new version),
+    so a refresh costs as much as the change volume instead of the project size. A full snapshot
+    is taken instead when there is no stored tree yet, the mark has dropped out of the feed, more
+    than max_changes objects were touched, the tree no longer hangs together after the changes
+    (an item whose parent folder is unknown), or the last full snapshot is older than max_age.
+
+    Several processes can sync the same store - one at a time.
+
+    Usage:
+        sync = FileSync(file_api)
+        files = sync.sync()              # FileTable, full snapshot on the first run
+        ...
+        files = sync.sync()              # only what changed since
+    '''
+
+    def __init__(self, file_api, path=None, max_changes=2000, max_age=None, max_pages=100, workers=8):
+        """
+        Args:
+            file_api (TrimbleFileApi): Client for the project to sync (project_id must be set).
+            path (str, optional): SQLite file of the store. Defaults to ~/.trimblepy/sync/<project_id>.db.
+            max_changes (int, optional): Touched objects above which a full snapshot is cheaper. Defaults to 2000.
+            max_age (float, optional): Seconds after which a full snapshot is taken regardless. Defaults to never.
+            max_pages (int, optional): Activity pages read before giving up on finding the mark. Defaults to 100.
+            workers (int, optional): Concurrent requests when refetching touched objects. Defaults to 8.
+        """
+        self.file_api = file_api
+        self.path = path or os.path.join(default_cache_dir('sync'), f'{file_api.project_id}.db')
+        self.max_changes = max_changes
+        self.max_age = max_age
+        self.max_pages = max_pages
+        self.workers = workers
+        self.last_sync = None
+        self._lock = ProcessLock(self.path + '.lock')
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        columns = ', '.join(f'"{field}"' for field in ITEM_FIELDS[1:])
+        connection.execute(f'CREATE TABLE IF NOT EXISTS items (id TEXT PRIMARY KEY, {columns})')
+        connection.execute('CREATE INDEX IF NOT EXISTS items_parent ON items (pid)')
+        connection.execute('CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)')
+        return connection
+
+    @staticmethod
+    def _state(connection, key):
+        row = connection.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_state(connection, **values):
+        connection.executemany('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)', [(k, str(v)) for k, v in values.items()])
+
+    @staticmethod
+    def _upsert(connection, items):
+        placeholders = ', '.join('?' * len(ITEM_FIELDS))
+        columns = ', '.join(f'"{field}"' for field in ITEM_FIELDS)
+        connection.executemany(
+            f'INSERT OR REPLACE INTO items ({columns}) VALUES ({placeholders})',
+            [tuple(item.get(field) for field in ITEM_FIELDS) for item in items],
+        )
+
+    # -----------------------------------------------------------------
+    # ACTIVITIES
+    # -----------------------------------------------------------------
+
+    def _activities_since(self, mark):
+        '''
+        Returns the activities newer than mark, newest first. Raises DriftDetected if the mark isn't
+        found within max_pages pages.
+        '''
+        base = f'{self.file_api.BASE_URL}activities?projectId={self.file_api.project_id}'
+        url = base
+        activities = []
+        for _ in range(self.max_pages):
+            page = self.file_api.safe_request(url).json()
+            for activity in page:
+                if str(activity.get('id')) == mark:
+                    return activities
+                activities.append(activity)
+            if not page:
+                # an empty mark means the feed was empty at the last sync
+                if mark == '':
+                    return activities
+                break
+            url = f"{base}&lastId={page[-1]['id']}"
+        raise DriftDetected(f'activity {mark} is no longer in the feed')
+
+    def _newest_activity(self):
+        url = f'{self.file_api.BASE_URL}activities?projectId={self.file_api.project_id}'
+        page = self.file_api.safe_request(url).json()
+        return str(page[0]['id']) if page else ''
+
+    @staticmethod
+    def touched_objects(activities):
+        '''
+        Returns {object id: type} for the files and folders the activities refer to.
+        '''
+        touched = {}
+        for activity in activities:
+            obj = (activity.get('details') or {}).get('object') or {}
+            if obj.get('id') and obj.get('type') in SYNCED_TYPES:
+                touched[obj['id']] = obj['type']
+        return touched
+
+    def _fetch(self, object_id, object_type):
+        '''
+        Returns the current snapshot item of a file or folder, or None if it no longer exists or is
+        flagged deleted (the full snapshot leaves deleted items out).
+        '''
+        kind = 'files' if object_type == 'FILE' else 'folders'
+        response = self.file_api.transport.get(f'{self.file_api.BASE_URL}{kind}/{object_id}', headers=self.file_api.headers)
+        if response.status_code in (403, 404):
+            return None
+        response.raise_for_status()
+        item = snapshot_item(response.json())
+        return None if item['del'] else item
+
+    # -----------------------------------------------------------------
+    # SYNC
+    # -----------------------------------------------------------------
+
+    def sync(self, full=False):
+        """
+        Brings the store up to date and returns the file tree.
+
+        Args:
+            full (bool, optional): Take a full snapshot even if an incremental update is possible. Defaults to False.
+
+        Returns:
+            FileTable: The project's files. self.last_sync describes what was done.
+        """
+        started = time.monotonic()
+        with self._lock:
+            connection = self._connect()
+            try:
+                mode, changes = 'incremental', 0
+                try:
+                    if full:
+                        raise DriftDetected('full sync requested')
+                    changes = self._incremental(connection)
+                except DriftDetected as reason:
+                    print(f"Full file snapshot: {reason}")
+                    mode, changes = 'full', self._full(connection)
+                table = self._table(connection)
+            finally:
+                connection.close()
+        self.last_sync = {'mode': mode, 'changes': changes, 'seconds': time.monotonic() - started}
+        return table
+
+    def _full(self, connection):
+        # the mark is read before the snapshot, so changes made while it downloads are replayed next time
+        mark = self._newest_activity()
+        items = self.file_api.get_file_snapshot()['items']
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute('DELETE FROM items')
+            self._upsert(connection, items)
+            self._set_state(connection, mark=mark, full_synced_at=time.time(), synced_at=time.time())
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return len(items)
+
+    def _incremental(self, connection):
+        mark = self._state(connection, 'mark')
+        if mark is None:
+            raise DriftDetected('no stored snapshot')
+        full_synced_at = float(self._state(connection, 'full_synced_at') or 0)
+        if self.max_age is not None and time.time() - full_synced_at > self.max_age:
+            raise DriftDetected('stored snapshot is older than max_age')
+        activities = self._activities_since(mark)
+        if not activities:
+            self._set_state(connection, synced_at=time.time())
+            return 0
+        touched = self.touched_objects(activities)
+        if len(touched) > self.max_changes:
+            raise DriftDetected(f'{len(touched)} changed objects')
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            items = list(pool.map(lambda args: (args[0], args[1], self._fetch(*args)), touched.items()))
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._upsert(connection, [item for _, _, item in items if item is not None])
+            for object_id, object_type, item in items:
+                if item is None:
+                    self._delete(connection, object_id)
+            orphans = connection.execute(
+                "SELECT COUNT(*) FROM items WHERE ptp = 'FOLDER' AND pid NOT IN (SELECT id FROM items WHERE tp = 'FOLDER')"
+            ).fetchone()[0]
+            if orphans:
+                raise DriftDetected(f'{orphans} items in unknown folders')
+            self._set_state(connection, mark=str(activities[0]['id']), synced_at=time.time())
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return len(touched)
+
+    @staticmethod
+    def _delete(connection, object_id):
+        # deleting a folder removes everything below it
+        connection.execute(
+            'WITH RECURSIVE tree(id) AS (SELECT ? UNION SELECT items.id FROM items JOIN tree ON items.pid = tree.id) '
+            'DELETE FROM items WHERE id IN tree',
+            (object_id,),
+        )
+
+    def _table(self, connection):
+        import pandas as pd
+        from TrimblePy.connect.file_table import FileTable
+        dfs = pd.read_sql_query('SELECT * FROM items', connection)
+        dfs['del'] = dfs['del'].map({0: False, 1: True})
+        return FileTable(self.file_api._file_frame(dfs))
+
+    def table(self):
+        '''
+        Returns the stored file tree without contacting the server.
+        '''
+        connection = self._connect()
+        try:
+            return self._table(connection)
+        finally:
+            connection.close()
+
+    def status(self):
+        '''
+        Returns the stored high-water mark, item count and sync times.
+        '''
+        connection = self._connect()
+        try:
+            return {
+                'mark': self._state(connection, 'mark'),
+                'items': connection.execute('SELECT COUNT(*) FROM items').fetchone()[0],
+                'synced_at': float(self._state(connection, 'synced_at') or 0) or None,
+                'full_synced_at': float(self._state(connection, 'full_synced_at') or 0) or None,
+            }
+        finally:
+            connection.close()
+
+
+def snapshot_item(data):
+    '''
+    Converts a files/{id} or folders/{id} response to the short form of a snapshot item.
+    '''
+    thumbnail = data.get('thumbnailUrl')
+    return {
+        'id': data.get('id'),
+        'vid': data.get('versionId') or data.get('id'),
+        'nm': data.get('name'),
+        'pid': data.get('parentId'),
+        'ptp': data.get('parentType'),
+        'tp': data.get('type'),
+        'ct': data.get('createdOn'),
+        'mt': data.get('modifiedOn'),
+        'cid': (data.get('createdBy') or {}).get('id'),
+        'mid': (data.get('modifiedBy') or {}).get('id'),
+        'sz': data.get('size'),
+        'del': bool(data.get('deleted', False)),
+        'md5': data.get('hash'),
+        'rv': data.get('revision'),
+        'chid': (data.get('checkedOutBy') or {}).get('id'),
+        'cht': data.get('checkedOutOn'),
+        'tn': thumbnail[0] if isinstance(thumbnail, list) and thumbnail else thumbnail,
+    }
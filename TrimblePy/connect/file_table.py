@@ -0,0 +1,139 @@
+from TrimblePy.connect.file_api import TrimbleFile
+
+# columns holding a handful of distinct values (parent folders, users, types, paths) - stored as
+# pandas categoricals, i.e. one small integer code per row plus each distinct value once
+CATEGORICAL_COLUMNS = ('parentId', 'parentType', 'fileType', 'createdBy', 'modifiedBy', 'checkoutBy', 'full_path', 'parent_folder')
+
+
+class FileTable:
+    '''
+    Columnar table of project files, returned by TrimbleFileApi.get_file_table.
+
+    The files live in a single DataFrame with one column per TrimbleFile attribute (ids of parents
+    and users are dictionary encoded), instead of one Python object per file. It behaves like the
+    {id: TrimbleFile} dictionary get_files returns - TrimbleFile objects are built on access - and
+    looks files up by id or versionId through hash indexes built on first use.
+
+    Usage:
+        files = file_api.get_file_table()
+        file_df = files.to_frame()               # no copy of the data
+        f = files['fileId']                      # TrimbleFile
+        f = files.by_version('versionId')
+        ifcs = files.filter(files.frame['name'].str.endswith('.ifc'))
+    '''
+
+    def __init__(self, frame):
+        """
+        Args:
+            frame (pandas.DataFrame): One row per file with the TrimbleFile attributes as columns.
+        """
+        frame = frame.reset_index(drop=True)
+        for column in CATEGORICAL_COLUMNS:
+            if column in frame and frame[column].dtype != 'category':
+                frame[column] = frame[column].astype('category')
+        self.frame = frame
+        self._indexes = {}
+
+    @classmethod
+    def from_files(cls, files):
+        '''
+        Builds a table from an iterable (or {id: TrimbleFile} dictionary) of TrimbleFile objects.
+        '''
+        import pandas as pd
+        if isinstance(files, dict):
+            files = files.values()
+        return cls(pd.DataFrame([f.to_dict() for f in files], columns=list(TrimbleFile.__slots__)))
+
+    def __getstate__(self):
+        return {'frame': self.frame, '_indexes': {}}
+
+    def _index(self, column):
+        index = self._indexes.get(column)
+        if index is None:
+            import pandas as pd
+            index = self._indexes[column] = pd.Index(self.frame[column])
+        return index
+
+    def _position(self, column, value):
+        positions = self._index(column).get_indexer([value])
+        return positions[0]
+
+    def _view(self, position):
+        row = self.frame.iloc[position]
+        return TrimbleFile(**row.to_dict())
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __contains__(self, file_id):
+        return self._position('id', file_id) >= 0
+
+    def __iter__(self):
+        return iter(self.frame['id'].tolist())
+
+    def __getitem__(self, file_id):
+        position = self._position('id', file_id)
+        if position < 0:
+            raise KeyError(file_id)
+        return self._view(position)
+
+    def get(self, file_id, default=None):
+        position = self._position('id', file_id)
+        return self._view(position) if position >= 0 else default
+
+    def by_version(self, version_id, default=None):
+        '''
+        Returns the file with the given versionId as a TrimbleFile (default if there is none).
+        '''
+        position = self._position('versionId', version_id)
+        return self._view(position) if position >= 0 else default
+
+    def keys(self):
+        return self.frame['id'].tolist()
+
+    def values(self):
+        '''
+        Yields a TrimbleFile for every row.
+        '''
+        columns = list(self.frame.columns)
+        for values in zip(*(self.frame[column].tolist() for column in columns)):
+            yield TrimbleFile(**dict(zip(columns, values)))
+
+    def items(self):
+        for trimble_file in self.values():
+            yield trimble_file.id, trimble_file
+
+    def take(self, file_ids, column='id'):
+        '''
+        Returns a FileTable of the rows whose id (or other indexed column, e.g. 'versionId') is in
+        file_ids, in that order. Unknown ids are skipped.
+        '''
+        positions = self._index(column).get_indexer(list(file_ids))
+        return FileTable(self.frame.take(positions[positions >= 0]))
+
+    def filter(self, mask):
+        '''
+        Returns a FileTable of the rows selected by a boolean mask over the frame.
+        '''
+        return FileTable(self.frame[mask])
+
+    def to_frame(self):
+        '''
+        Returns the table as a DataFrame sharing the table's column data (no copy).
+        '''
+        return self.frame.copy(deep=False)
+
+    def to_dict(self):
+        '''
+        Returns {id: TrimbleFile} - the shape get_files returns.
+        '''
+        return dict(self.items())
+
+    def memory_usage(self):
+        '''
+        Returns the size of the table's data in bytes.
+        '''
+        return int(self.frame.memory_usage(index=True, deep=True).sum())
+
+    def __repr__(self):
+        return f"<FileTable {len(self)} files>"
@@ -1,10 +1,11 @@
-import requests
-import pandas as pd
 import copy
-from tqdm import tqdm
-import multiprocessing
-from multiprocessing import Pool
+from TrimblePy.common.codec import RecordSchema, decode_records
+from TrimblePy.common.retry import RetryPolicy
 
+# json fields of an entity, in the order the entity builder takes them
+ENTITY_FIELDS = RecordSchema('EntityRecord', [
+    ('id', None), ('idx', None), ('type', None), ('product', None), ('psets', []), ('layerIds', []),
+])
 
 
 class ModelApi:
@@ -12,23 +13,26 @@ class ModelApi:
     def __init__(self, authentication):
         self.authentication = authentication
         self.headers = {
-            "Authorization": f"Bearer {self.authentication.access_token}",
+            "Accept": "application/json",
         }
         self.BASE_URL = self.authentication.endpoints['model']
+        self.transport = self.authentication.get_transport()
 
     def get_model_layers(self, model_id):
         url = f"{self.BASE_URL}models/{model_id}/layers"
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
         return response.json()
 
+    def _entities_url(self, model_id, offset):
+        return f"{self.BASE_URL}models/{model_id}/entities?top=1000&offset={offset}&include=id,idx,psets,psets.name,product,layerIds"
+
     def get_model_entities(self, model_id, offset):
-        url = f"{self.BASE_URL}models/{model_id}/entities?top=1000&offset={offset}&include=id,idx,psets,psets.name,product,layerIds"
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(self._entities_url(model_id, offset), headers=self.headers)
         return response.json()
 
     def get_pset_defs(self, model_id):
         url = f"{self.BASE_URL}models/{model_id}/psetdefs"
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
         return response.json()
 
     def get_model_info(self, versionId):
@@ -36,18 +40,18 @@ class ModelApi:
         if not token:
             raise ValueError("No access token available.")
         url = f"{self.BASE_URL}models/{versionId}?include=metadata"
-        for attempt in range(5):
-            try:
-                response = requests.get(url, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                return response.json()
-            except Exception as err:
-                error_message = f"An error occurred for versionId {versionId}: {err}"
-                print(error_message)
-                if attempt == 4:
-                    return None
+        try:
+            response = self.transport.get(url, headers=self.headers, timeout=10, retry=RetryPolicy(max_attempts=5))
+            response.raise_for_status()
+            return response.json()
+        except Exception as err:
+            error_message = f"An error occurred for versionId {versionId}: {err}"
+            print(error_message)
+            return None
 
     def build_df_models(self, versionIds):
+        import pandas as pd
+        from tqdm import tqdm
         model_data = []
         for versionId in tqdm(versionIds):
             data = self.get_model_info(versionId)
@@ -58,7 +62,12 @@ class ModelApi:
         return df_models
 
     def construct_model(self, df_row):
-        model = Model(
+        model = self._model_from_row(df_row)
+        model.entities = self.get_entities(df_row.versionId, df_row.entityCount, model)
+        return model
+
+    def _model_from_row(self, df_row):
+        return Model(
             id=df_row.id,  # assuming 'id' is the model's unique ID
             versionId=df_row.versionId,
             name=df_row["name"],
@@ -87,12 +96,6 @@ class ModelApi:
             entityCount=df_row.entityCount,
             layerCount=df_row.layerCount,
         )
-        data_, psetData, layerData = self.get_entity_data(
-            df_row.versionId, df_row.entityCount
-        )
-        entities = self.construct_entities(data_, psetData, layerData, model)
-        model.entities = entities
-        return model
 
     @staticmethod
     def _construct_model_worker(args):
@@ -101,6 +104,8 @@ class ModelApi:
         return instance.construct_model(df_row)
   
     def construct_models(self, df_rows, n_workers=6):
+        import multiprocessing
+        from tqdm import tqdm
         # Convert df_rows to a list of tuples where each tuple is arguments for _construct_model_worker
         worker_args = [(self, df_row) for _, df_row in df_rows.iterrows()]
         
@@ -137,7 +142,32 @@ class ModelApi:
             layerData = self.get_model_layers(model_id)["items"]
         return data_, psetData, layerData
 
+    def get_entities(self, model_id, entity_count, model=None):
+        '''
+        Fetches the entities of a model and decodes every page straight into Entity objects (the
+        same ones construct_entities builds), without building the intermediate dictionaries.
+        '''
+        build = self._entity_builder(self.get_pset_defs(model_id)["items"], self.get_model_layers(model_id)["items"], model)
+        entities = []
+        for offset in range(0, max(int(entity_count), 1), 1000):
+            response = self.transport.get(self._entities_url(model_id, offset), headers=self.headers)
+            response.raise_for_status()
+            entities.extend(decode_records(response.content, ENTITY_FIELDS, build, key='items'))
+        return entities
+
     def construct_entities(self, entityData, psetData, layerData, model):
+        build = self._entity_builder(psetData, layerData, model)
+        return [
+            build(entity["id"], entity["idx"], entity["type"], entity["product"], entity["psets"], entity["layerIds"])
+            for entity in entityData
+        ]
+
+    @staticmethod
+    def _entity_builder(psetData, layerData, model):
+        '''
+        Returns a function building an Entity from the fields in ENTITY_FIELDS, resolving pset and
+        layer indexes to names with the model's definitions.
+        '''
         # Convert layer idx to layer name
         layer_idx_to_name = {layer["idx"]: layer["name"] for layer in layerData}
 
@@ -150,17 +180,10 @@ class ModelApi:
             for pset in psetData
         }
 
-        # Build entities with combined data
-        entities = []
-        for entity in entityData:
-            entity_id = entity["id"]
-            idx = entity["idx"]
-            ifc_type = entity["type"]
-            product = entity["product"]
-
+        def build(entity_id, idx, ifc_type, product, psets, layer_ids):
             # Assign psets (using a deep copy to avoid shared reference issues)
             entity_psets = copy.deepcopy(pset_idx_to_name)
-            for pset in entity["psets"]:
+            for pset in psets:
                 if pset["idx"] in entity_psets:
                     pset_name = entity_psets[pset["idx"]]["name"]
                     for prop_name, prop_value in zip(
@@ -177,7 +200,7 @@ class ModelApi:
             # Assign layer name
             layer_names = [
                 layer_idx_to_name[layer_id]
-                for layer_id in entity["layerIds"]
+                for layer_id in layer_ids
                 if layer_id in layer_idx_to_name
             ]
             layer = (
@@ -185,12 +208,11 @@ class ModelApi:
             )  # Assuming there is at most one layer per entity
 
             # Create Entity object
-            ent_obj = Entity(
+            return Entity(
                 entity_id, idx, ifc_type, product, simplified_psets, layer, model=model
             )
-            entities.append(ent_obj)
 
-        return entities
+        return build
 
     def entities_object(self, entity):
         entity_dict = {
@@ -204,6 +226,7 @@ class ModelApi:
         return entity_dict
 
     def entity_to_df(self, entity, include_product=False):
+        import pandas as pd
         # Initialize an empty list to hold pset records
         psets_records = []
         # Process psets
@@ -239,6 +262,7 @@ class ModelApi:
         return combined_df
     
     def entity_to_df_optimized(self, entities, include_product=False):
+        import pandas as pd
         # Initialize lists to hold entity and pset records
         entities_records = []
         psets_records = []
@@ -286,6 +310,8 @@ class ModelApi:
         return combined_df
 
     def process_entities_with_multiprocessing(self, entities, n_workers=6):
+        import multiprocessing
+        import pandas as pd
         # Now the process_entity_to_df will be working on the optimized version
         with multiprocessing.Pool(processes=n_workers) as pool:
             # imap_unordered can still be used here
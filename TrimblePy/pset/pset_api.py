@@ -1,24 +1,21 @@
-import requests
-import pandas as pd
-from tqdm import tqdm
-from multiprocessing import Pool
 from urllib.parse import quote
-import json
+
+from TrimblePy.common import codec
 
 class PsetApi:
 
     def __init__(self, authentication, project_id=None):
         self.authentication = authentication
         self.headers = {
-            "Authorization": f"Bearer {authentication.access_token}",
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
         self.BASE_URL = self.authentication.endpoints['pset']
+        self.transport = self.authentication.get_transport()
         self.project_id = project_id
 
     def get_lib_defs(self, lib_id):
-        response = requests.get(
+        response = self.transport.get(
             f"{self.BASE_URL}libs/{lib_id}/defs",
             headers=self.headers,
         )
@@ -57,7 +54,7 @@ class PsetApi:
         versionId is the tc id of the version
         '''
         notation = self.encoder(self.frn_notation(object_id, modelId, versionId))
-        response = requests.get(
+        response = self.transport.get(
             f"{self.BASE_URL}psets/{notation}",
             headers=self.headers,
         )
@@ -68,7 +65,6 @@ class PsetApi:
         
         if headers is None:
             headers = {
-                "Authorization": f"Bearer {self.authentication.access_token}",
                 "Content-Type": "application/json",
                 "Accept": "application/json",
             }
@@ -80,15 +76,16 @@ class PsetApi:
         if new == True:
             headers['If-None-Match'] = '*'
             
-        response = requests.patch(
+        response = self.transport.patch(
             f"{self.BASE_URL}psets/{notation}/{libId}/{defId}",
             headers=headers,
-            data=json.dumps(props),
+            data=codec.dumps(props),
         )
         return response.json()
 
 
     def prop_set_table(self,lib_defs):
+        import pandas as pd
         prop_nodes = lib_defs["items"][0]["schema"]["props"]
         props_names_and_keys = lib_defs["items"][0]["i18n"]["en-US"]["props"]
         df = pd.DataFrame(prop_nodes).T.reset_index().rename(columns={"index": "prop"})
@@ -99,19 +96,19 @@ class PsetApi:
         return df
     
     def create_library(self, data):
-        response = requests.post(
+        response = self.transport.post(
             f"{self.BASE_URL}libs",
             headers=self.headers,
-            data=json.dumps(data),
+            data=codec.dumps(data),
         )
         return response.json()
         
     
     def create_pset(self, data, libId):
-        response = requests.post(
+        response = self.transport.post(
             f"{self.BASE_URL}libs/{libId}/defs",
             headers=self.headers,
-            data=json.dumps(data),
+            data=codec.dumps(data),
         )
         return response.json()
 
@@ -121,6 +118,8 @@ class PsetApi:
         return self.update_pset(*args)
 
     def mp_helper(self, objects):
+        from multiprocessing import Pool
+        from tqdm import tqdm
         with Pool(8) as p:
             # Using `update_pset_wrapper` to ensure the arguments are unpacked correctly
             results = list(tqdm(p.imap(self.update_pset_wrapper, objects), total=len(objects)))
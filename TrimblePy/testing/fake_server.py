@@ -0,0 +1,783 @@
+'''
+Local stand-in for the Trimble Connect services, for benchmarks and offline testing.
+
+FakeTrimbleServer serves a synthetic project from a thread on localhost. Every service lives
+under its own path prefix of the same host and the regions document points all regions at it, so
+the API clients work unchanged against it:
+
+    with FakeTrimbleServer(FakeProject(files=100000, topics=50000), latency=0.02) as server:
+        auth = server.authentication()
+        files = TrimbleFileApi(auth, server.project.project_id).get_files()
+
+Implemented endpoints:
+    tc      regions, files/fs/snapshot, files/fs/{id}/downloadurl, files/{id}, folders/{id}, activities (lastId paging),
+            projects/{id}/users (next-header paging), views, tags, clashsets, todos
+    model   models/{id}?include=metadata, models/{id}/entities (top/offset), psetdefs, layers
+    pset    psets/{frn} GET, psets/{frn}/{libId}/{defId} PATCH
+    topic   bcf/2.1 projects/{id}/topics (next-header paging), topics/{id}/viewpoints/{id}, POST topics/viewpoints
+    org     forests/{id}/trees
+    blobs   file contents for the download urls, with Range support
+
+The data is derived from the seed, so two servers built with the same FakeProject return the
+same responses. Items are generated when a page is requested - only the file snapshot is kept
+in memory once built. Latency, 429 responses and server errors can be injected.
+
+Run standalone with: python -m TrimblePy.testing.fake_server --files 100000 --port 8080
+'''
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+BLOCK_SIZE = 1024
+USERS = ['Ada Lovelace', 'Alan Turing', 'Grace Hopper', 'Edsger Dijkstra', 'Barbara Liskov', 'Donald Knuth']
+IFC_TYPES = ['IFCWALL', 'IFCSLAB', 'IFCBEAM', 'IFCCOLUMN', 'IFCDOOR', 'IFCWINDOW', 'IFCPIPESEGMENT', 'IFCDUCTSEGMENT']
+EXTENSIONS = ['.ifc', '.pdf', '.dwg', '.xlsx', '.csv', '.xml', '.docx', '.jpg']
+
+
+def _timestamp(seconds):
+    return (EPOCH + timedelta(seconds=seconds)).strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+
+
+def fake_authentication(url, region='na', transport=None, region_cache=None):
+    '''
+    Returns an Authentication for a FakeTrimbleServer running at url (possibly in another process),
+    holding a token that doesn't expire.
+    '''
+    from TrimblePy.common.auth import Authentication
+    from TrimblePy.common.regions import RegionCache
+    if region_cache is None:
+        name = re.sub(r'[^A-Za-z0-9]+', '_', url).strip('_')
+        region_cache = RegionCache(path=os.path.join(tempfile.gettempdir(), f'{name}_regions.json'), url=f'{url}tc/api/2.0/regions')
+    auth = Authentication(client_id='fake-client', region=region, transport=transport, region_cache=region_cache)
+    auth.access_token = 'fake-access-token'
+    auth.expires_in = datetime.now() + timedelta(days=365)
+    return auth
+
+
+class FakeProject:
+    '''
+    Deterministic synthetic project served by FakeTrimbleServer.
+
+    Ids encode their index (folder 'D12', file 'F345', version 'V345r1', topic guids start with
+    the topic number in hex) so every item can be generated from its id without lookup tables.
+    '''
+
+    def __init__(self, files=1000, folders=None, models=5, entities_per_model=2000, topics=500, activities=2000,
+                 users=50, file_size=BLOCK_SIZE, seed=0, project_id='FakeProject1'):
+        """
+        Args:
+            files (int, optional): Number of files in the snapshot. Defaults to 1000.
+            folders (int, optional): Number of folders. Defaults to one per 50 files.
+            models (int, optional): Number of files that are models (the first ones, named .ifc). Defaults to 5.
+            entities_per_model (int, optional): Entities in each model. Defaults to 2000.
+            topics (int, optional): Number of BCF topics. Defaults to 500.
+            activities (int, optional): Number of entries in the activities feed. Defaults to 2000.
+            users (int, optional): Number of project users. Defaults to 50.
+            file_size (int, optional): Size in bytes of every file's content. Defaults to 1 KB.
+            seed (int, optional): Seed the data is derived from. Defaults to 0.
+            project_id (str, optional): Id of the project. Defaults to 'FakeProject1'.
+        """
+        self.files = files
+        self.folders = folders or max(files // 50, 1)
+        self.models = min(models, files)
+        self.entities_per_model = entities_per_model
+        self.topics = topics
+        self.activities = activities
+        self.users = users
+        self.file_size = file_size
+        self.seed = seed
+        self.project_id = project_id
+        self.revisions = {}
+        self.moved = {}
+        self.deleted = set()
+        self.events = {}
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _hash(self, *parts):
+        return hashlib.sha256(':'.join(str(part) for part in (self.seed,) + parts).encode('utf-8')).digest()
+
+    def _rand(self, *parts):
+        return int.from_bytes(self._hash(*parts)[:8], 'big')
+
+    def user(self, n):
+        first, last = USERS[n % len(USERS)].split(' ')
+        return {
+            'userStatus': 'ACTIVE',
+            'userId': f'U{n}',
+            'tiduuid': f'{n:08x}-0000-4000-8000-000000000000',
+            'email': f'{first.lower()}.{last.lower()}{n}@example.com',
+            'firstName': first,
+            'lastName': last,
+        }
+
+    # files -----------------------------------------------------------
+
+    def folder_parent(self, n):
+        return f'D{(n - 1) // 10}' if n else self.project_id
+
+    def file_index(self, file_id):
+        match = re.match(r'^[FV](\d+)', file_id or '')
+        if match is None or int(match.group(1)) >= self.files or int(match.group(1)) in self.deleted:
+            return None
+        return int(match.group(1))
+
+    def folder_index(self, folder_id):
+        match = re.match(r'^D(\d+)$', folder_id or '')
+        if match is None or int(match.group(1)) >= self.folders:
+            return None
+        return int(match.group(1))
+
+    def file_name(self, n):
+        extension = '.ifc' if n < self.models else EXTENSIONS[1 + n % (len(EXTENSIONS) - 1)]
+        return f'File {n}{extension}'
+
+    def revision(self, n):
+        return self.revisions.get(n, 1)
+
+    def version_id(self, n):
+        return f'V{n}r{self.revision(n)}'
+
+    def file_content(self, n, start=0, end=None):
+        '''
+        Returns bytes start..end (exclusive) of file n's content.
+        '''
+        end = self.file_size if end is None else min(end, self.file_size)
+        block = self._hash('content', n, self.revision(n)) * (BLOCK_SIZE // 32)
+        offset = start % BLOCK_SIZE
+        repeats = (end - start + offset) // BLOCK_SIZE + 1
+        return (block * repeats)[offset:offset + end - start]
+
+    def file_md5(self, n):
+        digest = hashlib.md5()
+        for start in range(0, self.file_size, 1 << 20):
+            digest.update(self.file_content(n, start, start + (1 << 20)))
+        return digest.hexdigest()
+
+    def file_item(self, n):
+        r = self._rand('file', n)
+        return {
+            'id': f'F{n}',
+            'vid': self.version_id(n),
+            'nm': self.file_name(n),
+            'pid': f'D{self.moved.get(n, r % self.folders)}',
+            'ptp': 'FOLDER',
+            'tp': 'FILE',
+            'ct': _timestamp(n * 60),
+            'mt': _timestamp(n * 60 + self.revision(n) * 3600),
+            'cid': f'U{(r >> 20) % self.users}',
+            'mid': f'U{(r >> 40) % self.users}',
+            'sz': self.file_size,
+            'del': False,
+            'md5': self.file_md5(n),
+            'rv': self.revision(n),
+            'chid': None,
+            'cht': None,
+            'tn': None,
+        }
+
+    def folder_item(self, n):
+        return {
+            'id': f'D{n}',
+            'vid': f'D{n}',
+            'nm': f'Folder {n}' if n else self.project_id,
+            'pid': self.folder_parent(n),
+            'ptp': 'FOLDER' if n else 'PROJECT',
+            'tp': 'FOLDER',
+            'ct': _timestamp(0),
+            'mt': _timestamp(0),
+            'cid': 'U0',
+            'mid': 'U0',
+            'sz': 0,
+            'del': False,
+            'md5': None,
+            'rv': 1,
+            'chid': None,
+            'cht': None,
+            'tn': None,
+        }
+
+    def snapshot(self):
+        '''
+        Returns the encoded snapshot document (built on the first call).
+        '''
+        with self._lock:
+            if self._snapshot is None:
+                items = [self.folder_item(n) for n in range(self.folders)] + [self.file_item(n) for n in range(self.files) if n not in self.deleted]
+                self._snapshot = json.dumps({'items': items}).encode('utf-8')
+            return self._snapshot
+
+    def metadata(self, item):
+        '''
+        Returns a snapshot item in the long form of the files/{id} and folders/{id} endpoints.
+        '''
+        return {
+            'id': item['id'],
+            'versionId': item['vid'],
+            'name': item['nm'],
+            'parentId': item['pid'],
+            'parentType': item['ptp'],
+            'type': item['tp'],
+            'createdOn': item['ct'],
+            'modifiedOn': item['mt'],
+            'createdBy': {'id': item['cid']},
+            'modifiedBy': {'id': item['mid']},
+            'size': item['sz'],
+            'hash': item['md5'],
+            'revision': item['rv'],
+            'projectId': self.project_id,
+        }
+
+    def _event(self, action, n):
+        # a change made through the fake api shows up as the newest activity
+        self.events[self.activities] = (action, n)
+        self.activities += 1
+        self._snapshot = None
+
+    def touch_file(self, n):
+        '''
+        Uploads a new version of file n (the snapshot, downloads and activities change accordingly).
+        '''
+        with self._lock:
+            self.revisions[n] = self.revision(n) + 1
+            self._event('FILE_UPLOADED', n)
+
+    def move_file(self, n, folder):
+        '''
+        Moves file n into folder number folder.
+        '''
+        with self._lock:
+            self.moved[n] = folder
+            self._event('FILE_MOVED', n)
+
+    def delete_file(self, n):
+        with self._lock:
+            self.deleted.add(n)
+            self._event('FILE_DELETED', n)
+
+    # activities -------------------------------------------------------
+
+    def activity(self, n):
+        file_n = self._rand('activity', n) % self.files
+        action = 'FILE_UPLOADED' if n % 3 else 'FILE_MODIFIED'
+        if n in self.events:
+            action, file_n = self.events[n]
+        return {
+            'id': str(n + 1),
+            'action': action,
+            'createdOn': _timestamp(self.files * 60 + n * 30),
+            'createdBy': self.user(self._rand('actor', n) % self.users),
+            'details': {'object': {'id': f'F{file_n}', 'displayName': self.file_name(file_n), 'type': 'FILE'}},
+        }
+
+    def activities_page(self, last_id=None, size=100):
+        # newest first - lastId returns the page of activities older than it
+        end = self.activities if last_id is None else min(int(last_id) - 1, self.activities)
+        return [self.activity(n) for n in range(end - 1, max(end - size, 0) - 1, -1)]
+
+    # models -----------------------------------------------------------
+
+    def model_index(self, model_id):
+        n = self.file_index(model_id)
+        return n if n is not None and n < self.models else None
+
+    def model_info(self, n):
+        item = self.file_item(n)
+        return {
+            'id': item['id'],
+            'versionId': item['vid'],
+            'name': item['nm'],
+            'trbSize': self.entities_per_model * 200,
+            'ownerCount': 1,
+            'historyCount': self.revision(n),
+            'psetDefCount': 4,
+            'hierarchyCount': 1,
+            'productCount': 1,
+            'entityCount': self.entities_per_model,
+            'layerCount': 4,
+            'hierarchyTypes': ['spatial'],
+            'metadata': {'application': 'FakeTrimbleServer', 'schema': 'IFC2X3'},
+        }
+
+    def pset_defs(self):
+        return [
+            {'idx': i, 'name': f'Pset_Fake{i}', 'props': [{'name': f'Prop{j}', 'type': 'string'} for j in range(5)]}
+            for i in range(4)
+        ]
+
+    def layers(self):
+        return [{'idx': i, 'name': f'Layer {i}'} for i in range(4)]
+
+    def entity(self, model_n, idx):
+        digest = self._hash('entity', model_n, idx)
+        r = int.from_bytes(digest[:8], 'big')
+        return {
+            'id': f'{model_n:04x}{idx:08x}' + digest[8:13].hex(),
+            'idx': idx,
+            'type': IFC_TYPES[r % len(IFC_TYPES)],
+            'product': {'name': f'Product {r % 100}', 'description': None},
+            'psets': [{'idx': i, 'values': [f'value {(r >> (i * 4 + j)) % 50}' for j in range(5)]} for i in range(r % 4 + 1)],
+            'layerIds': [r % 4],
+        }
+
+    def entities_page(self, model_n, offset, top):
+        end = min(offset + top, self.entities_per_model)
+        return [self.entity(model_n, idx) for idx in range(offset, end)]
+
+    # topics -----------------------------------------------------------
+
+    def topic_guid(self, n):
+        return f'{n:08x}-' + '-'.join(self._hash('topic', n).hex()[i:j] for i, j in ((0, 4), (4, 8), (8, 12))) + '-' + self._hash('topic', n).hex()[12:24]
+
+    def viewpoint_guid(self, n):
+        return f'{n:08x}-0000-4000-8000-' + self._hash('viewpoint', n).hex()[:12]
+
+    @staticmethod
+    def topic_index(guid):
+        try:
+            return int(guid[:8], 16)
+        except (TypeError, ValueError):
+            return None
+
+    def topic(self, n):
+        author = self.user(self._rand('author', n) % self.users)
+        assignee = self.user(self._rand('assignee', n) % self.users)
+        return {
+            'guid': self.topic_guid(n),
+            'version': 1,
+            'topic_type': 'Issue' if n % 2 else 'Request',
+            'topic_status': ['Open', 'In Progress', 'Closed'][n % 3],
+            'title': f'Topic {n}',
+            'labels': [f'Label{n % 7}'],
+            'creation_date': _timestamp(n * 120),
+            'creation_author': author['email'],
+            'creation_author_uuid': author['tiduuid'],
+            'created_by_uuid': author['tiduuid'],
+            'modified_date': _timestamp(n * 120 + 600),
+            'modified_author': author['email'],
+            'modified_author_uuid': author['tiduuid'],
+            'assigned_to': assignee['email'],
+            'assigned_to_uuid': assignee['tiduuid'],
+            'assignees': [assignee['email']],
+            'description': f'Synthetic topic number {n}',
+            'viewpoint': {'guid': self.viewpoint_guid(n)},
+            'files': [{'ifc_project': f'F{n % max(self.models, 1)}'}],
+        }
+
+    def viewpoint(self, n):
+        r = self._rand('viewpoint', n)
+        return {
+            'guid': self.viewpoint_guid(n),
+            'view_id': f'View{n}',
+            'index': 0,
+            'perspective_camera': {
+                'camera_view_point': {'x': r % 1000 / 10, 'y': (r >> 10) % 1000 / 10, 'z': (r >> 20) % 100 / 10},
+                'camera_direction': {'x': 0.0, 'y': 1.0, 'z': 0.0},
+                'camera_up_vector': {'x': 0.0, 'y': 0.0, 'z': 1.0},
+                'field_of_view': 60.0,
+            },
+            'lines': [],
+            'clipping_planes': [],
+            'snapshot': {'snapshot_type': 'png', 'snapshot_url': None},
+            'components': {
+                'selection': [{'ifc_guid': self._hash('selection', n, i).hex()[:22]} for i in range(r % 5 + 1)],
+                'visibility': {'default_visibility': True, 'view_setup_hints': {'spaces_visible': False, 'openings_visible': False}},
+            },
+        }
+
+
+class FakeTrimbleServer:
+    '''
+    Serves a FakeProject over HTTP on localhost from a background thread.
+
+    Faults are injected in this order: latency is added to every request, every rate_limit_every-th
+    request is answered 429 (with Retry-After), and failure_rate of the rest fail with a 503.
+    Request counts per route are kept in self.hits; pset updates and created topics are kept in
+    memory so a later GET sees them.
+    '''
+
+    def __init__(self, project=None, host='127.0.0.1', port=0, latency=0.0, rate_limit_every=0, retry_after=0,
+                 failure_rate=0.0, topic_page_size=100, user_page_size=100, seed=0):
+        """
+        Args:
+            project (FakeProject, optional): Data to serve. Defaults to FakeProject().
+            host (str, optional): Interface to bind. Defaults to '127.0.0.1'.
+            port (int, optional): Port to bind. Defaults to a free port.
+            latency (float or tuple, optional): Seconds added to every response, or a (min, max) range. Defaults to 0.
+            rate_limit_every (int, optional): Answer every n-th request with 429. Defaults to 0 (never).
+            retry_after (int, optional): Retry-After seconds sent with the 429s. Defaults to 0.
+            failure_rate (float, optional): Fraction of requests that fail with 503. Defaults to 0.
+            topic_page_size (int, optional): Topics per page. Defaults to 100.
+            user_page_size (int, optional): Project users per page. Defaults to 100.
+            seed (int, optional): Seed of the fault injection. Defaults to 0.
+        """
+        self.project = project or FakeProject()
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.failure_rate = failure_rate
+        self.topic_page_size = topic_page_size
+        self.user_page_size = user_page_size
+        self.hits = Counter()
+        self.psets = {}
+        self.created_topics = {}
+        self._random = random.Random(seed)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+        self._tmpdir = None
+        self.routes = [
+            ('GET', r'tc/api/2\.0/regions', self._regions),
+            ('GET', r'tc/api/2\.0/files/fs/snapshot', self._snapshot),
+            ('GET', r'tc/api/2\.0/files/fs/([^/]+)/downloadurl', self._download_url),
+            ('GET', r'tc/api/2\.0/files/([^/]+)', self._file_metadata),
+            ('GET', r'tc/api/2\.0/folders/([^/]+)', self._folder_metadata),
+            ('GET', r'tc/api/2\.0/activities', self._activities),
+            ('GET', r'tc/api/2\.0/projects/([^/]+)/users', self._users),
+            ('GET', r'tc/api/2\.0/(views|tags|clashsets|todos)', self._project_list),
+            ('GET', r'model/models/([^/]+)/entities', self._entities),
+            ('GET', r'model/models/([^/]+)/psetdefs', self._psetdefs),
+            ('GET', r'model/models/([^/]+)/layers', self._layers),
+            ('GET', r'model/models/([^/]+)', self._model_info),
+            ('GET', r'pset/v1/psets/([^/]+)', self._get_psets),
+            ('PATCH', r'pset/v1/psets/([^/]+)/([^/]+)/([^/]+)', self._patch_pset),
+            ('GET', r'topic/bcf/2\.1/projects/([^/]+)/topics', self._topics),
+            ('POST', r'topic/bcf/2\.1/projects/([^/]+)/topics', self._create_topic),
+            ('GET', r'topic/bcf/2\.1/projects/([^/]+)/topics/([^/]+)/viewpoints/([^/]+)', self._viewpoint),
+            ('POST', r'topic/bcf/2\.1/projects/([^/]+)/topics/([^/]+)/viewpoints', self._create_viewpoint),
+            ('GET', r'org/v1/forests/([^/]+)/trees', self._trees),
+            ('GET', r'blobs/([^/]+)', self._blob),
+        ]
+        self.routes = [(method, re.compile(f'^/{pattern}$'), handler) for method, pattern, handler in self.routes]
+
+    # lifecycle --------------------------------------------------------
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}/'
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._handle(self, 'GET')
+
+            def do_POST(self):
+                server._handle(self, 'POST')
+
+            def do_PATCH(self):
+                server._handle(self, 'PATCH')
+
+            def do_PUT(self):
+                server._handle(self, 'PUT')
+
+            def do_DELETE(self):
+                server._handle(self, 'DELETE')
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-trimble-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def endpoints(self):
+        '''
+        Returns the endpoint urls in the shape of Authentication.endpoints.
+        '''
+        return {
+            'tc': f'{self.url}tc/api/2.0/',
+            'model': f'{self.url}model/',
+            'pset': f'{self.url}pset/v1/',
+            'topic': f'{self.url}topic/',
+            'org': f'{self.url}org/v1/',
+        }
+
+    def region_cache(self):
+        '''
+        Returns a RegionCache that resolves every region to this server.
+        '''
+        from TrimblePy.common.regions import RegionCache
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.mkdtemp(prefix='fake_trimble_')
+        return RegionCache(path=os.path.join(self._tmpdir, 'regions.json'), url=f'{self.url}tc/api/2.0/regions')
+
+    def authentication(self, region='na', transport=None):
+        '''
+        Returns an Authentication pointed at this server, holding a token that doesn't expire.
+        '''
+        return fake_authentication(self.url, region=region, transport=transport, region_cache=self.region_cache())
+
+    # request handling ---------------------------------------------------
+
+    def _inject_fault(self):
+        if self.latency:
+            latency = self.latency
+            if isinstance(latency, tuple):
+                with self._lock:
+                    latency = self._random.uniform(*latency)
+            time.sleep(latency)
+        with self._lock:
+            self._count += 1
+            if self.rate_limit_every and self._count % self.rate_limit_every == 0:
+                return 429
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                return 503
+        return None
+
+    def _handle(self, request, method):
+        parts = urlsplit(request.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query, keep_blank_values=True).items()}
+        body = None
+        length = int(request.headers.get('Content-Length') or 0)
+        if length:
+            body = request.rfile.read(length)
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(parts.path)
+            if match and route_method == method:
+                break
+        else:
+            return self._send(request, 404, {'message': f'No route for {method} {parts.path}'})
+        with self._lock:
+            self.hits[handler.__name__.strip('_')] += 1
+        fault = self._inject_fault()
+        if fault == 429:
+            return self._send(request, 429, {'message': 'Too many requests'}, {'Retry-After': str(self.retry_after)})
+        if fault:
+            return self._send(request, fault, {'message': 'Injected failure'})
+        if not request.headers.get('Authorization', '').startswith('Bearer ') and handler not in (self._regions, self._blob):
+            return self._send(request, 401, {'message': 'Missing bearer token'})
+        args = [unquote(group) for group in match.groups()]
+        handler(request, query, body, *args)
+
+    def _send(self, request, status, payload=None, headers=None, content_type='application/json'):
+        if isinstance(payload, bytes) or payload is None:
+            content = payload or b''
+        else:
+            content = json.dumps(payload).encode('utf-8')
+        headers = dict(headers or {})
+        if status == 200 and request.command == 'GET' and content_type == 'application/json':
+            etag = '"' + hashlib.md5(content).hexdigest() + '"'
+            if request.headers.get('If-None-Match') == etag:
+                status, content = 304, b''
+            headers['ETag'] = etag
+        request.send_response(status)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(content)
+
+    # tc -----------------------------------------------------------------
+
+    def _regions(self, request, query, body):
+        regions = []
+        for region in ('na', 'eu', 'ap', 'ap2'):
+            endpoints = self.endpoints()
+            regions.append({
+                'serviceRegion': region,
+                'origin': f'//{self.host}:{self.port}',
+                'tc-api': endpoints['tc'],
+                'model-api': endpoints['model'],
+                'pset-api': endpoints['pset'],
+                'topic-api': endpoints['topic'],
+                'org-api': endpoints['org'],
+            })
+        self._send(request, 200, regions)
+
+    def _snapshot(self, request, query, body):
+        self._send(request, 200, self.project.snapshot())
+
+    def _download_url(self, request, query, body, file_id):
+        n = self.project.file_index(file_id)
+        if n is None:
+            return self._send(request, 404, {'message': f'File {file_id} not found'})
+        self._send(request, 200, {'url': f'{self.url}blobs/{self.project.version_id(n)}'})
+
+    def _file_metadata(self, request, query, body, file_id):
+        n = self.project.file_index(file_id)
+        if n is None or not file_id.startswith('F'):
+            return self._send(request, 404, {'message': f'File {file_id} not found'})
+        self._send(request, 200, self.project.metadata(self.project.file_item(n)))
+
+    def _folder_metadata(self, request, query, body, folder_id):
+        n = self.project.folder_index(folder_id)
+        if n is None:
+            return self._send(request, 404, {'message': f'Folder {folder_id} not found'})
+        self._send(request, 200, self.project.metadata(self.project.folder_item(n)))
+
+    def _activities(self, request, query, body):
+        self._send(request, 200, self.project.activities_page(query.get('lastId')))
+
+    def _paged(self, request, path, items_for, total, page_size, query):
+        offset = int(query.get('skiptoken') or 0)
+        headers = {}
+        if offset + page_size < total:
+            headers['next'] = f'{self.url}{path}?skiptoken={offset + page_size}'
+        self._send(request, 200, items_for(range(offset, min(offset + page_size, total))), headers)
+
+    def _users(self, request, query, body, project_id):
+        items_for = lambda indexes: [self.project.user(n) for n in indexes]
+        self._paged(request, f'tc/api/2.0/projects/{project_id}/users', items_for, self.project.users, self.user_page_size, query)
+
+    def _project_list(self, request, query, body, kind):
+        self._send(request, 200, [{'id': f'{kind[:-1].upper()}{n}', 'name': f'{kind[:-1].title()} {n}', 'projectId': query.get('projectId')} for n in range(20)])
+
+    def _blob(self, request, query, body, version_id):
+        n = self.project.file_index(version_id)
+        if n is None or version_id != self.project.version_id(n):
+            return self._send(request, 404, {'message': f'Version {version_id} not found'})
+        size = self.project.file_size
+        start, end, status = 0, size, 200
+        match = re.match(r'bytes=(\d+)-(\d*)', request.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) + 1, size) if match.group(2) else size
+            status = 206
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/octet-stream')
+        request.send_header('Content-Length', str(end - start))
+        request.send_header('Accept-Ranges', 'bytes')
+        request.send_header('ETag', f'"{version_id}"')
+        if status == 206:
+            request.send_header('Content-Range', f'bytes {start}-{end - 1}/{size}')
+        request.end_headers()
+        for chunk_start in range(start, end, 1 << 16):
+            request.wfile.write(self.project.file_content(n, chunk_start, min(chunk_start + (1 << 16), end)))
+
+    # model --------------------------------------------------------------
+
+    def _model(self, request, model_id):
+        n = self.project.model_index(model_id)
+        if n is None:
+            self._send(request, 404, {'message': f'Model {model_id} not found'})
+        return n
+
+    def _model_info(self, request, query, body, model_id):
+        n = self._model(request, model_id)
+        if n is not None:
+            self._send(request, 200, self.project.model_info(n))
+
+    def _entities(self, request, query, body, model_id):
+        n = self._model(request, model_id)
+        if n is not None:
+            top, offset = int(query.get('top') or 100), int(query.get('offset') or 0)
+            self._send(request, 200, {'items': self.project.entities_page(n, offset, top)})
+
+    def _psetdefs(self, request, query, body, model_id):
+        if self._model(request, model_id) is not None:
+            self._send(request, 200, {'items': self.project.pset_defs()})
+
+    def _layers(self, request, query, body, model_id):
+        if self._model(request, model_id) is not None:
+            self._send(request, 200, {'items': self.project.layers()})
+
+    # pset ---------------------------------------------------------------
+
+    def _get_psets(self, request, query, body, frn):
+        with self._lock:
+            items = [pset for (link, _, _), pset in self.psets.items() if link == frn]
+        self._send(request, 200, {'items': items})
+
+    def _patch_pset(self, request, query, body, frn, lib_id, def_id):
+        props = json.loads(body or b'{}')
+        key = (frn, lib_id, def_id)
+        with self._lock:
+            if request.headers.get('If-None-Match') == '*' and key in self.psets:
+                return self._send(request, 412, {'message': 'Property set already exists'})
+            pset = self.psets.setdefault(key, {'link': frn, 'libId': lib_id, 'defId': def_id, 'props': {}, 'version': 0})
+            pset['props'].update(props.get('props', props))
+            pset['version'] += 1
+            pset = json.loads(json.dumps(pset))
+        self._send(request, 200, pset)
+
+    # topic --------------------------------------------------------------
+
+    def _topics(self, request, query, body, project_id):
+        items_for = lambda indexes: [self.project.topic(n) for n in indexes]
+        self._paged(request, f'topic/bcf/2.1/projects/{project_id}/topics', items_for, self.project.topics, self.topic_page_size, query)
+
+    def _create_topic(self, request, query, body, project_id):
+        topic = json.loads(body or b'{}')
+        with self._lock:
+            topic['guid'] = topic.get('guid') or self.project.topic_guid(self.project.topics + len(self.created_topics))
+            self.created_topics[topic['guid']] = topic
+        self._send(request, 201, topic)
+
+    def _viewpoint(self, request, query, body, project_id, topic_guid, viewpoint_guid):
+        n = self.project.topic_index(topic_guid)
+        if n is None or n >= self.project.topics or viewpoint_guid != self.project.viewpoint_guid(n):
+            return self._send(request, 404, {'message': f'Viewpoint {viewpoint_guid} not found'})
+        self._send(request, 200, self.project.viewpoint(n))
+
+    def _create_viewpoint(self, request, query, body, project_id, topic_guid):
+        viewpoint = json.loads(body or b'{}')
+        viewpoint['guid'] = viewpoint.get('guid') or self.project.viewpoint_guid(self.project.topic_index(topic_guid) or 0)
+        self._send(request, 201, viewpoint)
+
+    # org ----------------------------------------------------------------
+
+    def _trees(self, request, query, body, forest_id):
+        self._send(request, 200, [{'id': f'T{n}', 'forestId': forest_id, 'name': f'Tree {n}'} for n in range(5)])
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Serve a synthetic Trimble Connect project on localhost.')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--models', type=int, default=5)
+    parser.add_argument('--entities', type=int, default=2000, help='entities per model')
+    parser.add_argument('--topics', type=int, default=500)
+    parser.add_argument('--activities', type=int, default=2000)
+    parser.add_argument('--file-size', type=int, default=BLOCK_SIZE)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--rate-limit-every', type=int, default=0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    project = FakeProject(files=args.files, models=args.models, entities_per_model=args.entities, topics=args.topics,
+                          activities=args.activities, file_size=args.file_size)
+    server = FakeTrimbleServer(project, port=args.port, latency=args.latency, rate_limit_every=args.rate_limit_every,
+                               failure_rate=args.failure_rate).start()
+    print(f'Serving project {project.project_id} at {server.url} - regions document: {server.url}tc/api/2.0/regions')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
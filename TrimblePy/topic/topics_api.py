@@ -1,78 +1,69 @@
-import requests
-import pandas as pd
-from tqdm import tqdm
-import time
-from multiprocessing import Pool
+from TrimblePy.common.codec import RecordSchema, decode_record, decode_records
+from TrimblePy.common.pagination import collect
+from TrimblePy.common.retry import RetryPolicy
+
+# json fields of a topic / viewpoint in the order of the Topic / Viewpoint constructor arguments
+TOPIC_FIELDS = RecordSchema('TopicRecord', [(name, None) for name in (
+    'version', 'guid', 'topic_type', 'topic_status', 'title', 'labels', 'creation_date', 'creation_author',
+    'creation_author_uuid', 'created_by_uuid', 'modified_date', 'modified_author', 'modified_author_uuid',
+    'assigned_to', 'assigned_to_uuid', 'assignees', 'description', 'viewpoint', 'files',
+)])
+VIEWPOINT_FIELDS = RecordSchema('ViewpointRecord', [
+    ('view_id', None), ('index', None), ('perspective_camera', {}), ('lines', []),
+    ('clipping_planes', []), ('snapshot', {}), ('components', {}), ('guid', None),
+])
 
 class TopicApi:
     
     def __init__(self, authentication,project_id):
         self.authentication = authentication
         self.headers = {
-            "Authorization": f"Bearer {self.authentication.access_token}"
+            "Accept": "application/json",
         }
         self.BASE_URL = self.authentication.endpoints['topic'] + "bcf/2.1/"
+        self.transport = self.authentication.get_transport()
         self.project_id = project_id
 
-    def get_topics(self):
-        response = requests.get(
-            f"{self.BASE_URL}projects/{self.project_id}/topics?skiptoken",
-            headers=self.headers,
-        )
-        data = response.json()
-        while response.headers.get("next"):
-            response = requests.get(
-                response.headers.get("next"),
-                headers=self.headers,
-            )
-            data = data + response.json()
-            print(len(data))
-        return data
+    def get_topics(self, typed=False, limit=None, stop=None):
+        '''
+        typed: Decode each page straight into Topic objects instead of dictionaries.
+        limit: Maximum number of topics to return.
+        stop: Called with each topic; the listing ends at the first topic it returns True for.
+        '''
+        decode = self._decode_topics if typed else self._decode_json
+        get = lambda url: self.transport.get(url, headers=self.headers)
+        return collect(get, f"{self.BASE_URL}projects/{self.project_id}/topics?skiptoken", decode=decode, limit=limit, stop=stop)
+
+    @staticmethod
+    def _decode_json(response):
+        return response.json()
+
+    @staticmethod
+    def _decode_topics(response):
+        return decode_records(response.content, TOPIC_FIELDS, Topic)
     
     def construct_topics(self):
-        raw_topics = self.get_topics()
-        topic_objects = []
-        for raw_topic in raw_topics:
-            topic_obj = Topic(
-                version=raw_topic.get('version'),
-                guid=raw_topic.get('guid'),
-                topic_type=raw_topic.get('topic_type'),
-                topic_status=raw_topic.get('topic_status'),
-                title=raw_topic.get('title'),
-                labels=raw_topic.get('labels'),
-                creation_date=raw_topic.get('creation_date'),
-                creation_author=raw_topic.get('creation_author'),
-                creation_author_uuid=raw_topic.get('creation_author_uuid'),
-                created_by_uuid=raw_topic.get('created_by_uuid'),
-                modified_date=raw_topic.get('modified_date'),
-                modified_author=raw_topic.get('modified_author'),
-                modified_author_uuid=raw_topic.get('modified_author_uuid'),
-                assigned_to=raw_topic.get('assigned_to'),
-                assigned_to_uuid=raw_topic.get('assigned_to_uuid'),
-                assignees=raw_topic.get('assignees'),
-                description=raw_topic.get('description'),
-                viewpoint=raw_topic.get('viewpoint'),
-                files=raw_topic.get('files'),
+        return self.get_topics(typed=True)
+
+    def get_viewpoint(self, topic_id, viewpoint_guid, typed=False):
+        '''
+        typed: Decode the response straight into a Viewpoint object instead of a dictionary.
+        Returns None (with a warning) if the request still fails once the transport's retries are used up.
+        '''
+        import requests
+        try:
+            response = self.transport.get(
+                f"{self.BASE_URL}projects/{self.project_id}/topics/{topic_id}/viewpoints/{viewpoint_guid}",
+                headers=self.headers,
+                retry=RetryPolicy(max_attempts=5),
             )
-            topic_objects.append(topic_obj)
-        return topic_objects
-    
-    def get_viewpoint(self, topic_id, viewpoint_guid):
-        max_attempts = 5
-        for attempt in range(max_attempts):
-            try:
-                response = requests.get(
-                    f"{self.BASE_URL}projects/{self.project_id}/topics/{topic_id}/viewpoints/{viewpoint_guid}",
-                    headers=self.headers,
-                )
-                try:
-                    view = response.json()
-                    return view
-                except:
-                    time.sleep(1)
-            except:
-                if attempt == max_attempts - 1:  # On the last attempt, return an error message
-                    return 'error'
+            response.raise_for_status()
+        except requests.RequestException as err:
+            print(f"Failed to get viewpoint {viewpoint_guid} for topic {topic_id}: {err}")
+            return None
+        if typed:
+            return decode_record(response.content, VIEWPOINT_FIELDS, Viewpoint)
+        return response.json()
     
     def construct_viewpoint(self, topic):
         if topic.viewpoint is None or 'guid' not in topic.viewpoint:
@@ -83,8 +74,8 @@ class TopicApi:
 
         viewpoint_data = self.get_viewpoint(topic_id, viewpoint_guid)
 
-        if viewpoint_data == 'error':
-            return None  # Handle the error accordingly
+        if viewpoint_data is None:
+            return None
 
         perspective_camera = viewpoint_data.get('perspective_camera', {})
         snapshot = viewpoint_data.get('snapshot', {})
@@ -149,13 +140,15 @@ class TopicApi:
         return self.get_viewpoint(*args)
 
     def get_all_viewpoints(self, topics, pool_size=8):
+        from multiprocessing import Pool
+        from tqdm import tqdm
         # Tuple of topic_id and viewpoint_guid for each topic that requires a viewpoint fetch
         with Pool(pool_size) as pool:
             topic_viewpoint_args = [(topic.guid, topic.viewpoint['guid']) for topic in topics if 'guid' in (topic.viewpoint or {})]
             viewpoints = list(tqdm(pool.imap(self._get_viewpoint_helper, topic_viewpoint_args), total=len(topic_viewpoint_args)))
         
         # Construct topics to viewpoints mapping/r
-        viewpoints_dict = {args[0]: viewpoint for args, viewpoint in zip(topic_viewpoint_args, viewpoints) if viewpoint != 'error'}
+        viewpoints_dict = {args[0]: viewpoint for args, viewpoint in zip(topic_viewpoint_args, viewpoints) if viewpoint is not None}
         
         return viewpoints_dict
 
@@ -173,8 +166,8 @@ class TopicApi:
 
         viewpoint_guid = topic.viewpoint['guid']
 
-        if viewpoint_data == 'error':
-            return None  # Handle the error accordingly
+        if viewpoint_data is None:
+            return None
 
         perspective_camera = viewpoint_data.get('perspective_camera', {})
         snapshot = viewpoint_data.get('snapshot', {})
@@ -247,13 +240,13 @@ class TopicApi:
         
         # Issue creation API endpoint and data
         endpoint = f"{self.BASE_URL}projects/{self.project_id}/topics"
-        issue_response = requests.post(endpoint, json=topic_dict, headers=headers)
+        issue_response = self.transport.post(endpoint, json=topic_dict, headers=headers)
 
         if issue_response.ok:
             issue_guid = issue_response.json().get('guid')  # Assume the response provides a guid for the new issue
             # Associate the viewpoint with the newly created issue
             view_endpoint = f"{endpoint}/{issue_guid}/viewpoints"
-            view_response = requests.post(view_endpoint, json=view_dict, headers=headers)
+            view_response = self.transport.post(view_endpoint, json=view_dict, headers=headers)
             if view_response.ok:
                 return issue_response.json(), view_response.json()
             else:
@@ -263,7 +256,7 @@ class TopicApi:
 
     def delete_topic(self, topic_id):
         try:
-            response = requests.delete(
+            response = self.transport.delete(
                 f"https://open31.connect.trimble.com/bcf/2.1/projects/{self.project_id}/topics/{topic_id}",
                 headers=self.headers,
             )
@@ -279,7 +272,7 @@ class TopicApi:
         # Associate the viewpoint with the newly created issue
         endpoint = f"{self.BASE_URL}projects/{self.project_id}/topics"
         view_endpoint = f"{endpoint}/{issue_guid}/viewpoints"
-        view_response = requests.post(view_endpoint, json=view_dict, headers=headers)
+        view_response = self.transport.post(view_endpoint, json=view_dict, headers=headers)
         if view_response.ok:
             return "Issue and viewpoint created successfully"
         else:
@@ -291,7 +284,7 @@ class TopicApi:
         # PUT Projects/{projectId}/Topics/{topicId}/files 
         url = f"{self.BASE_URL}projects/{self.project_id}/topics/{topic.guid}/files"
         files = topic.files
-        response = requests.put(url, json=files, headers=headers)
+        response = self.transport.put(url, json=files, headers=headers)
         if response.ok:
             return "Files updated successfully"
         else:
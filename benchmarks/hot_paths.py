@@ -0,0 +1,334 @@
+'''
+Benchmarks the library's hot paths against synthetic data served by the fake Trimble Connect server.
+
+Every case runs at several data sizes in a fresh subprocess (so peak RSS belongs to that case
+alone) and reports the median wall time of --repeat runs, the peak RSS of the process and of its
+pool workers, the peak traced Python allocation and the number of objects the result keeps
+alive. The fake server runs in this process, so no network access or credentials are needed.
+
+Results can be saved as a baseline; later runs are compared with it and flagged when the time or
+memory grows by more than the tolerance (the exit code is 1 if anything regressed).
+
+Usage:
+    python benchmarks/hot_paths.py                          # every case at the default sizes
+    python benchmarks/hot_paths.py --cases get_files --max-size 100000
+    python benchmarks/hot_paths.py --save-baseline          # store the results in benchmarks/baselines.json
+'''
+import argparse
+import contextlib
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+
+# -----------------------------------------------------------------
+# CASES
+# each case has a fake project for the server, a setup run outside the timings and the timed run
+# -----------------------------------------------------------------
+
+def _auth(url):
+    from TrimblePy.testing.fake_server import fake_authentication
+    return fake_authentication(url)
+
+
+def _entities(size):
+    from TrimblePy.testing.fake_server import FakeProject
+    project = FakeProject(models=1, entities_per_model=size)
+    data = project.entities_page(0, 0, size)
+    return data, project.pset_defs(), project.layers()
+
+
+def setup_get_files(url, size):
+    from TrimblePy.connect.file_api import TrimbleFileApi
+    return TrimbleFileApi(_auth(url), 'FakeProject1')
+
+
+def run_get_files(api):
+    return api.get_files()
+
+
+def run_get_files_stream(api):
+    return api.get_files(stream=True)
+
+
+def run_get_files_typed(api):
+    return api.get_files(typed=True)
+
+
+def run_get_file_table(api):
+    return api.get_file_table()
+
+
+def setup_download_files(url, size):
+    import atexit
+    import shutil
+    import tempfile
+    api = setup_get_files(url, size)
+    directory = tempfile.mkdtemp(prefix='trimblepy-bench-')
+    atexit.register(shutil.rmtree, directory, True)
+    return api, api.get_file_table(), directory
+
+
+def run_download_files(state):
+    import shutil
+    api, files, directory = state
+    shutil.rmtree(directory, ignore_errors=True)  # otherwise every file after the first run is skipped
+    return api.download_files(files, directory, progress=False)
+
+
+def setup_construct_entities(url, size):
+    from TrimblePy.connect.model_api import ModelApi
+    return ModelApi(_auth(url)), _entities(size)
+
+
+def run_construct_entities(state):
+    api, (data, psets, layers) = state
+    return api.construct_entities(data, psets, layers, None)
+
+
+def setup_get_entities(url, size):
+    from TrimblePy.connect.model_api import ModelApi
+    return ModelApi(_auth(url)), size
+
+
+def run_get_entities(state):
+    api, size = state
+    return api.get_entities('F0', size)
+
+
+def setup_entity_to_df(url, size):
+    api, (data, psets, layers) = setup_construct_entities(url, size)
+    return api, api.construct_entities(data, psets, layers, None)
+
+
+def run_entity_to_df_optimized(state):
+    api, entities = state
+    return api.entity_to_df_optimized(entities)
+
+
+def run_process_entities_with_multiprocessing(state):
+    api, entities = state
+    return api.process_entities_with_multiprocessing(entities, n_workers=4)
+
+
+def setup_topics(url, size):
+    from TrimblePy.topic.topics_api import TopicApi
+    return TopicApi(_auth(url), 'FakeProject1')
+
+
+def run_construct_topics(api):
+    return api.construct_topics()
+
+
+def run_construct_all_viewpoints(api):
+    # construct_all_viewpoints replaces topic.viewpoint, so every run starts from fresh Topic objects
+    topics = api.construct_topics()
+    api.construct_all_viewpoints(topics)
+    return topics
+
+
+def setup_pset_updates(url, size):
+    from TrimblePy.pset.pset_api import PsetApi
+    objects = [({'props': {'Status': f'value {i}'}}, 'Lib1', 'Def1', f'guid{i}', 'F0') for i in range(size)]
+    return PsetApi(_auth(url)), objects
+
+
+def run_pset_updates(state):
+    api, objects = state
+    return api.mp_helper(objects)
+
+
+def setup_helper_frame(url, size):
+    import pandas as pd
+    keys = [f'key{k}' for k in range(6)]
+    df = pd.DataFrame({'id': range(size), 'product': [{key: f'{key} {i}' for key in keys} for i in range(size)]})
+    return keys, df
+
+
+def run_keys_to_columns(state):
+    from TrimblePy.common.helper import keys_to_columns
+    keys, df = state
+    return keys_to_columns(keys, df.copy(), 'product', 'product')
+
+
+def setup_helper_columns(url, size):
+    from TrimblePy.common.helper import keys_to_columns
+    keys, df = setup_helper_frame(url, size)
+    return keys_to_columns(keys, df, 'product', 'product')
+
+
+def run_columns_to_keys(df):
+    from TrimblePy.common.helper import columns_to_keys
+    return columns_to_keys(df.copy(), 'product')
+
+
+# name: (fake project arguments for a size, setup, run, sizes)
+CASES = {
+    'get_files': (lambda size: {'files': size}, setup_get_files, run_get_files, (1000, 10000, 100000)),
+    'get_files_stream': (lambda size: {'files': size}, setup_get_files, run_get_files_stream, (1000, 10000, 100000)),
+    'get_files_typed': (lambda size: {'files': size}, setup_get_files, run_get_files_typed, (1000, 10000, 100000)),
+    'get_file_table': (lambda size: {'files': size}, setup_get_files, run_get_file_table, (1000, 10000, 100000)),
+    'download_files': (lambda size: {'files': size, 'file_size': 1 << 20}, setup_download_files, run_download_files, (10, 100)),
+    'get_entities': (lambda size: {'models': 1, 'entities_per_model': size}, setup_get_entities, run_get_entities, (1000, 10000, 100000)),
+    'construct_entities': (lambda size: {}, setup_construct_entities, run_construct_entities, (1000, 10000, 100000)),
+    'entity_to_df_optimized': (lambda size: {}, setup_entity_to_df, run_entity_to_df_optimized, (1000, 10000, 100000)),
+    'process_entities_with_multiprocessing': (lambda size: {}, setup_entity_to_df, run_process_entities_with_multiprocessing, (10000, 100000)),
+    'construct_topics': (lambda size: {'topics': size}, setup_topics, run_construct_topics, (1000, 10000, 50000)),
+    'construct_all_viewpoints': (lambda size: {'topics': size}, setup_topics, run_construct_all_viewpoints, (100, 1000)),
+    'pset_updates': (lambda size: {}, setup_pset_updates, run_pset_updates, (100, 1000)),
+    'keys_to_columns': (lambda size: {}, setup_helper_frame, run_keys_to_columns, (1000, 10000, 100000)),
+    'columns_to_keys': (lambda size: {}, setup_helper_columns, run_columns_to_keys, (1000, 10000, 100000)),
+}
+
+
+# -----------------------------------------------------------------
+# MEASUREMENT (runs in the child process)
+# -----------------------------------------------------------------
+
+def peak_rss_mb():
+    '''
+    Returns the peak RSS of this process and of its finished children in MB (None where unsupported).
+    '''
+    own = None
+    try:
+        # ru_maxrss survives exec, so on Linux it would include the driver's peak - VmHWM doesn't
+        with open('/proc/self/status') as f:
+            own = next(int(line.split()[1]) / 2 ** 10 for line in f if line.startswith('VmHWM:'))
+    except (OSError, StopIteration):
+        pass
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2 ** 20, None
+        except (ImportError, AttributeError):
+            return None, None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 2 ** 20 if sys.platform == 'darwin' else 2 ** 10
+    return (own or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+
+def measure(case, size, url, repeat):
+    _, setup, run, _ = CASES[case]
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        state = setup(url, size)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = run(state)
+            timings.append(time.perf_counter() - started)
+            del result
+        rss, child_rss = peak_rss_mb()
+        gc.collect()
+        objects_before = len(gc.get_objects())
+        tracemalloc.start()
+        result = run(state)
+        alloc_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        gc.collect()
+        objects = len(gc.get_objects()) - objects_before
+        del result
+    return {
+        'seconds': statistics.median(timings),
+        'items_per_second': size / statistics.median(timings),
+        'peak_rss_mb': rss,
+        'worker_peak_rss_mb': child_rss,
+        'alloc_peak_mb': alloc_peak / 2 ** 20,
+        'objects': objects,
+    }
+
+
+# -----------------------------------------------------------------
+# DRIVER
+# -----------------------------------------------------------------
+
+def run_case(case, size, repeat):
+    from TrimblePy.testing.fake_server import FakeProject, FakeTrimbleServer
+    project_args, _, _, _ = CASES[case]
+    with FakeTrimbleServer(FakeProject(**project_args(size))) as server:
+        command = [sys.executable, os.path.abspath(__file__), '--child', case, str(size), server.url, '--repeat', str(repeat)]
+        output = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    if output.returncode != 0:
+        raise RuntimeError(f'{case}[{size}] failed:\n{output.stderr}')
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def compare(result, baseline, time_tolerance, memory_tolerance):
+    '''
+    Returns the regressions of result against its baseline as a list of strings.
+    '''
+    regressions = []
+    if baseline is None:
+        return regressions
+    if result['seconds'] > baseline['seconds'] * (1 + time_tolerance):
+        regressions.append(f"time {baseline['seconds']:.3f}s -> {result['seconds']:.3f}s")
+    for key in ('peak_rss_mb', 'alloc_peak_mb'):
+        if result.get(key) and baseline.get(key) and result[key] > baseline[key] * (1 + memory_tolerance):
+            regressions.append(f"{key} {baseline[key]:.1f} -> {result[key]:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), help='cases to run (default: all)')
+    parser.add_argument('--max-size', type=int, default=10000, help='skip sizes above this (default: 10000)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case (median is reported)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help='allowed slowdown before flagging (default: 25%%)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.20, help='allowed memory growth before flagging (default: 20%%)')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--child', nargs=3, metavar=('CASE', 'SIZE', 'URL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        case, size, url = args.child
+        print(json.dumps(measure(case, int(size), url, args.repeat)))
+        return 0
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    results = {}
+    regressed = False
+    print(f"{'case':<48}{'seconds':>10}{'items/s':>12}{'rss MB':>9}{'alloc MB':>10}{'objects':>10}")
+    for case in args.cases or CASES:
+        for size in CASES[case][3]:
+            if size > args.max_size:
+                continue
+            key = f'{case}[{size}]'
+            result = results[key] = run_case(case, size, args.repeat)
+            regressions = compare(result, baselines.get(key), args.time_tolerance, args.memory_tolerance)
+            regressed = regressed or bool(regressions)
+            rss = f"{result['peak_rss_mb']:.0f}" if result['peak_rss_mb'] else '-'
+            print(f"{key:<48}{result['seconds']:>10.3f}{result['items_per_second']:>12.0f}{rss:>9}"
+                  f"{result['alloc_peak_mb']:>10.1f}{result['objects']:>10}"
+                  + (f"  REGRESSION: {'; '.join(regressions)}" if regressions else ''))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        baselines.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f'Baseline saved to {args.baseline}')
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+'''
+Measures how long it takes a fresh interpreter to import the API clients.
+
+Each statement is timed in a new subprocess (so nothing is cached in sys.modules) and the
+heavy third party packages that ended up loaded are listed. The "eager" rows import the
+packages the library used to pull in at module load, which is the cost the lazy imports avoid.
+
+Usage:
+    python benchmarks/import_time.py [--runs 5]
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'numpy', 'sqlalchemy', 'dotenv', 'tqdm', 'requests', 'webbrowser', 'multiprocessing.pool']
+
+STATEMENTS = {
+    'file_api': 'from TrimblePy.connect.file_api import TrimbleFileApi',
+    'auth': 'from TrimblePy.common.auth import Authentication',
+    'all clients': (
+        'from TrimblePy.common.auth import Authentication; '
+        'from TrimblePy.connect.file_api import TrimbleFileApi; '
+        'from TrimblePy.connect.model_api import ModelApi; '
+        'from TrimblePy.pset.pset_api import PsetApi; '
+        'from TrimblePy.org.org_api import OrgApi; '
+        'from TrimblePy.topic.topics_api import TopicApi'
+    ),
+    'eager (file_api deps)': 'import requests, pandas',
+    'eager (auth deps)': 'import requests, pandas, sqlalchemy, dotenv, webbrowser',
+}
+
+PROBE = '''
+import sys, time, json
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def time_statement(statement, runs):
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        code = PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+        output = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        loaded = result['loaded']
+    return statistics.median(timings), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per statement (median is reported)')
+    args = parser.parse_args()
+
+    print(f"{'import':<24}{'median ms':>12}  heavy modules loaded")
+    for name, statement in STATEMENTS.items():
+        seconds, loaded = time_statement(statement, args.runs)
+        print(f"{name:<24}{seconds * 1000:>12.1f}  {', '.join(loaded) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -57,7 +57,7 @@ file_api = TrimbleFileApi(authentication=auth,project_id=project_id)
 project_file_prefix = "PROJ-REG-ZONE"
 
 try:
-    files = file_api.get_files()
+    files = file_api.get_file_table()
 except Exception as e:
     print(f"An error occurred: {e}")
 
@@ -65,8 +65,7 @@ except Exception as e:
 # see paths forward through python object with: files[0].__dir__()
 
 # otherwise create a dict / dataframe
-files_list_of_dicts = [vars(file_obj) for file_obj in files.values()]
-file_df = pd.DataFrame(files_list_of_dicts)
+file_df = files.to_frame()
 
 # We will just work with the project ifcs with project_file_prefix in specified folders
 ifc = file_df[
@@ -36,12 +36,11 @@ def create_file_register(region='ap2'):
     file_api = TrimbleFileApi(authentication=region_auth, project_id=project_id)
     # try to get files
     try:
-        files = file_api.get_files()
+        files = file_api.get_file_table()
     except Exception as e:
         print(f"An error occurred: {e}")
     # create df
-    files_list_of_dicts = [vars(file_obj) for file_obj in files.values()]
-    file_df = pd.DataFrame(files_list_of_dicts)
+    file_df = files.to_frame()
     # add region data to sql table
     conn = sqlite3.connect('file_data.db')
     table_name = f"{region}_model_data"
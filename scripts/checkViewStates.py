@@ -25,13 +25,12 @@ view_df = pd.DataFrame(views)
 
 
 try:
-    files = file_api.get_files()
+    files = file_api.get_file_table()
 except Exception as e:
     print(f"An error occurred: {e}")
 
 # /files/fs/{fileId}/downloadurl
-files_list_of_dicts = [vars(file_obj) for file_obj in files.values()]
-file_df = pd.DataFrame(files_list_of_dicts)
+file_df = files.to_frame()
 
 def check_model_states(row, file_df):
     m = row.models
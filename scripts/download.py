@@ -1,7 +1,5 @@
 from TrimblePy.common.auth import Authentication
 from TrimblePy.connect.file_api import TrimbleFileApi
-import pandas as pd
-from io import StringIO
 
 region = 'AP'
 
@@ -17,55 +15,42 @@ project_id = projects[0]['id']
 # -----------------------------------------------------------------
 
 
-file_api = TrimbleFileApi(authentication=auth,project_id=project_id)
+# file versions never change - repeated downloads are served from ~/.trimblepy/blobs
+file_api = TrimbleFileApi(authentication=auth,project_id=project_id,blob_cache=True)
 
 project_file_prefix = "NEL-STH-NSA"
 
 try:
-    files = file_api.get_files()
+    files = file_api.get_file_table()
 except Exception as e:
     print(f"An error occurred: {e}")
 
 # /files/fs/{fileId}/downloadurl
-files_list_of_dicts = [vars(file_obj) for file_obj in files.values()]
-file_df = pd.DataFrame(files_list_of_dicts)
+file_df = files.to_frame()
 
 # folder
 folder_df = file_df[file_df.full_path=='/99 Working/JP/CH']
-dl_urls = []
-for id in folder_df.id:
-    dl_urls.append(file_api.download_url(id))
-    
-folder_df['dl_url'] = dl_urls
+folder_df['dl_url'] = file_api.download_urls(folder_df.id, folder_df.versionId)
 
 # csv
-id = file_df[file_df['name'].str.contains('csv')].iloc[20].id
-file = file_api.download(id)
-text = file.decode('utf-8')
-df = pd.read_csv(StringIO(text), lineterminator='\n', header=1)
+row = file_df[file_df['name'].str.contains('csv')].iloc[20]
+df = file_api.read_csv(row.id, row.versionId, row.md5, lineterminator='\n', header=1)
 
 
 # excel
-id = file_df[file_df['name'].str.contains('xlsx')].iloc[20].id
-file = file_api.download(id)
-df = pd.read_excel(file)
-
-# xml
-import lxml.etree as ET
-id = file_df[file_df['name'].str.contains('xml')].iloc[20].id
-file = file_api.download(id)
-# x00v\x00a\x00l\x00u\x00e\x00>\x00\r\x00\n\x00 \x00 \x00 \x00 \x00 \x00 \x00 \x00 \x00 \x00
-decoded_file = file.decode('utf-16')
-tree = ET.parse(StringIO(decoded_file))
-number_of_lines = len(decoded_file.split('\n')) 
-
-# ifc
+row = file_df[file_df['name'].str.contains('xlsx')].iloc[20]
+df = file_api.read_excel(row.id, row.versionId, row.md5)
+
+# xml - UTF-16 encoded; the parser reads the encoding from the file on disk
+row = file_df[file_df['name'].str.contains('xml')].iloc[20]
+tree = file_api.read_xml_tree(row.id, row.versionId, row.md5)
+with file_api.open_mapped(row.id, row.versionId, row.md5) as mapped:
+    number_of_lines = sum(1 for _ in iter(mapped.readline, b''))
+
+# ifc - parsed from the file on disk instead of bytes -> str -> StringIO copies
 import ifcopenshell
-id = file_df[file_df['name'].str.contains('ifc')].iloc[20].id
-file = file_api.download(id)
-# in bytes = convert to string
-string_file = StringIO(file.decode('utf-8')).read()
-# all \r and \n should be converted to 
-model = ifcopenshell.open
+row = file_df[file_df['name'].str.contains('ifc')].iloc[20]
+path = file_api.download_to_file(row.id, version_id=row.versionId, md5=row.md5)
+model = ifcopenshell.open(path)
 # bcf
 
@@ -3,7 +3,6 @@ from TrimblePy.connect.file_api import TrimbleFileApi
 from TrimblePy.connect.model_api import ModelApi
 from TrimblePy.connect.model_api import Entity
 from TrimblePy.topic.topics_api import TopicApi
-import pandas as pd
 import sqlite3
 import re
 import json
@@ -14,13 +13,12 @@ import json
 # -----------------------------------------------------------------
 def create_file_register(file_api):
     try:
-        files = file_api.get_files()
+        files = file_api.get_file_table()
     except Exception as e:
         print(f"An error occurred: {e}")
     # create df
     print("Normalising file data")
-    files_list_of_dicts = [vars(file_obj) for file_obj in files.values()]
-    file_df = pd.DataFrame(files_list_of_dicts)
+    file_df = files.to_frame()
     # add region data to sql table
     conn = sqlite3.connect('file_data.db')
     table_name = f"{region}_model_data"
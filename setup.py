@@ -20,5 +20,9 @@ setup(
     author_email='jpickup@laingorourke.com.au',
     url='https://github.com/RayKing99/TrimblePy',
     license=license,
-    packages=find_packages(exclude=('tests', 'docs'))
+    packages=find_packages(exclude=('tests', 'docs')),
+    extras_require={
+        # TrimblePy.aio clients
+        'async': ['aiohttp>=3.8'],
+    },
 )
\ No newline at end of file
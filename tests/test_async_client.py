@@ -0,0 +1,43 @@
+import asyncio
+
+from TrimblePy.aio.file_api import AsyncTrimbleFileApi
+from TrimblePy.connect.downloads import file_md5
+from TrimblePy.testing.fake_server import FakeProject, FakeTrimbleServer
+
+
+def test_download_files(tmp_path):
+    project = FakeProject(files=6, folders=2, file_size=3 * 1024 * 1024 + 17)
+    with FakeTrimbleServer(project) as server:
+        async def run():
+            api = AsyncTrimbleFileApi(server.authentication(), project.project_id)
+            table = await api.get_file_table()
+            results = await api.download_files(table, str(tmp_path), progress=False)
+            await api.transport.close()
+            return table, results
+
+        table, results = asyncio.run(run())
+
+    assert len(results) == 6
+    assert {result['status'] for result in results} == {'downloaded'}
+    for result in results:
+        assert result['error'] is None
+        assert file_md5(result['path']) == table[result['id']].md5
+
+
+def test_sync_files(tmp_path):
+    project = FakeProject(files=50, activities=20)
+    path = str(tmp_path / 'sync.db')
+    with FakeTrimbleServer(project) as server:
+        async def run():
+            api = AsyncTrimbleFileApi(server.authentication(), project.project_id)
+            first = await api.sync_files(path=path)
+            project.delete_file(3)
+            second = await api.sync_files(path=path)
+            await api.transport.close()
+            return first, second
+
+        first, second = asyncio.run(run())
+
+    assert len(first) == 50
+    assert len(second) == 49
+    assert 'F3' not in second
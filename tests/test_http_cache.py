@@ -0,0 +1,46 @@
+from requests.structures import CaseInsensitiveDict
+
+from TrimblePy.common.http_cache import ResponseCache
+from TrimblePy.common.pagination import collect
+
+
+class StoredResponse:
+    # the parts of a requests.Response that ResponseCache.store reads
+    def __init__(self, content, headers):
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers)
+
+
+def test_new_version_replaces_decoded_body(tmp_path):
+    cache = ResponseCache(str(tmp_path), shared_json=True)
+    cache.store('url', 'scope', StoredResponse(b'[1]', {'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}))
+    assert cache.revalidated(cache.lookup('url', 'scope')).json() == [1]
+    cache.store('url', 'scope', StoredResponse(b'[2]', {'Last-Modified': 'Tue, 02 Jan 2024 00:00:00 GMT'}))
+    assert cache.revalidated(cache.lookup('url', 'scope')).json() == [2]
+
+
+def test_cached_headers_are_case_insensitive(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store('page1', 'scope', StoredResponse(b'[1, 2]', {'etag': '"a"', 'Next': 'page2'}))
+    cache.store('page2', 'scope', StoredResponse(b'[3, 4]', {'etag': '"b"'}))
+    first = cache.revalidated(cache.lookup('page1', 'scope'))
+    assert first.headers.get('ETag') == '"a"'
+    assert first.headers.get('next') == 'page2'
+    # every page answered from the cache (a 304 per page) still follows the Next links
+    get = lambda url: cache.revalidated(cache.lookup(url, 'scope'))
+    assert collect(get, 'page1') == [1, 2, 3, 4]
+
+
+def test_hits_return_fresh_objects(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store('url', 'scope', StoredResponse(b'[{"name": "a"}]', {'ETag': '"a"'}))
+    tags = cache.revalidated(cache.lookup('url', 'scope')).json()
+    tags.append({'name': 'b'})
+    assert cache.revalidated(cache.lookup('url', 'scope')).json() == [{'name': 'a'}]
+
+
+def test_shared_json_reuses_the_decoded_object(tmp_path):
+    cache = ResponseCache(str(tmp_path), shared_json=True)
+    cache.store('url', 'scope', StoredResponse(b'[1]', {'ETag': '"a"'}))
+    first = cache.revalidated(cache.lookup('url', 'scope')).json()
+    assert cache.revalidated(cache.lookup('url', 'scope')).json() is first